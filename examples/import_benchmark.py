@@ -0,0 +1,67 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-27 09:00:00 UTC
+# 文件描述：导入耗时基准：对比只导入 xqclog.alerts 与同时导入全部内置通知器的冷启动耗时
+# 文件路径：examples/import_benchmark.py
+
+import statistics
+import subprocess
+import sys
+
+# 每个场景在新的解释器中运行，测量的是冷启动导入耗时
+SCENARIOS = {
+    "import xqclog.alerts（按需导入通知器）": "import xqclog.alerts",
+    "import xqclog.alerts + 全部内置通知器": (
+        "import xqclog.alerts\n"
+        "from xqclog.alerts import DingTalkNotifier, WeixinWebhookNotifier, WeixinAppNotifier, EmailNotifier"
+    ),
+}
+
+# 通知器模块依赖的较重的标准库/第三方模块
+HEAVY_MODULES = ("smtplib", "ssl", "email.mime.multipart", "requests", "yaml")
+
+_CODE = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def measure(statement: str, runs: int = 10) -> tuple:
+    """
+    在新的解释器中多次执行导入语句
+
+    :param statement: 导入语句
+    :param runs: 运行次数
+    :return: (耗时中位数（毫秒）, 导入后已加载的较重模块)
+    """
+    timings = []
+    loaded = ""
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _CODE.format(statement=statement, heavy=HEAVY_MODULES)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.splitlines()
+        timings.append(float(output[0]) * 1000)
+        loaded = output[1] if len(output) > 1 else ""
+    return statistics.median(timings), loaded
+
+
+def main() -> None:
+    """运行基准并输出结果"""
+    print(f"Python {sys.version.split()[0]}，每个场景运行 10 次取中位数\n")
+    for title, statement in SCENARIOS.items():
+        median, loaded = measure(statement)
+        print(f"{title}: {median:.1f} ms")
+        print(f"    已加载: {loaded or '（无）'}")
+
+    print("\n查看各模块的导入耗时明细: python -X importtime -c \"import xqclog.alerts\"")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2026-10-17 09:00:00 UTC
+# 文件描述：测试公共夹具
+# 文件路径：tests/conftest.py
+
+import pytest
+
+from xqclog.alerts import BaseNotifier, get_alert_manager
+
+
+class RecordingNotifier(BaseNotifier):
+    """记录收到的告警和批次，不做网络请求"""
+
+    def __init__(self, **config):
+        super().__init__(config.pop("name", None) or "recording", **config)
+        self.sent = []
+        self.fail = config.get("fail", False)
+
+    def send(self, alert_msg):
+        if self.fail:
+            return False
+        self.sent.append(alert_msg.message)
+        return True
+
+    def send_batch(self, batch):
+        if self.fail:
+            return False
+        self.sent.extend(alert_msg.message for alert_msg in batch.alerts)
+        return True
+
+
+@pytest.fixture
+def manager():
+    """全局告警管理器，测试结束后清空通知器并恢复默认配置"""
+    alert_manager = get_alert_manager()
+    alert_manager.register_custom_notifier("recording", RecordingNotifier)
+    alert_manager.configure(events=False)
+    yield alert_manager
+    alert_manager.shutdown(timeout=1.0)
+    alert_manager.replace_notifiers(())
+    alert_manager.configure(events=False)
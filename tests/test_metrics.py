@@ -0,0 +1,122 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2026-10-17 09:00:00 UTC
+# 文件描述：告警指标 Prometheus 文本格式导出的测试（按严格的文本格式规则解析）
+# 文件路径：tests/test_metrics.py
+
+import re
+from typing import Dict, List, Tuple
+
+import pytest
+
+from xqclog.alerts import AlertMetrics
+
+_NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+_LABEL = r'[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\\\|\\"|\\n)*"'
+_SAMPLE = re.compile(rf"^({_NAME})(?:\{{((?:{_LABEL})(?:,{_LABEL})*)?\}})? (\S+)$")
+_TYPES = ("counter", "gauge", "histogram", "summary", "untyped")
+_HISTOGRAM_SUFFIXES = ("_bucket", "_sum", "_count")
+
+
+def parse_exposition(text: str) -> Dict[str, Tuple[str, List[Tuple[str, str, float]]]]:
+    """
+    按 Prometheus 文本格式的规则严格解析（node_exporter textfile collector 会拒绝的内容在这里抛出异常）
+
+    :param text: 文本内容
+    :return: {指标族: (类型, [(样本名, 标签, 值), ...])}
+    :raises ValueError: 格式错误
+    """
+    families: Dict[str, Tuple[str, List[Tuple[str, str, float]]]] = {}
+    finished = set()
+    current = None
+    series = set()
+    if not text.endswith("\n"):
+        raise ValueError("内容必须以换行结尾")
+
+    for line in text.splitlines():
+        if line.startswith("#"):
+            parts = line.split(None, 3)
+            if len(parts) >= 2 and parts[1] in ("HELP", "TYPE"):
+                if len(parts) < 3 or not re.fullmatch(_NAME, parts[2]):
+                    raise ValueError(f"指标名不合法: {line}")
+                name = parts[2]
+                if parts[1] == "TYPE":
+                    if len(parts) != 4 or parts[3] not in _TYPES:
+                        raise ValueError(f"类型不合法: {line}")
+                    if name in families:
+                        raise ValueError(f"指标族重复声明: {name}")
+                    families[name] = (parts[3], [])
+                if name in finished:
+                    raise ValueError(f"指标族的样本不连续: {name}")
+            continue
+
+        match = _SAMPLE.match(line)
+        if match is None:
+            raise ValueError(f"样本格式错误: {line}")
+        name, labels, value = match.group(1), match.group(2) or "", match.group(3)
+        family = name
+        if family not in families:
+            for suffix in _HISTOGRAM_SUFFIXES:
+                base = name[:-len(suffix)]
+                if name.endswith(suffix) and families.get(base, ("",))[0] == "histogram":
+                    family = base
+                    break
+        if family not in families:
+            raise ValueError(f"样本所属的指标族没有声明类型: {line}")
+        if family in finished:
+            raise ValueError(f"指标族的样本不连续: {family}")
+        if current is not None and current != family:
+            finished.add(current)
+        current = family
+        if (name, labels) in series:
+            raise ValueError(f"重复的时间序列: {line}")
+        series.add((name, labels))
+        families[family][1].append((name, labels, float(value)))
+    return families
+
+
+def test_labelled_gauges_declare_family_once():
+    metrics = AlertMetrics()
+    metrics.record_delivery("a", "success", latency=0.02, end_to_end=0.03)
+    metrics.record_delivery("b", "failed", latency=1.5)
+    text = metrics.to_prometheus({
+        "queue_depth": 3,
+        "bulkhead_inflight": {(("notifier", "a"),): 1, (("notifier", 'b"x'),): 0},
+    })
+
+    families = parse_exposition(text)
+    kind, samples = families["xqclog_alert_bulkhead_inflight"]
+    assert kind == "gauge"
+    assert samples == [
+        ("xqclog_alert_bulkhead_inflight", 'notifier="a"', 1.0),
+        ("xqclog_alert_bulkhead_inflight", 'notifier="b\\"x"', 0.0),
+    ]
+    assert families["xqclog_alert_queue_depth"] == ("gauge", [("xqclog_alert_queue_depth", "", 3.0)])
+    assert families["xqclog_alert_notifier_latency_seconds"][0] == "histogram"
+
+
+def test_parser_rejects_labels_in_type_line():
+    with pytest.raises(ValueError):
+        parse_exposition('# TYPE x{notifier="a"} gauge\nx{notifier="a"} 1\n')
+    with pytest.raises(ValueError):
+        parse_exposition("# TYPE x gauge\nx 1\n# TYPE x gauge\nx 2\n")
+
+
+def test_manager_metrics_file_is_valid(manager, tmp_path):
+    manager.replace_notifiers([
+        manager.create_notifier("recording", name=name, alert_levels=["ERROR"], rate_limit=False)
+        for name in ("a", "b")
+    ])
+    manager.send_alert("ERROR", "boom")
+    path = tmp_path / "alerts.prom"
+    manager.write_metrics(str(path))
+    text = path.read_text(encoding="utf-8")
+
+    families = parse_exposition(text)
+    labels = [labels for _, labels, _ in families["xqclog_alert_bulkhead_inflight"][1]]
+    assert labels == ['notifier="a"', 'notifier="b"']
+
+    # 安装了官方客户端时再用它的解析器检查一遍
+    parser = pytest.importorskip("prometheus_client.parser")
+    names = [family.name for family in parser.text_string_to_metric_families(text)]
+    assert names.count("xqclog_alert_bulkhead_inflight") == 1
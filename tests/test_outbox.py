@@ -0,0 +1,77 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2026-10-17 09:00:00 UTC
+# 文件描述：持久化发件箱（记录、确认、崩溃恢复）和启动补发的测试
+# 文件路径：tests/test_outbox.py
+
+import time
+
+from xqclog.alerts import AlertMessage, AlertOutbox
+
+
+def _write(path, messages, ack=()):
+    outbox = AlertOutbox(str(path), fsync="always")
+    outbox.start()
+    ids = [outbox.append(AlertMessage("ERROR", message)) for message in messages]
+    for index in ack:
+        outbox.ack(ids[index])
+    outbox.close()
+    return ids
+
+
+def test_unacked_alerts_survive_restart(tmp_path):
+    path = tmp_path / "alerts.outbox"
+    ids = _write(path, ["a", "b", "c"], ack=[1])
+
+    pending = AlertOutbox(str(path)).pending()
+    assert [outbox_id for outbox_id, _ in pending] == [ids[0], ids[2]]
+    assert [alert_msg.message for _, alert_msg in pending] == ["a", "c"]
+
+
+def test_half_written_line_is_ignored(tmp_path):
+    path = tmp_path / "alerts.outbox"
+    _write(path, ["a"])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "id": 99, "alert": {"lev')
+
+    outbox = AlertOutbox(str(path))
+    assert [alert_msg.message for _, alert_msg in outbox.pending()] == ["a"]
+    # 新编号接着已有的编号
+    outbox.start()
+    assert outbox.append(AlertMessage("ERROR", "b")) == 2
+    outbox.close()
+
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_manager_replays_and_acks_pending_alerts(manager, tmp_path):
+    path = tmp_path / "alerts.outbox"
+    _write(path, ["lost 1", "lost 2"])
+
+    manager.configure(events=False, outbox=str(path), retry_count=1)
+    notifier = manager.create_notifier("recording", name="r", alert_levels=["ERROR"], rate_limit=False)
+    manager.replace_notifiers([notifier])
+
+    assert manager.replay_outbox() == 2
+    assert _wait(lambda: notifier.sent == ["lost 1", "lost 2"])
+    assert _wait(lambda: manager.get_outbox_stats()["pending"] == 0)
+    manager.shutdown(timeout=1.0)
+    assert AlertOutbox(str(path)).pending() == []
+
+
+def test_failed_alerts_stay_in_outbox(manager, tmp_path):
+    path = tmp_path / "alerts.outbox"
+    manager.configure(events=False, outbox=str(path), retry_count=1)
+    manager.replace_notifiers([
+        manager.create_notifier("recording", name="r", alert_levels=["ERROR"], rate_limit=False, fail=True)
+    ])
+
+    manager.send_alert("ERROR", "undeliverable")
+    report = manager.shutdown(timeout=1.0)
+    assert report["flushed"] == 0
+    assert [alert_msg.message for _, alert_msg in AlertOutbox(str(path)).pending()] == ["undeliverable"]
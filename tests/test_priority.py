@@ -0,0 +1,82 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2026-10-17 09:00:00 UTC
+# 文件描述：优先级待处理队列（级别优先、老化、挤出）的测试
+# 文件路径：tests/test_priority.py
+
+import pytest
+
+from xqclog.alerts import PriorityBacklog
+from xqclog.alerts.base import LEVEL_SEVERITY
+from xqclog.alerts import priority
+
+WARNING = LEVEL_SEVERITY["WARNING"]
+ERROR = LEVEL_SEVERITY["ERROR"]
+CRITICAL = LEVEL_SEVERITY["CRITICAL"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可控的单调时钟"""
+    now = [1000.0]
+    monkeypatch.setattr(priority.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_aging_zero_is_strict_by_level(clock):
+    backlog = PriorityBacklog(aging=0)
+    backlog.push("w1", WARNING)
+    clock[0] += 60
+    backlog.push("w2", WARNING)
+    backlog.push("e1", ERROR)
+    backlog.push("c1", CRITICAL)
+    assert backlog.drain() == ["c1", "e1", "w1", "w2"]
+
+
+def test_critical_passes_recent_warning_backlog(clock):
+    backlog = PriorityBacklog()
+    for i in range(100):
+        backlog.push(f"w{i}", WARNING)
+    clock[0] += 1
+    backlog.push("c", CRITICAL)
+    assert backlog.pop() == "c"
+    assert backlog.pop() == "w0"
+
+
+def test_critical_is_not_overtaken_by_aged_entries(clock):
+    backlog = PriorityBacklog(aging=5.0)
+    backlog.push("w", WARNING)
+    clock[0] += 600
+    backlog.push("c", CRITICAL)
+    assert backlog.drain() == ["c", "w"]
+
+
+def test_aging_promotes_lower_levels_below_critical(clock):
+    backlog = PriorityBacklog(aging=5.0)
+    backlog.push("old_warning", WARNING)
+    clock[0] += 6
+    backlog.push("new_error", ERROR)
+    assert backlog.pop() == "old_warning"
+
+    backlog.push("warning", WARNING)
+    clock[0] += 1
+    backlog.push("error", ERROR)
+    assert backlog.drain() == ["new_error", "error", "warning"]
+
+
+def test_evict_takes_lowest_level(clock):
+    backlog = PriorityBacklog()
+    backlog.push("w1", WARNING)
+    backlog.push("w2", WARNING)
+    backlog.push("e", ERROR)
+    assert backlog.evict(newest=True) == "w2"
+    assert backlog.evict(newest=False) == "w1"
+    assert backlog.counts() == {ERROR: 1}
+    assert len(backlog) == 1
+
+
+def test_empty_backlog_raises():
+    with pytest.raises(IndexError):
+        PriorityBacklog().pop()
+    with pytest.raises(ValueError):
+        PriorityBacklog(aging=-1)
@@ -0,0 +1,67 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2026-10-17 09:00:00 UTC
+# 文件描述：告警路由和静默规则的测试
+# 文件路径：tests/test_routing.py
+
+from xqclog.alerts import AlertMessage, AlertRouter, enable_events
+
+
+class _Notifier:
+    """路由只用到通知器名称"""
+
+    def __init__(self, name):
+        self.name = name
+
+
+def _router(routes=None, silences=None, names=("pay", "ops", "mail")):
+    router = AlertRouter(routes, silences)
+    router.bind([_Notifier(name) for name in names])
+    return router
+
+
+def _names(targets):
+    return None if targets is None else [notifier.name for notifier in targets]
+
+
+def test_first_matching_rule_wins_unless_continue():
+    router = _router([
+        {"modules": "app.payment", "notifiers": ["pay"], "continue": True},
+        {"levels": ["CRITICAL"], "notifiers": ["ops"]},
+        {"levels": ["CRITICAL"], "notifiers": ["mail"]},
+    ])
+    assert _names(router.route(AlertMessage("ERROR", "x", module="app.payment.api"))) == ["pay"]
+    assert _names(router.route(AlertMessage("CRITICAL", "x", module="app.payment"))) == ["pay", "ops"]
+    assert _names(router.route(AlertMessage("ERROR", "x", module="app.paymentx"))) is None
+
+
+def test_unknown_notifier_falls_back_to_all_notifiers():
+    enable_events(False)
+    try:
+        router = _router([{"levels": ["CRITICAL"], "notifiers": ["pay_dingtalkk"]}])
+        assert router.route(AlertMessage("CRITICAL", "boom")) is None
+    finally:
+        enable_events(True)
+    stats = router.get_stats()
+    assert stats["unresolved"] == 1
+    assert stats["silenced"] == 0
+
+
+def test_partially_unknown_route_keeps_existing_notifiers():
+    enable_events(False)
+    try:
+        router = _router([{"levels": ["ERROR"], "notifiers": ["pay", "nope"]}])
+        assert _names(router.route(AlertMessage("ERROR", "x"))) == ["pay"]
+    finally:
+        enable_events(True)
+
+
+def test_silences_remove_notifiers_but_not_forced_alerts():
+    router = _router(silences=[
+        {"start": "00:00", "end": "23:59:59", "levels": ["WARNING"], "notifiers": ["mail"]},
+        {"start": "00:00", "end": "23:59:59", "modules": "app.noisy"},
+    ])
+    assert _names(router.route(AlertMessage("WARNING", "x"))) == ["pay", "ops"]
+    assert router.route(AlertMessage("ERROR", "x", module="app.noisy.a")) == ()
+    assert router.route(AlertMessage("ERROR", "x", module="app.noisy.a", force_send=True)) is None
+    assert router.get_stats()["silenced"] == 1
@@ -0,0 +1,64 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2026-10-17 09:00:00 UTC
+# 文件描述：告警风暴控制器（进入/退出、按级别采样、汇总）的测试
+# 文件路径：tests/test_storm.py
+
+import pytest
+
+from xqclog.alerts import AlertMessage, StormController
+
+
+def _storm(**kwargs):
+    options = dict(threshold=5, window=10, cool_down=30, sample_rate=0.0, summary_interval=60)
+    options.update(kwargs)
+    return StormController(**options)
+
+
+def _flood(storm, now, count=5):
+    for i in range(count):
+        storm.admit(AlertMessage("WARNING", f"w{i}"), now=now)
+
+
+def test_enters_storm_at_threshold():
+    storm = _storm()
+    for i in range(4):
+        assert storm.admit(AlertMessage("WARNING", f"w{i}"), now=100.0)
+    assert not storm.active
+    assert not storm.admit(AlertMessage("WARNING", "w4"), now=100.0)
+    assert storm.active
+
+
+def test_levels_during_storm():
+    storm = _storm()
+    _flood(storm, 100.0)
+    assert storm.admit(AlertMessage("CRITICAL", "down"), now=100.5)
+    assert storm.admit(AlertMessage("ERROR", "db error", module="db", line=1), now=100.5)
+    assert not storm.admit(AlertMessage("ERROR", "db error", module="db", line=1), now=100.5)
+    assert not storm.admit(AlertMessage("WARNING", "slow"), now=100.5)
+
+
+def test_summary_and_exit():
+    storm = _storm(summary_interval=15)
+    _flood(storm, 100.0)
+    assert storm.poll(now=105.0) is None
+
+    summary = storm.poll(now=115.0)
+    assert summary is not None
+    assert summary.level == "CRITICAL"
+    assert summary.force_send is True
+    assert summary.extra["storm_suppressed"] == {"WARNING": 1}
+
+    # 窗口内没有告警后从下一次检查开始冷却，持续 cool_down 秒后退出并生成结束汇总
+    assert storm.poll(now=120.0) is None
+    assert storm.active
+    ended = storm.poll(now=146.0)
+    assert not storm.active
+    assert ended is not None and ended.level == "SUCCESS"
+
+
+def test_invalid_config():
+    with pytest.raises(ValueError):
+        StormController(threshold=0)
+    with pytest.raises(ValueError):
+        StormController(sample_rate=1.5)
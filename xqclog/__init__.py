@@ -4,16 +4,13 @@
 # 文件描述：xqclog模块的入口文件，提供便捷的导入接口
 # 文件路径：xqclog/__init__.py
 
+from typing import Any
+
 from .logger import XQCLogger, get_logger, init_logger
 from .config import LogConfig
 from .presets import Presets
 from . import decorators
 
-from .alerts.email import EmailNotifier
-from .alerts.dingtalk import DingTalkNotifier
-from .alerts.weixin_app import WeixinAppNotifier
-from .alerts.weixin_webhook import WeixinWebhookNotifier
-
 __version__ = "0.0.3"
 __author__ = "Xiaoqiang"
 __description__ = "⚡ 基于 Loguru 的自用 Python 日志模块 - 开箱即用"
@@ -41,3 +38,22 @@ __all__ = [
 # - 启用彩色输出
 # - 不输出初始化提示信息（静默初始化）
 logger = init_logger(silent=True)
+
+# 告警通知类在第一次访问时才导入（不使用告警功能时不加载告警模块）
+_LAZY_NOTIFIERS = ("EmailNotifier", "DingTalkNotifier", "WeixinAppNotifier", "WeixinWebhookNotifier")
+
+
+def __getattr__(name: str) -> Any:
+    """
+    按需导入告警通知类（PEP 562）
+
+    :param name: 属性名
+    :return: 通知器类
+    """
+    if name in _LAZY_NOTIFIERS:
+        from . import alerts
+
+        value = getattr(alerts, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,13 +4,27 @@
 # 文件描述：告警模块的入口文件
 # 文件路径：xqclog/alerts/__init__.py
 
+from typing import Any
+
 from .base import BaseNotifier, AlertMessage
-from .dingtalk import DingTalkNotifier
-from .weixin_webhook import WeixinWebhookNotifier
-from .weixin_app import WeixinAppNotifier
-from .email import EmailNotifier
 from .manager import AlertManager, get_alert_manager
-from .registry import NotifierRegistry
+from .registry import NotifierRegistry, BUILTIN_NOTIFIERS
+from .dispatcher import AlertDispatcher
+from .dedup import AlertDeduplicator
+from .batching import AlertBatch, AlertBatcher
+from .scheduler import TimerScheduler
+from .circuit import CircuitBreaker
+from .outbox import AlertOutbox
+from .bulkhead import Bulkhead, BulkheadFull
+from .templates import AlertTemplate, SectionTemplate, BatchTemplate
+from .metrics import AlertMetrics, LatencyHistogram
+from .events import AlertEvent, set_event_handler, enable_events
+from .coordination import SharedAlertTable, SharedTokenBucket
+from .storm import StormController
+from .routing import AlertRouter, RuleIndex, SilenceWindow
+from .process_backend import ProcessAlertBackend
+from .priority import PriorityBacklog
+from .transport import HttpTransport, FakeTransport, get_transport, set_transport, configure_transport
 
 __all__ = [
     "BaseNotifier",
@@ -22,4 +36,67 @@ __all__ = [
     "AlertManager",
     "get_alert_manager",
     "NotifierRegistry",
-]
\ No newline at end of file
+    "AlertDispatcher",
+    "AlertDeduplicator",
+    "AlertBatch",
+    "AlertBatcher",
+    "HttpTransport",
+    "FakeTransport",
+    "get_transport",
+    "set_transport",
+    "configure_transport",
+    "SMTPSession",
+    "TimerScheduler",
+    "CircuitBreaker",
+    "AlertOutbox",
+    "Bulkhead",
+    "BulkheadFull",
+    "AlertTemplate",
+    "SectionTemplate",
+    "BatchTemplate",
+    "AlertMetrics",
+    "LatencyHistogram",
+    "AlertEvent",
+    "set_event_handler",
+    "enable_events",
+    "SharedAlertTable",
+    "SharedTokenBucket",
+    "StormController",
+    "AlertRouter",
+    "RuleIndex",
+    "SilenceWindow",
+    "ProcessAlertBackend",
+    "PriorityBacklog",
+]
+
+# 内置通知器和 SMTPSession 在第一次访问时才导入（避免启动时加载 smtplib、email.mime 等模块）
+_LAZY_ATTRS = {
+    "DingTalkNotifier": BUILTIN_NOTIFIERS["dingtalk"],
+    "WeixinWebhookNotifier": BUILTIN_NOTIFIERS["weixin_webhook"],
+    "WeixinAppNotifier": BUILTIN_NOTIFIERS["weixin_app"],
+    "EmailNotifier": BUILTIN_NOTIFIERS["email"],
+    "SMTPSession": ".smtp_session:SMTPSession",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """
+    按需导入通知器类（PEP 562）
+
+    :param name: 属性名
+    :return: 导入的对象
+    """
+    reference = _LAZY_ATTRS.get(name)
+    if reference is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    module_name, _, attr = reference.partition(":")
+    value = getattr(import_module(module_name, __name__), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    """包含按需导入的属性"""
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -5,8 +5,33 @@
 # 文件路径：xqclog/alerts/base.py
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Optional, List, Tuple, TYPE_CHECKING
 from datetime import datetime
+from collections import deque
+import threading
+import time
+
+from .ratelimit import TokenBucket
+from .circuit import CircuitBreaker
+from .bulkhead import Bulkhead
+from .templates import AlertTemplate, BatchTemplate, SectionTemplate
+from .transport import get_transport
+from .events import emit
+from .metrics import LatencyEstimator
+
+if TYPE_CHECKING:
+    from .batching import AlertBatch
+
+# 日志级别严重程度（与 loguru 的级别数值一致）
+LEVEL_SEVERITY = {
+    "TRACE": 5,
+    "DEBUG": 10,
+    "INFO": 20,
+    "SUCCESS": 25,
+    "WARNING": 30,
+    "ERROR": 40,
+    "CRITICAL": 50,
+}
 
 
 class AlertMessage:
@@ -43,6 +68,8 @@ class AlertMessage:
         self.function = function
         self.line = line
         self.force_send = force_send  # 新增
+        self.outbox_id: Optional[int] = None  # 持久化发件箱中的编号（启用发件箱时设置）
+        self.targets: Optional[Tuple['BaseNotifier', ...]] = None  # 路由结果（配置路由规则时设置），None 表示所有通知器
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -61,20 +88,104 @@ class AlertMessage:
             "force_send": self.force_send,  # 新增
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AlertMessage':
+        """
+        从字典创建告警消息（to_dict 的逆操作）
+
+        :param data: 字典表示
+        :return: 告警消息对象
+        """
+        timestamp = data.get("timestamp")
+        return cls(
+            level=data["level"],
+            message=data["message"],
+            timestamp=datetime.fromisoformat(timestamp) if timestamp else None,
+            extra=data.get("extra"),
+            module=data.get("module"),
+            function=data.get("function"),
+            line=data.get("line"),
+            force_send=data.get("force_send"),
+        )
+
 
 class BaseNotifier(ABC):
     """告警通知器抽象基类"""
 
+    # 平台默认的发送频率限制（子类可覆盖），None 表示不限流
+    default_rate_limit: Optional[Dict[str, Any]] = None
+
+    # 默认的消息模板（子类可覆盖，在类定义时编译一次）
+    default_template: Optional[AlertTemplate] = None
+
+    # 默认的批量摘要模板（子类可覆盖）
+    default_batch_template = BatchTemplate(
+        "告警汇总: 共 {total} 条\n时间范围: {first} ~ {last}\n{levels}{messages}",
+        levels=SectionTemplate("级别统计: ", "{key}×{value}", separator="，"),
+        messages=SectionTemplate("\n高频消息:", "\n  {index}. ({value}次) {key}"),
+    )
+
+    # 默认的最大并发发送数（子类可覆盖），每个通知器使用独立的线程池
+    default_max_concurrency = 4
+
+    # 默认的熔断配置（子类可覆盖），None 表示不熔断
+    default_circuit_breaker: Optional[Dict[str, Any]] = {
+        "failure_threshold": 5,
+        "failure_ratio": 0.5,
+        "window": 20,
+        "min_calls": 10,
+        "recovery_timeout": 30.0,
+    }
+
     def __init__(self, name: str, **config: Any) -> None:
         """
         初始化通知器
 
         :param name: 通知器名称
         :param config: 配置参数
+            - rate_limit: 限流配置（可选），如 {"rate": 20, "per": 60, "burst": 20, "max_deferred": 100}，
+                          False 表示关闭限流，不配置时使用 default_rate_limit
+            - transport: 自定义HTTP传输层（可选），默认使用全局共享的连接池
+            - circuit_breaker: 熔断配置（可选），如 {"failure_threshold": 5, "recovery_timeout": 30}，
+                               False 表示关闭熔断，不配置时使用 default_circuit_breaker
+            - max_concurrency: 该通知器的最大并发发送数（可选，默认 default_max_concurrency）
+            - queue_size: 该通知器等待发送的任务数上限（可选，默认100），超出后直接判定失败
+            - template: 自定义消息模板（可选），模板文本或 {"body", "location", "extra", "time_format"}，
+                        在创建通知器时编译，格式错误会直接抛出 ValueError
         """
         self.name = name
         self.config = config
         self.enabled = config.get("enabled", True)
+        # 告警级别：创建时转换为集合，None 表示默认不发送（除非强制发送）
+        alert_levels = config.get("alert_levels")
+        self.alert_levels: Optional[frozenset] = frozenset(alert_levels) if alert_levels is not None else None
+        self._transport = config.get("transport")
+
+        # 限流：超限的告警先暂存，等有令牌时合并成一条汇总发送
+        rate_limit = config.get("rate_limit", self.default_rate_limit)
+        self.rate_limiter = TokenBucket.from_config(rate_limit)
+        max_deferred = rate_limit.get("max_deferred", 100) if isinstance(rate_limit, dict) else 100
+        self._deferred: deque = deque(maxlen=max_deferred)
+        self._deferred_total = 0
+        self._deferred_lock = threading.Lock()
+
+        # 消息模板：在创建通知器（add_notifier）时编译，发送时只做渲染
+        self.template = AlertTemplate.from_config(config.get("template"), self.default_template)
+
+        # 熔断：渠道持续失败时直接跳过，不再等待超时和重试
+        self.circuit_breaker = CircuitBreaker.from_config(
+            config.get("circuit_breaker", self.default_circuit_breaker)
+        )
+
+        # 隔离舱：独立的有界线程池（第一次发送时才创建线程），慢渠道不会拖慢其他渠道
+        self.bulkhead = Bulkhead(
+            name,
+            max_concurrency=config.get("max_concurrency", self.default_max_concurrency),
+            queue_size=config.get("queue_size", 100),
+        )
+
+        # 成功发送的耗时估计（hedged 策略据此决定何时启动下一个渠道）
+        self.latency = LatencyEstimator()
 
     @abstractmethod
     def send(self, alert_msg: AlertMessage) -> bool:
@@ -101,22 +212,146 @@ class BaseNotifier(ABC):
         if alert_msg.force_send is not None:
             return alert_msg.force_send
 
-        # 3. 检查级别过滤
-        alert_levels = self.config.get("alert_levels")
+        # 3. 检查级别过滤（alert_levels 为 None 或空时不发送）
+        alert_levels = self.alert_levels
+        return alert_levels is not None and alert_msg.level in alert_levels
 
-        # 如果 alert_levels 为 None，表示默认不发送（除非强制发送）
-        if alert_levels is None:
-            return False
+    @property
+    def http(self) -> Any:
+        """
+        HTTP传输层（复用连接池，子类发送HTTP请求时应使用它而不是直接调用 requests）
 
-        # 如果 alert_levels 是空列表，也表示不发送
-        if not alert_levels:
-            return False
+        :return: 传输层实例，提供 get/post/request 方法
+        """
+        return self._transport if self._transport is not None else get_transport()
 
-        # 检查当前日志级别是否在配置的告警级别中
-        if alert_msg.level not in alert_levels:
-            return False
+    def is_available(self) -> bool:
+        """
+        通知器当前是否可用（已启用且未熔断）
+
+        :return: 是否可用
+        """
+        return self.enabled and (self.circuit_breaker is None or self.circuit_breaker.is_available())
+
+    def warmup(self, steps: Dict[str, float]) -> None:
+        """
+        预热通知器（解析域名、建立连接、获取token、验证登录等），子类按需覆盖
+
+        在后台线程中执行，第一条告警不必再承担这些耗时。
+
+        :param steps: 各步骤耗时 {步骤名: 秒}，由各步骤写入（失败时保留已完成的步骤）
+        :raises Exception: 任一步骤失败（异常信息以步骤名开头）
+        """
+
+    @staticmethod
+    def _warmup_step(steps: Dict[str, float], name: str, func: Callable[[], Any]) -> Any:
+        """
+        执行一个预热步骤并记录耗时
+
+        :param steps: 步骤耗时字典
+        :param name: 步骤名
+        :param func: 步骤函数
+        :return: 步骤函数的返回值
+        :raises RuntimeError: 步骤失败
+        """
+        start = time.monotonic()
+        try:
+            return func()
+        except Exception as e:
+            raise RuntimeError(f"{name}: {e}") from e
+        finally:
+            steps[name] = round(time.monotonic() - start, 4)
 
-        return True
+    def _warmup_http(self, steps: Dict[str, float], url: str, timeout: Optional[float] = None) -> None:
+        """
+        预热HTTP渠道：解析域名，并在共享连接池中建立到目标主机的连接
+
+        :param steps: 步骤耗时字典
+        :param url: 告警接口地址
+        :param timeout: 超时时间（秒）
+        """
+        # 自定义传输层可能没有预热接口
+        transport = self.http
+        resolve = getattr(transport, "resolve", None)
+        if resolve is not None:
+            self._warmup_step(steps, "dns", lambda: resolve(url))
+        warmup = getattr(transport, "warmup", None)
+        if warmup is not None:
+            self._warmup_step(steps, "connect", lambda: warmup(url, timeout=timeout))
+
+    def _emit(self, event: str, message: str, level: str = "info", exc_info: bool = False, **fields: Any) -> None:
+        """
+        发出通知器事件（自动附带通知器名称）
+
+        :param event: 事件名称
+        :param message: 可读的事件描述
+        :param level: 事件级别
+        :param exc_info: 是否附带当前正在处理的异常
+        :param fields: 其他结构化字段
+        """
+        emit(event, message, level=level, exc_info=exc_info, notifier=self.name, **fields)
+
+    def acquire_send_slot(self) -> bool:
+        """
+        获取一次发送配额（未配置限流时总是成功）
+
+        :return: 是否允许立即发送
+        """
+        return self.rate_limiter is None or self.rate_limiter.try_acquire()
+
+    def defer(self, alert_msg: AlertMessage) -> Optional[AlertMessage]:
+        """
+        暂存被限流的告警
+
+        :param alert_msg: 告警消息对象
+        :return: 暂存区已满时被挤掉的最旧告警（只计入汇总的总数），否则返回None
+        """
+        with self._deferred_lock:
+            displaced = self._deferred[0] if len(self._deferred) == self._deferred.maxlen else None
+            self._deferred.append(alert_msg)
+            self._deferred_total += 1
+        return displaced
+
+    def has_deferred(self) -> bool:
+        """
+        是否有被限流暂存的告警
+
+        :return: 是否有暂存告警
+        """
+        return self._deferred_total > 0
+
+    def pop_deferred(self) -> Tuple[List[AlertMessage], int]:
+        """
+        取出全部暂存告警
+
+        :return: (保留的告警列表, 暂存总数)，总数可能大于列表长度（超出 max_deferred 的被丢弃）
+        """
+        with self._deferred_lock:
+            alerts = list(self._deferred)
+            total = self._deferred_total
+            self._deferred.clear()
+            self._deferred_total = 0
+        return alerts, total
+
+    def send_batch(self, batch: 'AlertBatch') -> bool:
+        """
+        发送批量告警摘要（子类可覆盖以使用平台专属的排版）
+
+        默认把摘要文本包装成一条告警消息交给 send 发送。
+
+        :param batch: 告警批次
+        :return: 是否发送成功
+        """
+        return self.send(batch.to_alert_message(self.format_batch(batch)))
+
+    def format_batch(self, batch: 'AlertBatch') -> str:
+        """
+        格式化批量告警摘要（可被子类覆盖）
+
+        :param batch: 告警批次
+        :return: 格式化后的摘要
+        """
+        return self.default_batch_template.render(batch, self.config.get("batch_top_n", 5))
 
     def format_message(self, alert_msg: AlertMessage) -> str:
         """
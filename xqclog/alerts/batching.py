@@ -0,0 +1,210 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-21 15:00:00 UTC
+# 文件描述：告警批量合并，把时间窗口内的突发告警合并为一条摘要
+# 文件路径：xqclog/alerts/batching.py
+
+from typing import Dict, Any, List, Optional, Callable, Tuple, Iterable
+from datetime import datetime
+import threading
+import time
+
+from .base import AlertMessage, LEVEL_SEVERITY
+
+
+class AlertBatch:
+    """告警批次（摘要数据）"""
+
+    def __init__(self, alerts: Optional[Iterable[AlertMessage]] = None, omitted: int = 0) -> None:
+        """
+        初始化告警批次
+
+        :param alerts: 初始告警列表
+        :param omitted: 已被丢弃、未保留在 alerts 中的告警数量（计入总数）
+        """
+        self.alerts: List[AlertMessage] = []
+        self.level_counts: Dict[str, int] = {}
+        self.message_counts: Dict[str, int] = {}
+        self.first_time: Optional[datetime] = None
+        self.last_time: Optional[datetime] = None
+        self.omitted = omitted
+        self.created = time.monotonic()
+        self.delivered = 0  # 逐条发送时已送达的告警数（重试时跳过已送达的告警）
+
+        for alert_msg in alerts or ():
+            self.add(alert_msg)
+
+    def add(self, alert_msg: AlertMessage) -> None:
+        """
+        添加一条告警
+
+        :param alert_msg: 告警消息对象
+        """
+        self.alerts.append(alert_msg)
+        self.level_counts[alert_msg.level] = self.level_counts.get(alert_msg.level, 0) + 1
+        self.message_counts[alert_msg.message] = self.message_counts.get(alert_msg.message, 0) + 1
+        if self.first_time is None:
+            self.first_time = alert_msg.timestamp
+        self.last_time = alert_msg.timestamp
+
+    @property
+    def total(self) -> int:
+        """批次内告警总数（含被丢弃的）"""
+        return len(self.alerts) + self.omitted
+
+    @property
+    def level(self) -> str:
+        """批次内最高的告警级别"""
+        return max(
+            self.level_counts,
+            key=lambda lv: LEVEL_SEVERITY.get(lv, 0),
+            default="WARNING",
+        )
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def top_messages(self, n: int = 5) -> List[Tuple[str, int]]:
+        """
+        出现次数最多的N条不同消息
+
+        :param n: 返回条数
+        :return: [(消息, 次数), ...]，按次数从高到低
+        """
+        return sorted(self.message_counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def level_summary(self) -> List[Tuple[str, int]]:
+        """
+        按级别统计的告警数量
+
+        :return: [(级别, 次数), ...]，按严重程度从高到低
+        """
+        return sorted(
+            self.level_counts.items(),
+            key=lambda item: LEVEL_SEVERITY.get(item[0], 0),
+            reverse=True,
+        )
+
+    def time_range(self) -> Tuple[str, str]:
+        """
+        批次的首末时间
+
+        :return: (首条时间, 末条时间)，格式 %Y-%m-%d %H:%M:%S
+        """
+        fmt = '%Y-%m-%d %H:%M:%S'
+        first = self.first_time.strftime(fmt) if self.first_time else "-"
+        last = self.last_time.strftime(fmt) if self.last_time else "-"
+        return first, last
+
+    def filter(self, predicate: Callable[[AlertMessage], bool]) -> 'AlertBatch':
+        """
+        筛选出满足条件的告警组成新批次（被丢弃的告警无法筛选，数量原样保留）
+
+        :param predicate: 筛选函数
+        :return: 新批次
+        """
+        return AlertBatch(
+            (alert_msg for alert_msg in self.alerts if predicate(alert_msg)),
+            omitted=self.omitted,
+        )
+
+    def to_alert_message(self, text: str) -> AlertMessage:
+        """
+        将批次包装为一条告警消息（供只实现了 send 的通知器使用）
+
+        :param text: 摘要文本
+        :return: 告警消息对象
+        """
+        return AlertMessage(
+            level=self.level,
+            message=text,
+            timestamp=self.last_time,
+            extra={"batch_size": self.total},
+            force_send=True,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为字典
+
+        :return: 字典表示
+        """
+        first, last = self.time_range()
+        return {
+            "total": self.total,
+            "level": self.level,
+            "level_counts": dict(self.level_counts),
+            "top_messages": self.top_messages(),
+            "first_time": first,
+            "last_time": last,
+        }
+
+
+class AlertBatcher:
+    """告警批量合并器：按时间窗口和批次大小收集告警"""
+
+    def __init__(self, window: float, max_size: int = 100) -> None:
+        """
+        初始化合并器
+
+        :param window: 合并窗口（秒），从批次第一条告警开始计时
+        :param max_size: 单个批次的最大告警数，达到后立即发送
+        """
+        if window <= 0:
+            raise ValueError("batch_window 必须大于 0")
+        if max_size <= 0:
+            raise ValueError("max_batch_size 必须大于 0")
+
+        self.window = window
+        self.max_size = max_size
+        self._batch: Optional[AlertBatch] = None
+        self._lock = threading.Lock()
+
+    def add(self, alert_msg: AlertMessage) -> Optional[AlertBatch]:
+        """
+        加入一条告警
+
+        :param alert_msg: 告警消息对象
+        :return: 批次已满时返回该批次（调用方负责发送），否则返回None
+        """
+        with self._lock:
+            if self._batch is None:
+                self._batch = AlertBatch()
+            self._batch.add(alert_msg)
+            if len(self._batch) >= self.max_size:
+                batch, self._batch = self._batch, None
+                return batch
+        return None
+
+    def flush_due(self, now: Optional[float] = None) -> Optional[AlertBatch]:
+        """
+        取出已到合并窗口的批次
+
+        :param now: 当前时间（time.monotonic()），用于测试
+        :return: 到期的批次或None
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._batch is not None and now - self._batch.created >= self.window:
+                batch, self._batch = self._batch, None
+                return batch
+        return None
+
+    def flush(self) -> Optional[AlertBatch]:
+        """
+        立即取出当前批次（不论是否到期）
+
+        :return: 当前批次或None
+        """
+        with self._lock:
+            batch, self._batch = self._batch, None
+        return batch
+
+    def pending(self) -> int:
+        """
+        当前批次中等待发送的告警数
+
+        :return: 告警数量
+        """
+        batch = self._batch
+        return len(batch) if batch is not None else 0
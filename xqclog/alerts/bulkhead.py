@@ -0,0 +1,214 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-24 15:00:00 UTC
+# 文件描述：通知器隔离舱，每个通知器使用独立的有界线程池，慢渠道不会占满其他渠道的工作线程；
+#          排队中的任务按告警级别优先执行
+# 文件路径：xqclog/alerts/bulkhead.py
+
+from typing import Dict, Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+from .priority import PriorityBacklog
+
+
+class BulkheadFull(RuntimeError):
+    """隔离舱已满（运行中和排队中的任务数达到上限）"""
+
+
+class Bulkhead:
+    """
+    隔离舱（有界线程池，线程池在第一次提交任务时才创建）
+
+    任务先放入优先级队列，每提交一个任务向线程池提交一次"取出并执行当前优先级最高的任务"，
+    所以积压时后到的 CRITICAL 会先于排队中的 WARNING 执行。
+    """
+
+    def __init__(self, name: str, max_concurrency: int = 4, queue_size: int = 100, aging: float = 5.0) -> None:
+        """
+        初始化隔离舱
+
+        :param name: 名称（用作工作线程名前缀）
+        :param max_concurrency: 最大并发发送数（工作线程数）
+        :param queue_size: 等待执行的任务数上限，超出后先挤出更低级别的排队任务，没有时直接拒绝
+        :param aging: 排队任务每等待多少秒提升一个级别，0 表示严格按级别
+        """
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency 必须大于 0")
+        if queue_size < 0:
+            raise ValueError("queue_size 不能小于 0")
+
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)  # 任务全部结束时通知
+        self._inflight = 0  # 运行中 + 排队中的任务数
+        self._running = 0  # 运行中的任务数
+        self._pending = PriorityBacklog(aging)  # 排队中的任务 (任务函数, 被挤出时的回调)
+        self._stats = {"submitted": 0, "rejected": 0, "completed": 0, "cancelled": 0, "evicted": 0}
+        self._closed = False
+        self._cancel_pending = False  # 关闭时丢弃排队中的任务
+        self._retired = False  # 通知器已被移除：继续执行剩余任务，空闲时释放线程
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取（按需创建）线程池（需持有锁）"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix=f"xqclog-{self.name}",
+            )
+        return self._executor
+
+    @property
+    def aging(self) -> float:
+        """排队任务每等待多少秒提升一个级别"""
+        return self._pending.aging
+
+    @aging.setter
+    def aging(self, value: float) -> None:
+        with self._lock:
+            self._pending.aging = value
+
+    def submit(
+            self,
+            func: Callable[[], Any],
+            severity: int = 0,
+            on_evict: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        """
+        提交任务
+
+        :param func: 无参数的任务函数
+        :param severity: 严重程度（LEVEL_SEVERITY 中的数值），越高越先执行
+        :param on_evict: 任务在排队期间被挤出或在关闭时被丢弃时的回调（不会再执行 func）
+        :raises BulkheadFull: 任务数达到上限且没有更低级别的排队任务可以挤出
+        :raises RuntimeError: 隔离舱已关闭
+        """
+        evicted = None
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"通知器 {self.name} 的线程池已关闭")
+            if self._inflight >= self.max_concurrency + self.queue_size:
+                lowest = self._pending.lowest_severity()
+                if lowest is None or lowest >= severity:
+                    self._stats["rejected"] += 1
+                    raise BulkheadFull(f"通知器 {self.name} 的待发送任务已满（{self._inflight}）")
+                # 挤出最低级别中最新的任务，它的执行名额留给新任务
+                evicted = self._pending.evict(newest=True)
+                self._stats["evicted"] += 1
+            else:
+                self._inflight += 1
+            self._stats["submitted"] += 1
+            entry = (func, on_evict)
+            self._pending.push(entry, severity)
+            executor = self._get_executor()
+
+        if evicted is not None:
+            if evicted[1] is not None:
+                evicted[1]()
+            return
+
+        try:
+            executor.submit(self._run_next)
+        except RuntimeError:
+            # 线程池已关闭（解释器正在退出）：排队任务数要和线程池中的取任务操作一一对应
+            with self._lock:
+                removed = self._pending.remove(entry)
+                orphan = None if removed else self._pending.pop()
+            self._release()
+            if removed:
+                raise
+            # 新任务已被其他工作线程取走执行，改为丢弃一个排队中的任务
+            if orphan[1] is not None:
+                orphan[1]()
+
+    def _run_next(self) -> None:
+        """在工作线程中取出并执行优先级最高的任务"""
+        with self._lock:
+            func, on_evict = self._pending.pop()
+            cancelled = self._cancel_pending
+            if cancelled:
+                self._stats["cancelled"] += 1
+            else:
+                self._running += 1
+        try:
+            if not cancelled:
+                func()
+            elif on_evict is not None:
+                on_evict()
+        finally:
+            if not cancelled:
+                with self._lock:
+                    self._running -= 1
+            self._release()
+
+    def _release(self) -> None:
+        """任务结束，释放名额（已退役的隔离舱空闲时释放线程）"""
+        executor = None
+        with self._lock:
+            self._inflight -= 1
+            self._stats["completed"] += 1
+            if self._inflight == 0:
+                self._idle.notify_all()
+                if self._retired:
+                    executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def retire(self) -> None:
+        """
+        通知器被移除时调用：已开始的发送（包括之后的重试）照常执行，全部结束后释放线程，
+        之后再有重试提交时按需重新创建线程池
+        """
+        with self._lock:
+            self._retired = True
+            if self._inflight:
+                return
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待运行中和排队中的任务全部结束
+
+        :param timeout: 最长等待时间（秒），None 表示一直等待
+        :return: 是否已全部结束
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._inflight == 0, timeout)
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> int:
+        """
+        关闭线程池
+
+        :param wait: 是否等待已提交的任务执行完
+        :param cancel_pending: 是否丢弃还在排队、尚未开始的任务（正在执行的任务无法中断）
+        :return: 被丢弃的任务数
+        """
+        with self._lock:
+            self._closed = True
+            self._cancel_pending = cancel_pending
+            pending = len(self._pending) if cancel_pending else 0
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        return pending
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取隔离舱统计
+
+        :return: 统计信息字典
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["inflight"] = self._inflight
+            stats["running"] = self._running
+            stats["queued"] = len(self._pending)
+        stats["max_concurrency"] = self.max_concurrency
+        stats["queue_size"] = self.queue_size
+        stats["started"] = self._executor is not None
+        return stats
@@ -0,0 +1,181 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-23 18:00:00 UTC
+# 文件描述：通知器熔断器，渠道持续失败时快速跳过，避免每条告警都等待超时和重试
+# 文件路径：xqclog/alerts/circuit.py
+
+from typing import Dict, Any, Optional, Union
+from collections import deque
+import threading
+import time
+
+
+class CircuitBreaker:
+    """熔断器（closed/open/half_open 三态，线程安全）"""
+
+    CLOSED = "closed"  # 正常放行
+    OPEN = "open"  # 熔断中，直接拒绝
+    HALF_OPEN = "half_open"  # 恢复探测，只放行少量试探请求
+
+    def __init__(
+            self,
+            failure_threshold: int = 5,
+            failure_ratio: float = 0.5,
+            window: int = 20,
+            min_calls: int = 10,
+            recovery_timeout: float = 30.0,
+            half_open_max_calls: int = 1,
+    ) -> None:
+        """
+        初始化熔断器
+
+        :param failure_threshold: 连续失败达到该次数时熔断
+        :param failure_ratio: 最近 window 次调用中失败比例达到该值时熔断
+        :param window: 统计失败比例的最近调用次数
+        :param min_calls: 调用次数不足该值时不按比例熔断
+        :param recovery_timeout: 熔断后经过该时间（秒）进入半开状态，放行试探请求
+        :param half_open_max_calls: 半开状态下同时放行的试探请求数
+        """
+        if failure_threshold <= 0 or window <= 0:
+            raise ValueError("failure_threshold 和 window 必须大于 0")
+        if not 0 < failure_ratio <= 1:
+            raise ValueError("failure_ratio 必须在 (0, 1] 之间")
+
+        self.failure_threshold = failure_threshold
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = max(half_open_max_calls, 1)
+
+        self._state = self.CLOSED
+        self._outcomes: deque = deque(maxlen=window)  # 最近的调用结果（True=失败）
+        self._failures = 0  # _outcomes 中的失败次数
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._rejected = 0
+        self._trips = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Union[Dict[str, Any], bool, None]) -> Optional['CircuitBreaker']:
+        """
+        根据配置创建熔断器
+
+        :param config: 熔断配置，如 {"failure_threshold": 5, "recovery_timeout": 30}；None/False 表示不熔断
+        :return: CircuitBreaker实例或None
+        """
+        if not config:
+            return None
+        if config is True:
+            return cls()
+        if not isinstance(config, dict):
+            raise ValueError(f"circuit_breaker 配置格式错误: {config}")
+        return cls(**config)
+
+    @property
+    def state(self) -> str:
+        """当前状态（熔断时间已到但还没有请求进来时报告为 half_open）"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def is_available(self) -> bool:
+        """
+        是否可以尝试发送（不占用半开状态的试探名额）
+
+        :return: 未熔断或已到恢复时间时返回True
+        """
+        return self.state != self.OPEN
+
+    def allow_request(self) -> bool:
+        """
+        申请一次调用（半开状态下会占用试探名额，调用后必须记录结果）
+
+        :return: 是否放行
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    self._rejected += 1
+                    return False
+                self._state = self.HALF_OPEN
+                self._half_open_calls = 0
+
+            if self._state == self.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self._rejected += 1
+                    return False
+                self._half_open_calls += 1
+            return True
+
+    def record_success(self) -> None:
+        """记录一次成功调用"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                # 试探成功：恢复正常，清空历史
+                self._state = self.CLOSED
+                self._outcomes.clear()
+                self._failures = 0
+            else:
+                self._record(False)
+            self._consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        """记录一次失败调用"""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN:
+                # 试探失败：重新熔断
+                self._trip()
+                return
+
+            self._record(True)
+            if self._state == self.CLOSED and (
+                    self._consecutive_failures >= self.failure_threshold
+                    or (len(self._outcomes) >= self.min_calls
+                        and self._failures >= self.failure_ratio * len(self._outcomes))
+            ):
+                self._trip()
+
+    def _record(self, failed: bool) -> None:
+        """记录调用结果到滑动窗口（需持有锁）"""
+        if len(self._outcomes) == self._outcomes.maxlen and self._outcomes[0]:
+            self._failures -= 1
+        self._outcomes.append(failed)
+        if failed:
+            self._failures += 1
+
+    def _trip(self) -> None:
+        """进入熔断状态（需持有锁）"""
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_calls = 0
+        self._trips += 1
+
+    def reset(self) -> None:
+        """手动恢复到正常状态"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._outcomes.clear()
+            self._failures = 0
+            self._consecutive_failures = 0
+            self._half_open_calls = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取熔断器状态
+
+        :return: 状态字典
+        """
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": self._failures,
+                "consecutive_failures": self._consecutive_failures,
+                "trips": self._trips,
+                "rejected": self._rejected,
+            }
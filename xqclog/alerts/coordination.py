@@ -0,0 +1,352 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-26 09:00:00 UTC
+# 文件描述：多进程告警协调（文件锁保护的共享内存映射表），同一台机器上的工作进程共享去重和限流状态
+# 文件路径：xqclog/alerts/coordination.py
+
+from typing import Dict, Any, Iterator, Optional, Tuple
+from contextlib import contextmanager
+from pathlib import Path
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .ratelimit import TokenBucket
+from .token_cache import fcntl, file_lock
+
+# 文件头：魔数、去重槽位数、限流槽位数
+_HEADER = struct.Struct("<8sII")
+_HEADER_SIZE = 32
+_MAGIC = b"XQCLOG1\0"
+
+# 去重槽位：(指纹, 窗口结束时间, 持有者进程号, 其他进程被抑制的次数)
+_DEDUP_SLOT = struct.Struct("<QdiI")
+
+# 限流槽位：(键, 剩余令牌, 上次补充时间)
+_BUCKET_SLOT = struct.Struct("<Qdd")
+
+
+def _key(value: str) -> int:
+    """
+    把字符串映射为非零的64位整数键
+
+    :param value: 字符串（告警指纹或限流键）
+    :return: 整数键
+    """
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+class SharedAlertTable:
+    """
+    多进程共享的告警状态表（线程安全、进程安全）
+
+    同一台机器上的工作进程打开同一个文件并映射到内存，读写时持有文件锁。
+    使用墙钟时间（time.time()），进程崩溃后其记录到期自动失效，不需要额外的服务进程。
+    """
+
+    def __init__(self, path: str, slots: int = 4096, bucket_slots: int = 64) -> None:
+        """
+        打开（不存在时创建）共享表
+
+        :param path: 共享表文件路径（同一台机器上的工作进程应配置为同一个路径）
+        :param slots: 去重槽位数（同时处于抑制窗口内的指纹上限），文件已存在时以文件中的为准
+        :param bucket_slots: 限流槽位数（共享限流的通知器数量上限），文件已存在时以文件中的为准
+        """
+        if slots <= 0 or bucket_slots <= 0:
+            raise ValueError("slots 和 bucket_slots 必须大于 0")
+
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread_lock = threading.Lock()
+        self._stats = {"claimed": 0, "suppressed": 0, "table_full": 0}
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        # fork 出的子进程与父进程共享同一个打开的文件描述，flock 在它们之间不互斥，换进程后要重新打开
+        self._lock_fd = self._fd
+        self._lock_pid = os.getpid()
+        try:
+            with self._locked_file():
+                self.slots, self.bucket_slots = self._init_file(slots, bucket_slots)
+                self._mm = mmap.mmap(self._fd, self._size(self.slots, self.bucket_slots))
+        except Exception:
+            os.close(self._fd)
+            raise
+        self._bucket_offset = _HEADER_SIZE + self.slots * _DEDUP_SLOT.size
+
+    @staticmethod
+    def _size(slots: int, bucket_slots: int) -> int:
+        """计算文件大小"""
+        return _HEADER_SIZE + slots * _DEDUP_SLOT.size + bucket_slots * _BUCKET_SLOT.size
+
+    def _init_file(self, slots: int, bucket_slots: int) -> Tuple[int, int]:
+        """
+        读取文件头，文件为空或损坏时初始化（需持有文件锁）
+
+        :return: (去重槽位数, 限流槽位数)
+        """
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        header = os.read(self._fd, _HEADER.size)
+        if len(header) == _HEADER.size:
+            magic, file_slots, file_bucket_slots = _HEADER.unpack(header)
+            if (
+                    magic == _MAGIC
+                    and file_slots > 0
+                    and file_bucket_slots > 0
+                    and os.fstat(self._fd).st_size >= self._size(file_slots, file_bucket_slots)
+            ):
+                return file_slots, file_bucket_slots
+
+        # 新文件：全部置零即为空表
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, self._size(slots, bucket_slots))
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, _HEADER.pack(_MAGIC, slots, bucket_slots))
+        return slots, bucket_slots
+
+    @contextmanager
+    def _locked_file(self) -> Iterator[None]:
+        """持有跨进程锁（POSIX 直接锁共享表文件，其他平台使用单独的锁文件）"""
+        if fcntl is not None:
+            fd = self._process_lock_fd()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            with file_lock(self.lock_path):
+                yield
+
+    def _process_lock_fd(self) -> int:
+        """
+        当前进程加锁用的文件描述符（进程号变化时重新打开文件）
+
+        :return: 文件描述符
+        """
+        pid = os.getpid()
+        if pid != self._lock_pid:
+            if self._lock_fd != self._fd:
+                # 从父进程继承的锁描述符，关闭不影响父进程
+                os.close(self._lock_fd)
+            self._lock_fd = os.open(self.path, os.O_RDWR)
+            self._lock_pid = pid
+        return self._lock_fd
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """持有跨进程锁（同时在进程内互斥）"""
+        with self._thread_lock:
+            with self._locked_file():
+                yield
+
+    def _find_dedup_slot(self, key: int, now: float) -> Tuple[Optional[int], bool]:
+        """
+        查找指纹所在的槽位（线性探测，需持有锁）
+
+        :param key: 指纹键
+        :param now: 当前时间（time.time()）
+        :return: (槽位偏移量, 是否为该指纹仍在窗口内的记录)；没有找到时返回可用的槽位，表满时为None
+        """
+        reusable = None
+        start = key % self.slots
+        for i in range(self.slots):
+            offset = _HEADER_SIZE + ((start + i) % self.slots) * _DEDUP_SLOT.size
+            slot_key, expires_at, _, _ = _DEDUP_SLOT.unpack_from(self._mm, offset)
+            if slot_key == 0:
+                # 空槽位：探测链到此结束
+                return (offset if reusable is None else reusable), False
+            if slot_key == key:
+                return offset, expires_at > now
+            if expires_at <= now and reusable is None:
+                # 已过期的槽位可以复用，但仍需继续查找该指纹是否在后面
+                reusable = offset
+        return reusable, False
+
+    def claim(self, fingerprint: str, window: float) -> bool:
+        """
+        申请在抑制窗口内发送该指纹的告警（所有进程中只有一个能申请成功）
+
+        申请失败时在共享表中记一次抑制，由持有者在窗口结束时通过 take_suppressed() 汇总。
+
+        :param fingerprint: 告警指纹
+        :param window: 抑制窗口（秒）
+        :return: 是否由当前进程发送（表满或出错时返回True，宁可重复也不漏发）
+        """
+        key = _key(fingerprint)
+        try:
+            with self._locked():
+                now = time.time()
+                offset, live = self._find_dedup_slot(key, now)
+                if live:
+                    slot_key, expires_at, pid, suppressed = _DEDUP_SLOT.unpack_from(self._mm, offset)
+                    _DEDUP_SLOT.pack_into(self._mm, offset, slot_key, expires_at, pid, suppressed + 1)
+                    self._stats["suppressed"] += 1
+                    return False
+                if offset is None:
+                    self._stats["table_full"] += 1
+                    return True
+                _DEDUP_SLOT.pack_into(self._mm, offset, key, now + window, os.getpid(), 0)
+                self._stats["claimed"] += 1
+                return True
+        except OSError:
+            return True
+
+    def take_suppressed(self, fingerprint: str) -> int:
+        """
+        取出（并清零）其他进程在该指纹窗口内被抑制的次数
+
+        :param fingerprint: 告警指纹
+        :return: 被抑制的次数
+        """
+        key = _key(fingerprint)
+        try:
+            with self._locked():
+                # 窗口可能刚刚结束，按 now=0 查找以包含已过期的记录
+                offset, found = self._find_dedup_slot(key, 0.0)
+                if not found:
+                    return 0
+                slot_key, expires_at, pid, suppressed = _DEDUP_SLOT.unpack_from(self._mm, offset)
+                if suppressed:
+                    _DEDUP_SLOT.pack_into(self._mm, offset, slot_key, expires_at, pid, 0)
+                return suppressed
+        except OSError:
+            return 0
+
+    def acquire_tokens(self, name: str, capacity: float, fill_rate: float, tokens: float = 1.0) -> Tuple[bool, float]:
+        """
+        从共享令牌桶中获取令牌
+
+        :param name: 限流键（通常为通知器名称）
+        :param capacity: 桶容量
+        :param fill_rate: 每秒补充的令牌数
+        :param tokens: 需要的令牌数，0 表示只查询
+        :return: (是否获取成功, 获取后剩余的令牌数)；出错时返回 (True, capacity)
+        """
+        key = _key(name)
+        try:
+            with self._locked():
+                now = time.time()
+                start = key % self.bucket_slots
+                for i in range(self.bucket_slots):
+                    offset = self._bucket_offset + ((start + i) % self.bucket_slots) * _BUCKET_SLOT.size
+                    slot_key, available, last = _BUCKET_SLOT.unpack_from(self._mm, offset)
+                    if slot_key == 0:
+                        # 第一次使用：满桶
+                        slot_key, available, last = key, capacity, now
+                    if slot_key != key:
+                        continue
+
+                    available = min(capacity, available + max(now - last, 0.0) * fill_rate)
+                    acquired = available >= tokens
+                    if acquired:
+                        available -= tokens
+                    _BUCKET_SLOT.pack_into(self._mm, offset, key, available, now)
+                    return acquired, available
+        except OSError:
+            pass
+        # 槽位已满或出错：不限制
+        return True, capacity
+
+    def token_bucket(self, name: str, local: TokenBucket) -> 'SharedTokenBucket':
+        """
+        创建与本地令牌桶参数相同的共享令牌桶
+
+        :param name: 限流键
+        :param local: 本地令牌桶（提供 rate/per/capacity）
+        :return: 共享令牌桶
+        """
+        return SharedTokenBucket(self, name, local.rate, local.per, local.capacity)
+
+    def close(self) -> None:
+        """关闭内存映射和文件"""
+        with self._thread_lock:
+            if self._mm.closed:
+                return
+            self._mm.close()
+            if self._lock_fd != self._fd:
+                os.close(self._lock_fd)
+            os.close(self._fd)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取共享表统计（当前进程的申请情况和表的占用情况）
+
+        :return: 统计信息字典（读取共享表出错时 live_fingerprints 为 None）
+        """
+        stats = dict(self._stats)
+        now = time.time()
+        live: Optional[int] = 0
+        try:
+            with self._locked():
+                for i in range(self.slots):
+                    slot_key, expires_at, _, _ = _DEDUP_SLOT.unpack_from(self._mm, _HEADER_SIZE + i * _DEDUP_SLOT.size)
+                    if slot_key and expires_at > now:
+                        live += 1
+        except OSError:
+            live = None
+        stats["path"] = str(self.path)
+        stats["live_fingerprints"] = live
+        stats["slots"] = self.slots
+        return stats
+
+
+class SharedTokenBucket:
+    """多进程共享的令牌桶（接口与 TokenBucket 相同）"""
+
+    def __init__(self, table: SharedAlertTable, name: str, rate: float, per: float = 60.0,
+                 burst: Optional[float] = None) -> None:
+        """
+        初始化共享令牌桶
+
+        :param table: 共享表
+        :param name: 限流键（同名的令牌桶在所有进程间共享）
+        :param rate: 每个周期内允许发送的消息数
+        :param per: 周期长度（秒）
+        :param burst: 桶容量，默认等于 rate
+        """
+        if rate <= 0 or per <= 0:
+            raise ValueError("rate 和 per 必须大于 0")
+
+        self.table = table
+        self.name = name
+        self.rate = rate
+        self.per = per
+        self.capacity = float(burst if burst is not None else rate)
+        self._fill_rate = rate / per
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        尝试获取令牌（不阻塞）
+
+        :param tokens: 需要的令牌数
+        :return: 是否获取成功
+        """
+        return self.table.acquire_tokens(self.name, self.capacity, self._fill_rate, tokens)[0]
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        """
+        距离可获取令牌还需等待的时间
+
+        :param tokens: 需要的令牌数
+        :return: 等待时间（秒），0 表示当前可用
+        """
+        available = self.table.acquire_tokens(self.name, self.capacity, self._fill_rate, 0.0)[1]
+        return max(tokens - available, 0.0) / self._fill_rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取限流器状态
+
+        :return: 状态字典
+        """
+        return {
+            "rate": self.rate,
+            "per": self.per,
+            "capacity": self.capacity,
+            "tokens": round(self.table.acquire_tokens(self.name, self.capacity, self._fill_rate, 0.0)[1], 3),
+            "shared": True,
+        }
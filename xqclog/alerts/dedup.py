@@ -0,0 +1,222 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-20 14:00:00 UTC
+# 文件描述：告警去重，按指纹在抑制窗口内只发送一次，并补发重复次数汇总
+# 文件路径：xqclog/alerts/dedup.py
+
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+from collections import OrderedDict
+import hashlib
+import re
+import threading
+import time
+
+from .base import AlertMessage
+
+if TYPE_CHECKING:
+    from .coordination import SharedAlertTable
+
+# 消息归一化规则（按顺序替换，先替换UUID和十六进制ID，再替换数字）
+_UUID_RE = re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b")
+_HEX_RE = re.compile(r"\b(?:0[xX][0-9a-fA-F]+|(?=[0-9a-fA-F]*[0-9])(?=[0-9a-fA-F]*[a-fA-F])[0-9a-fA-F]{8,})\b")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_message(message: str) -> str:
+    """
+    归一化告警消息：屏蔽UUID、十六进制ID和数字，使同一调用点的告警得到相同指纹
+
+    :param message: 原始消息
+    :return: 归一化后的消息
+    """
+    message = _UUID_RE.sub("<uuid>", message)
+    message = _HEX_RE.sub("<hex>", message)
+    return _NUMBER_RE.sub("<n>", message)
+
+
+def fingerprint(alert_msg: AlertMessage) -> str:
+    """
+    计算告警指纹（模块 + 函数 + 行号 + 归一化消息）
+
+    :param alert_msg: 告警消息对象
+    :return: 16位十六进制指纹
+    """
+    key = "|".join((
+        alert_msg.level,
+        alert_msg.module or "",
+        alert_msg.function or "",
+        str(alert_msg.line or ""),
+        normalize_message(alert_msg.message),
+    ))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class _DedupEntry:
+    """指纹表条目"""
+
+    __slots__ = ("window_start", "suppressed", "sample")
+
+    def __init__(self, window_start: float, sample: AlertMessage) -> None:
+        self.window_start = window_start
+        self.suppressed = 0
+        self.sample = sample
+
+
+class AlertDeduplicator:
+    """告警去重器（LRU 有界指纹表）"""
+
+    def __init__(
+            self,
+            window: float = 300.0,
+            max_entries: int = 1024,
+            shared: Optional['SharedAlertTable'] = None
+    ) -> None:
+        """
+        初始化去重器
+
+        :param window: 抑制窗口（秒），同一指纹在窗口内只发送一次
+        :param max_entries: 指纹表最大条目数，超出后淘汰最久未出现的指纹
+        :param shared: 多进程共享表（可选），配置后同一指纹在窗口内所有进程中只有一个发送，
+                       重复汇总也只由该进程发送（包含其他进程被抑制的次数）
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries 必须大于 0")
+
+        self.window = window
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _DedupEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.shared = shared
+
+    def process(
+            self,
+            alert_msg: AlertMessage,
+            now: Optional[float] = None
+    ) -> Tuple[bool, List[AlertMessage]]:
+        """
+        处理一条告警
+
+        :param alert_msg: 告警消息对象
+        :param now: 当前时间（time.monotonic()），用于测试
+        :return: (是否发送此告警, 需要补发的重复汇总消息列表)
+        """
+        now = time.monotonic() if now is None else now
+        fp = fingerprint(alert_msg)
+        summaries = []
+
+        with self._lock:
+            entry = self._entries.get(fp)
+            if entry is not None:
+                if now - entry.window_start < self.window:
+                    entry.suppressed += 1
+                    self._entries.move_to_end(fp)
+                    return False, summaries
+                # 窗口已过：先补发上一窗口的汇总，再开启新窗口
+                self._collect_shared(fp, entry)
+                if entry.suppressed:
+                    summaries.append(self._build_summary(fp, entry, now))
+                del self._entries[fp]
+
+            if self.shared is None:
+                self._open_window(fp, alert_msg, now, summaries)
+                return True, summaries
+
+        # 本进程没有该指纹的窗口：向其他进程申请，已由其他进程发送的只在共享表中计数
+        if not self.shared.claim(fp, self.window):
+            return False, summaries
+
+        with self._lock:
+            self._open_window(fp, alert_msg, now, summaries)
+        return True, summaries
+
+    def _open_window(self, fp: str, alert_msg: AlertMessage, now: float, summaries: List[AlertMessage]) -> None:
+        """
+        为指纹开启新的抑制窗口，指纹表超出上限时淘汰最久未出现的指纹（需持有锁）
+
+        :param fp: 指纹
+        :param alert_msg: 告警消息对象
+        :param now: 当前时间
+        :param summaries: 被淘汰指纹的重复汇总追加到此列表
+        """
+        self._entries[fp] = _DedupEntry(now, alert_msg)
+        while len(self._entries) > self.max_entries:
+            old_fp, old_entry = self._entries.popitem(last=False)
+            self._collect_shared(old_fp, old_entry)
+            if old_entry.suppressed:
+                summaries.append(self._build_summary(old_fp, old_entry, now))
+
+    def flush_expired(self, now: Optional[float] = None) -> List[AlertMessage]:
+        """
+        清理已过抑制窗口的指纹，并返回其重复汇总消息
+
+        :param now: 当前时间（time.monotonic()），用于测试
+        :return: 需要发送的重复汇总消息列表
+        """
+        now = time.monotonic() if now is None else now
+        summaries = []
+
+        with self._lock:
+            expired = [
+                fp for fp, entry in self._entries.items()
+                if now - entry.window_start >= self.window
+            ]
+            for fp in expired:
+                entry = self._entries.pop(fp)
+                self._collect_shared(fp, entry)
+                if entry.suppressed:
+                    summaries.append(self._build_summary(fp, entry, now))
+
+        return summaries
+
+    def _collect_shared(self, fp: str, entry: _DedupEntry) -> None:
+        """
+        把其他进程在该指纹窗口内被抑制的次数计入条目（需持有锁）
+
+        :param fp: 指纹
+        :param entry: 指纹表条目
+        """
+        if self.shared is not None:
+            entry.suppressed += self.shared.take_suppressed(fp)
+
+    def _build_summary(self, fp: str, entry: _DedupEntry, now: float) -> AlertMessage:
+        """
+        构造重复告警汇总消息
+
+        :param fp: 指纹
+        :param entry: 指纹表条目
+        :param now: 当前时间
+        :return: 汇总告警消息
+        """
+        sample = entry.sample
+        minutes = max(now - entry.window_start, 0) / 60
+        return AlertMessage(
+            level=sample.level,
+            message=f"[重复告警] 最近 {minutes:.1f} 分钟内重复 {entry.suppressed} 次: {sample.message}",
+            extra={"repeat_count": entry.suppressed, "_fingerprint": fp},
+            module=sample.module,
+            function=sample.function,
+            line=sample.line,
+        )
+
+    def clear(self) -> None:
+        """清空指纹表"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取去重统计信息
+
+        :return: 统计信息字典
+        """
+        with self._lock:
+            suppressed = sum(entry.suppressed for entry in self._entries.values())
+            return {
+                "fingerprints": len(self._entries),
+                "max_entries": self.max_entries,
+                "window": self.window,
+                "suppressed_pending": suppressed,
+            }
@@ -4,20 +4,42 @@
 # 文件描述：钉钉机器人告警通知器
 # 文件路径：xqclog/alerts/dingtalk.py
 
-import requests
 import hmac
 import hashlib
 import base64
 import time
-from typing import Any
+from typing import Any, Dict
 from urllib.parse import quote_plus
 
 from .base import BaseNotifier, AlertMessage
+from .batching import AlertBatch
+from .templates import AlertTemplate, BatchTemplate, SectionTemplate
 
 
 class DingTalkNotifier(BaseNotifier):
     """钉钉机器人通知器"""
 
+    # 钉钉机器人限制每分钟最多发送20条消息
+    default_rate_limit = {"rate": 20, "per": 60}
+
+    default_template = AlertTemplate(
+        "## {emoji} {level}级别日志告警\n\n"
+        "**时间**: {time}\n\n"
+        "**消息**: {message}\n\n"
+        "{location}{extra}",
+        location=SectionTemplate("**位置信息**:\n", "- {key}: {value}\n", "\n"),
+        extra=SectionTemplate("**额外信息**:\n", "- {key}: {value}\n"),
+    )
+
+    # 批量摘要Markdown模板
+    default_batch_template = BatchTemplate(
+        "## 🚨 告警汇总：共 {total} 条\n\n"
+        "**时间范围**: {first} ~ {last}\n\n"
+        "{levels}{messages}",
+        levels=SectionTemplate("**级别统计**:\n", "- {key}: {value} 条\n"),
+        messages=SectionTemplate("\n**高频消息**:\n", "{index}. ({value}次) {key}\n"),
+    )
+
     def __init__(self, **config: Any) -> None:
         """
         初始化钉钉通知器
@@ -28,10 +50,13 @@ class DingTalkNotifier(BaseNotifier):
             - at_mobiles: @的手机号列表（可选）
             - at_all: 是否@所有人（可选，默认False）
             - enabled: 是否启用（可选，默认True）
+            - name: 通知器名称（可选，默认为类型名，路由和静默规则按名称引用）
             - alert_levels: 触发告警的级别列表（可选）
             - timeout: 请求超时时间（可选，默认5秒）
+            - rate_limit: 限流配置（可选，默认20条/分钟，False 表示关闭）
+            - template: 自定义Markdown模板（可选），如 "## {emoji} {level}\n{message}\n{location}"
         """
-        super().__init__("dingtalk", **config)
+        super().__init__(config.pop("name", None) or "dingtalk", **config)
 
         self.webhook = config.get("webhook")
         if not self.webhook:
@@ -64,6 +89,14 @@ class DingTalkNotifier(BaseNotifier):
 
         return timestamp, sign
 
+    def warmup(self, steps: Dict[str, float]) -> None:
+        """
+        预热：解析域名并建立到钉钉接口的连接
+
+        :param steps: 各步骤耗时
+        """
+        self._warmup_http(steps, self.webhook, timeout=self.timeout)
+
     def send(self, alert_msg: AlertMessage) -> bool:
         """
         发送钉钉通知
@@ -74,80 +107,88 @@ class DingTalkNotifier(BaseNotifier):
         # ✅ 删除这里的 should_send 检查，因为在 manager 中已经统一检查了
 
         try:
-            # 根据级别设置emoji
-            level_emojis = {
-                "DEBUG": "🔍",
-                "INFO": "ℹ️",
-                "SUCCESS": "✅",
-                "WARNING": "⚠️",
-                "ERROR": "❌",
-                "CRITICAL": "🚨",
-            }
-            emoji = level_emojis.get(alert_msg.level, "📝")
-
-            # 构造Markdown消息
-            content = f"## {emoji} {alert_msg.level}级别日志告警\n\n"
-            content += f"**时间**: {alert_msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-            content += f"**消息**: {alert_msg.message}\n\n"
-
-            if alert_msg.module or alert_msg.function or alert_msg.line:
-                content += "**位置信息**:\n"
-                if alert_msg.module:
-                    content += f"- 模块: {alert_msg.module}\n"
-                if alert_msg.function:
-                    content += f"- 函数: {alert_msg.function}\n"
-                if alert_msg.line:
-                    content += f"- 行号: {alert_msg.line}\n"
-                content += "\n"
-
-            if alert_msg.extra:
-                content += "**额外信息**:\n"
-                for key, value in alert_msg.extra.items():
-                    # 跳过内部使用的 _alert 字段
-                    if key.startswith('_'):
-                        continue
-                    content += f"- {key}: {value}\n"
-
-            # 构造请求数据
-            data = {
-                "msgtype": "markdown",
-                "markdown": {
-                    "title": f"{alert_msg.level}级别告警",
-                    "text": content
-                },
-                "at": {
-                    "atMobiles": self.at_mobiles,
-                    "isAtAll": self.at_all
-                }
-            }
+            return self._post_markdown(
+                f"{alert_msg.level}级别告警",
+                self.template.render(alert_msg),
+                f"{alert_msg.level} - {alert_msg.message[:50]}",
+            )
+
+        except Exception as e:
+            self._emit("notifier.error", f"❌ 钉钉通知发送异常: {e}", level="error", exc_info=True, error=str(e))
+            return False
+
+    def send_batch(self, batch: AlertBatch) -> bool:
+        """
+        发送批量告警摘要
 
-            # 添加签名
-            url = self.webhook
-            if self.secret:
-                timestamp, sign = self._generate_sign()
-                url = f"{self.webhook}&timestamp={timestamp}&sign={sign}"
-
-            # 发送请求
-            response = requests.post(
-                url,
-                json=data,
-                timeout=self.timeout
+        :param batch: 告警批次
+        :return: 是否发送成功
+        """
+        try:
+            return self._post_markdown(
+                f"{batch.level}级别告警汇总",
+                self.format_batch(batch),
+                f"告警汇总（{batch.total} 条）",
             )
+        except Exception as e:
+            self._emit("notifier.error", f"❌ 钉钉通知发送异常: {e}", level="error", exc_info=True, error=str(e))
+            return False
+
+    def _post_markdown(self, title: str, text: str, summary: str) -> bool:
+        """
+        发送Markdown消息到钉钉机器人
 
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("errcode") == 0:
-                    print(f"✅ 钉钉通知发送成功: {alert_msg.level} - {alert_msg.message[:50]}")
-                    return True
-                else:
-                    print(f"❌ 钉钉通知发送失败: {result.get('errmsg')}")
-                    return False
+        :param title: 消息标题
+        :param text: Markdown内容
+        :param summary: 用于输出日志的简短描述
+        :return: 是否发送成功
+        """
+        # 构造请求数据
+        data = {
+            "msgtype": "markdown",
+            "markdown": {
+                "title": title,
+                "text": text
+            },
+            "at": {
+                "atMobiles": self.at_mobiles,
+                "isAtAll": self.at_all
+            }
+        }
+
+        # 添加签名
+        url = self.webhook
+        if self.secret:
+            timestamp, sign = self._generate_sign()
+            url = f"{self.webhook}&timestamp={timestamp}&sign={sign}"
+
+        # 发送请求
+        response = self.http.post(
+            url,
+            json=data,
+            timeout=self.timeout
+        )
+
+        if response.status_code == 200:
+            result = response.json()
+            if result.get("errcode") == 0:
+                self._emit("notifier.sent", f"✅ 钉钉通知发送成功: {summary}", summary=summary)
+                return True
             else:
-                print(f"❌ 钉钉通知发送失败: HTTP {response.status_code}")
+                self._emit(
+                    "notifier.failed",
+                    f"❌ 钉钉通知发送失败: {result.get('errmsg')}",
+                    level="error",
+                    summary=summary,
+                    errcode=result.get("errcode"),
+                )
                 return False
-
-        except Exception as e:
-            print(f"❌ 钉钉通知发送异常: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
\ No newline at end of file
+        else:
+            self._emit(
+                "notifier.failed",
+                f"❌ 钉钉通知发送失败: HTTP {response.status_code}",
+                level="error",
+                summary=summary,
+                status_code=response.status_code,
+            )
+            return False
@@ -0,0 +1,206 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-20 09:00:00 UTC
+# 文件描述：告警异步派发器，日志线程只负责入队，由后台线程按级别优先级执行发送策略
+# 文件路径：xqclog/alerts/dispatcher.py
+
+from typing import Dict, Any, Callable, List, Optional
+import threading
+import time
+
+from .events import emit
+from .priority import PriorityBacklog
+
+
+class AlertDispatcher:
+    """告警异步派发器（有界优先级队列 + 专用派发线程，高级别的告警先派发）"""
+
+    # 队列满时的溢出策略
+    OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+    def __init__(
+            self,
+            handler: Callable[[Dict[str, Any]], Any],
+            queue_size: int = 1000,
+            overflow: str = "drop_oldest",
+            block_timeout: float = 0.1,
+            aging: float = 5.0,
+            on_drop: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ) -> None:
+        """
+        初始化派发器
+
+        :param handler: 处理告警记录的回调（在派发线程中执行）
+        :param queue_size: 队列容量
+        :param overflow: 队列满时的策略（drop_oldest-丢弃最旧, drop_newest-丢弃最新, block-限时阻塞），
+                         只在同级别之间生效：队列中有更低级别的记录时总是先挤出低级别的
+        :param block_timeout: block 策略下最长等待时间（秒），超时后丢弃新告警
+        :param aging: 每等待多少秒提升一个级别（避免低级别告警一直排在后面），0 表示严格按级别
+        :param on_drop: 已入队的记录被溢出策略丢弃或被更高级别挤出时的回调（在锁外调用）；
+                        新记录入队失败时由 submit() 返回 False，不调用该回调
+        """
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"未知的队列溢出策略: {overflow}")
+        if queue_size <= 0:
+            raise ValueError("queue_size 必须大于 0")
+
+        self.handler = handler
+        self.on_drop = on_drop
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self._queue = PriorityBacklog(aging)
+        self._cond = threading.Condition(threading.Lock())
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # 统计计数
+        self._stats = {
+            "enqueued": 0,
+            "processed": 0,
+            "errors": 0,
+            "dropped_oldest": 0,
+            "dropped_newest": 0,
+            "dropped_timeout": 0,
+            "evicted": 0,  # 为更高级别的告警让出位置而被挤出的低级别记录
+        }
+
+    def start(self) -> None:
+        """启动派发线程"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._run,
+                name="xqclog-alert-dispatcher",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def submit(self, record: Dict[str, Any], severity: int = 0) -> bool:
+        """
+        提交告警记录（非阻塞，block 策略下最多等待 block_timeout）
+
+        :param record: 告警记录
+        :param severity: 严重程度（LEVEL_SEVERITY 中的数值），越高越先派发
+        :return: 是否成功入队
+        """
+        displaced = None
+        with self._cond:
+            if len(self._queue) >= self.queue_size:
+                lowest = self._queue.lowest_severity()
+                if lowest < severity:
+                    # 先挤出最低级别中最新的记录（等待最久的低级别记录已经积累了老化优先级）
+                    displaced = self._queue.evict(newest=True)
+                    self._stats["evicted"] += 1
+                elif self.overflow == "drop_oldest" and lowest == severity:
+                    displaced = self._queue.evict(newest=False)
+                    self._stats["dropped_oldest"] += 1
+                elif self.overflow != "block":
+                    # drop_newest，或队列中全是更高级别的记录
+                    self._stats["dropped_newest"] += 1
+                    return False
+                else:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.queue_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or not self._running:
+                            self._stats["dropped_timeout"] += 1
+                            return False
+                        self._cond.wait(remaining)
+
+            self._queue.push(record, severity)
+            self._stats["enqueued"] += 1
+            self._cond.notify_all()
+
+        if displaced is not None and self.on_drop is not None:
+            try:
+                self.on_drop(displaced)
+            except Exception as e:
+                emit("dispatch.error", f"❌ 告警丢弃回调异常: {e}", level="error", exc_info=True, error=str(e))
+        return True
+
+    def _run(self) -> None:
+        """派发线程主循环"""
+        outcome = None  # 上一条记录的处理结果，在下一次取记录时一并计入统计（只加一次锁）
+        while True:
+            with self._cond:
+                if outcome is not None:
+                    self._stats[outcome] += 1
+                    outcome = None
+                while not self._queue and self._running:
+                    self._cond.wait()
+                if not self._queue:
+                    # 已停止且队列为空
+                    return
+                record = self._queue.pop()
+                # 唤醒 block 策略下等待的生产者
+                self._cond.notify_all()
+
+            try:
+                self.handler(record)
+                outcome = "processed"
+            except Exception as e:
+                outcome = "errors"
+                emit("dispatch.error", f"❌ 告警派发异常: {e}", level="error", exc_info=True, error=str(e))
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        停止派发线程（会先处理完队列中剩余的告警）
+
+        :param timeout: 等待线程退出的最长时间（秒），None 表示一直等待
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+            thread = self._thread
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def drain(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        停止派发线程并取出队列中尚未处理的告警记录（正在处理的一条会先处理完），由调用方决定发送顺序
+
+        :param timeout: 等待正在处理的记录完成的最长时间（秒），None 表示一直等待
+        :return: 尚未处理的告警记录，按派发顺序（级别从高到低）
+        """
+        with self._cond:
+            self._running = False
+            records = self._queue.drain()
+            self._cond.notify_all()
+            thread = self._thread
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        return records
+
+    def qsize(self) -> int:
+        """
+        获取当前队列深度
+
+        :return: 队列中待处理的告警数量
+        """
+        return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取派发统计信息
+
+        :return: 统计信息字典
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queue_size"] = len(self._queue)
+            stats["queued_by_severity"] = self._queue.counts()
+        stats["capacity"] = self.queue_size
+        stats["overflow"] = self.overflow
+        stats["aging"] = self._queue.aging
+        stats["dropped"] = (
+            stats["dropped_oldest"] + stats["dropped_newest"] + stats["dropped_timeout"] + stats["evicted"]
+        )
+        return stats
@@ -5,17 +5,131 @@
 # 文件路径：xqclog/alerts/email.py
 
 import smtplib
+import socket
+from html import escape
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.header import Header
-from typing import Any
+from typing import Any, Callable, Dict, List, Optional
 
 from .base import BaseNotifier, AlertMessage
+from .batching import AlertBatch
+from .smtp_session import SMTPSession
+from .templates import AlertTemplate, BatchTemplate, SectionTemplate
+
+# HTML邮件的样式（颜色随级别变化，编译后每个级别只生成一次）
+_HTML_STYLE = """
+    <style>
+        body {{
+            font-family: 'Microsoft YaHei', Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            max-width: 600px;
+            margin: 0 auto;
+            padding: 20px;
+        }}
+        .header {{
+            background-color: {color};
+            color: white;
+            padding: 20px;
+            border-radius: 5px 5px 0 0;
+            text-align: center;
+        }}
+        .content {{
+            background-color: #f8f9fa;
+            padding: 20px;
+            border: 1px solid #dee2e6;
+            border-top: none;
+        }}
+        .info-item {{
+            margin-bottom: 10px;
+            padding: 8px;
+            background-color: white;
+            border-left: 3px solid {color};
+        }}
+        .label {{
+            font-weight: bold;
+            color: {color};
+        }}
+        .section {{
+            margin-top: 15px;
+        }}
+        .footer {{
+            margin-top: 20px;
+            padding-top: 10px;
+            border-top: 1px solid #dee2e6;
+            text-align: center;
+            color: #6c757d;
+            font-size: 12px;
+        }}
+    </style>
+"""
 
 
 class EmailNotifier(BaseNotifier):
     """邮件通知器"""
 
+    # SMTP 发送慢且连接数有限，默认并发比 Webhook 通知器低
+    default_max_concurrency = 2
+
+    # HTML正文模板（告警内容会做HTML转义）
+    default_template = AlertTemplate(
+        "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"UTF-8\">"
+        + _HTML_STYLE +
+        "</head>\n<body>\n"
+        "<div class=\"header\"><h2>🚨 {level}级别日志告警</h2></div>\n"
+        "<div class=\"content\">\n"
+        "<div class=\"info-item\"><span class=\"label\">时间:</span> {time}</div>\n"
+        "<div class=\"info-item\"><span class=\"label\">级别:</span> {level}</div>\n"
+        "<div class=\"info-item\"><span class=\"label\">消息:</span> {message}</div>\n"
+        "{location}{extra}"
+        "</div>\n"
+        "<div class=\"footer\">此邮件由 XQCLog 日志系统自动发送，请勿回复</div>\n"
+        "</body>\n</html>\n",
+        location=SectionTemplate(
+            '<div class="section"><strong>位置信息:</strong><br>',
+            '<div class="info-item">{key}: {value}</div>',
+            '</div>',
+        ),
+        extra=SectionTemplate(
+            '<div class="section"><strong>额外信息:</strong><br>',
+            '<div class="info-item">{key}: {value}</div>',
+            '</div>',
+        ),
+        escape=escape,
+    )
+
+    # 纯文本正文模板
+    default_text_template = AlertTemplate(
+        "【{level}级别日志告警】\n\n"
+        "时间: {time}\n"
+        "级别: {level}\n"
+        "消息: {message}\n\n"
+        "{location}{extra}"
+        "---\n"
+        "此邮件由 XQCLog 日志系统自动发送",
+        location=SectionTemplate("位置信息:\n", "  {key}: {value}\n", "\n"),
+        extra=SectionTemplate("额外信息:\n", "  {key}: {value}\n", "\n"),
+    )
+
+    # 批量摘要HTML模板（单个表格，消息内容会做HTML转义）
+    default_batch_html_template = BatchTemplate(
+        "<!DOCTYPE html>\n<html>\n<head><meta charset=\"UTF-8\"></head>\n"
+        "<body style=\"font-family: 'Microsoft YaHei', Arial, sans-serif; color: #333;\">\n"
+        "<h2>🚨 告警汇总：共 {total} 条</h2>\n"
+        "<table border=\"1\" cellpadding=\"6\" cellspacing=\"0\" style=\"border-collapse: collapse; max-width: 800px;\">\n"
+        "<tr><th align=\"left\">时间范围</th><td colspan=\"2\">{first} ~ {last}</td></tr>\n"
+        "<tr><th align=\"left\">级别统计</th><td colspan=\"2\">{levels}</td></tr>\n"
+        "<tr><th>#</th><th>次数</th><th>消息</th></tr>\n"
+        "{messages}"
+        "</table>\n"
+        "<p style=\"color: #6c757d; font-size: 12px;\">此邮件由 XQCLog 日志系统自动发送，请勿回复</p>\n"
+        "</body>\n</html>\n",
+        levels=SectionTemplate("", "{key}×{value}", separator="，"),
+        messages=SectionTemplate("", "<tr><td>{index}</td><td>{value}</td><td>{key}</td></tr>\n"),
+        escape=escape,
+    )
+
     def __init__(self, **config: Any) -> None:
         """
         初始化邮件通知器
@@ -33,10 +147,22 @@ class EmailNotifier(BaseNotifier):
             - cc_addrs: 抄送地址列表（可选）
             - subject_prefix: 邮件主题前缀（可选，默认"[日志告警]"）
             - enabled: 是否启用（可选，默认True）
+            - name: 通知器名称（可选，默认为类型名，路由和静默规则按名称引用）
             - alert_levels: 触发告警的级别列表（可选）
             - timeout: 发送超时时间（可选，默认10秒）
+            - rate_limit: 限流配置（可选，默认不限流），如 {"rate": 10, "per": 60}
+            - keep_alive: 是否复用已登录的SMTP连接（可选，默认True）
+            - max_connections: 保留的最大空闲SMTP连接数（可选，默认1）
+            - max_idle_time: 空闲超过该时间（秒）的连接不再复用（可选，默认300）
+            - batch_as_digest: 批量告警是否合并为一封摘要邮件（可选，默认True，
+                               False 时在同一个SMTP连接上逐封发送）
+            - smtp_factory: 自定义SMTP连接工厂（可选，用于连接本地测试服务器）
+            - max_concurrency: 最大并发发送数（可选，默认2）
+            - template: 自定义HTML正文模板（可选，告警内容会自动做HTML转义）
+            - text_template: 自定义纯文本正文模板（可选）
         """
-        super().__init__("email", **config)
+        super().__init__(config.pop("name", None) or "email", **config)
+        self.text_template = AlertTemplate.from_config(config.get("text_template"), self.default_text_template)
 
         self.smtp_host = config.get("smtp_host")
         self.smtp_port = config.get("smtp_port", 465 if config.get("use_ssl") else 25)
@@ -63,6 +189,22 @@ class EmailNotifier(BaseNotifier):
 
         self.subject_prefix = config.get("subject_prefix", "[日志告警]")
         self.timeout = config.get("timeout", 10)
+        self.keep_alive = config.get("keep_alive", True)
+        self.batch_as_digest = config.get("batch_as_digest", True)
+
+        # SMTP会话池：保持登录状态，避免每封邮件都重新握手和登录
+        self._smtp = SMTPSession(
+            self.smtp_host,
+            self.smtp_port,
+            self.smtp_user,
+            self.smtp_password,
+            use_ssl=self.use_ssl,
+            use_tls=self.use_tls,
+            timeout=self.timeout,
+            max_connections=config.get("max_connections", 1),
+            max_idle_time=config.get("max_idle_time", 300.0),
+            smtp_factory=config.get("smtp_factory"),
+        )
 
     def _create_message(self, alert_msg: AlertMessage) -> MIMEMultipart:
         """
@@ -112,38 +254,7 @@ class EmailNotifier(BaseNotifier):
         :param alert_msg: 告警消息对象
         :return: 纯文本内容
         """
-        lines = [
-            f"【{alert_msg.level}级别日志告警】",
-            "",
-            f"时间: {alert_msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')}",
-            f"级别: {alert_msg.level}",
-            f"消息: {alert_msg.message}",
-            "",
-        ]
-
-        if alert_msg.module or alert_msg.function or alert_msg.line:
-            lines.append("位置信息:")
-            if alert_msg.module:
-                lines.append(f"  模块: {alert_msg.module}")
-            if alert_msg.function:
-                lines.append(f"  函数: {alert_msg.function}")
-            if alert_msg.line:
-                lines.append(f"  行号: {alert_msg.line}")
-            lines.append("")
-
-        if alert_msg.extra:
-            lines.append("额外信息:")
-            for key, value in alert_msg.extra.items():
-                # 跳过内部使用的字段（以下划线开头）
-                if key.startswith('_'):
-                    continue
-                lines.append(f"  {key}: {value}")
-            lines.append("")
-
-        lines.append("---")
-        lines.append("此邮件由 XQCLog 日志系统自动发送")
-
-        return "\n".join(lines)
+        return self.text_template.render(alert_msg)
 
     def _format_html_content(self, alert_msg: AlertMessage) -> str:
         """
@@ -152,114 +263,55 @@ class EmailNotifier(BaseNotifier):
         :param alert_msg: 告警消息对象
         :return: HTML内容
         """
-        # 根据级别设置颜色
-        level_colors = {
-            "DEBUG": "#6c757d",
-            "INFO": "#0dcaf0",
-            "SUCCESS": "#198754",
-            "WARNING": "#ffc107",
-            "ERROR": "#dc3545",
-            "CRITICAL": "#8b0000",
-        }
-        color = level_colors.get(alert_msg.level, "#6c757d")
-
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{
-                    font-family: 'Microsoft YaHei', Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 600px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                .header {{
-                    background-color: {color};
-                    color: white;
-                    padding: 20px;
-                    border-radius: 5px 5px 0 0;
-                    text-align: center;
-                }}
-                .content {{
-                    background-color: #f8f9fa;
-                    padding: 20px;
-                    border: 1px solid #dee2e6;
-                    border-top: none;
-                }}
-                .info-item {{
-                    margin-bottom: 10px;
-                    padding: 8px;
-                    background-color: white;
-                    border-left: 3px solid {color};
-                }}
-                .label {{
-                    font-weight: bold;
-                    color: {color};
-                }}
-                .section {{
-                    margin-top: 15px;
-                }}
-                .footer {{
-                    margin-top: 20px;
-                    padding-top: 10px;
-                    border-top: 1px solid #dee2e6;
-                    text-align: center;
-                    color: #6c757d;
-                    font-size: 12px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h2>🚨 {alert_msg.level}级别日志告警</h2>
-            </div>
-            <div class="content">
-                <div class="info-item">
-                    <span class="label">时间:</span> {alert_msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')}
-                </div>
-                <div class="info-item">
-                    <span class="label">级别:</span> {alert_msg.level}
-                </div>
-                <div class="info-item">
-                    <span class="label">消息:</span> {alert_msg.message}
-                </div>
+        return self.template.render(alert_msg)
+
+    def _create_batch_message(self, batch: AlertBatch) -> MIMEMultipart:
+        """
+        创建批量告警摘要邮件
+
+        :param batch: 告警批次
+        :return: 邮件消息对象
+        """
+        message = MIMEMultipart('alternative')
+
+        subject = f"{self.subject_prefix} {batch.level}级别告警汇总（共 {batch.total} 条）"
+        message['Subject'] = Header(subject, 'utf-8')
+
+        if self.from_name:
+            message['From'] = Header(f"{self.from_name} <{self.from_addr}>", 'utf-8')
+        else:
+            message['From'] = self.from_addr
+
+        message['To'] = ", ".join(self.to_addrs)
+        if self.cc_addrs:
+            message['Cc'] = ", ".join(self.cc_addrs)
+
+        message.attach(MIMEText(self.format_batch(batch), 'plain', 'utf-8'))
+        message.attach(MIMEText(self._format_batch_html(batch), 'html', 'utf-8'))
+
+        return message
+
+    def _format_batch_html(self, batch: AlertBatch) -> str:
+        """
+        格式化批量告警摘要的HTML内容（单个表格）
+
+        :param batch: 告警批次
+        :return: HTML内容
         """
+        return self.default_batch_html_template.render(batch, self.config.get("batch_top_n", 5))
 
-        # 位置信息
-        if alert_msg.module or alert_msg.function or alert_msg.line:
-            html += '<div class="section"><strong>位置信息:</strong><br>'
-            if alert_msg.module:
-                html += f'<div class="info-item">模块: {alert_msg.module}</div>'
-            if alert_msg.function:
-                html += f'<div class="info-item">函数: {alert_msg.function}</div>'
-            if alert_msg.line:
-                html += f'<div class="info-item">行号: {alert_msg.line}</div>'
-            html += '</div>'
-
-        # 额外信息
-        if alert_msg.extra:
-            html += '<div class="section"><strong>额外信息:</strong><br>'
-            for key, value in alert_msg.extra.items():
-                # 跳过内部使用的字段
-                if key.startswith('_'):
-                    continue
-                html += f'<div class="info-item">{key}: {value}</div>'
-            html += '</div>'
-
-        html += """
-            </div>
-            <div class="footer">
-                此邮件由 XQCLog 日志系统自动发送，请勿回复
-            </div>
-        </body>
-        </html>
+    def warmup(self, steps: Dict[str, float]) -> None:
         """
+        预热：解析SMTP服务器域名，建立连接并登录（验证账号密码），连接留给第一封邮件复用
 
-        return html
+        :param steps: 各步骤耗时
+        """
+        self._warmup_step(
+            steps,
+            "dns",
+            lambda: socket.getaddrinfo(self.smtp_host, self.smtp_port, proto=socket.IPPROTO_TCP),
+        )
+        self._warmup_step(steps, "smtp_login", self._smtp.warmup)
 
     def send(self, alert_msg: AlertMessage) -> bool:
         """
@@ -269,64 +321,108 @@ class EmailNotifier(BaseNotifier):
         :return: 是否发送成功
         """
         # ✅ 删除 should_send 检查（在 manager 中统一检查）
+        summary = f"{alert_msg.level} - {alert_msg.message[:50]}"
+        try:
+            return self._deliver([self._create_message(alert_msg)], summary)
+        except Exception as e:
+            self._emit("notifier.error", f"❌ 邮件告警发送异常: {e}", level="error", exc_info=True, error=str(e))
+            return False
 
+    def send_batch(self, batch: AlertBatch) -> bool:
+        """
+        发送批量告警（默认合并为一封摘要邮件）
+
+        :param batch: 告警批次
+        :return: 是否发送成功
+        """
         try:
-            print(f"📧 开始发送邮件: {alert_msg.level} - {alert_msg.message[:50]}")
-            print(f"   收件人: {', '.join(self.to_addrs)}")
+            if not self.batch_as_digest and not batch.omitted:
+                # 逐封发送时记录进度：中途失败后重试只发送剩余的邮件，收件人不会收到重复邮件
+                def sent_one() -> None:
+                    batch.delivered += 1
 
-            # 创建邮件消息
-            message = self._create_message(alert_msg)
+                return self.send_messages(batch.alerts[batch.delivered:], on_sent=sent_one)
+            return self._deliver([self._create_batch_message(batch)], f"告警汇总（{batch.total} 条）")
+        except Exception as e:
+            self._emit("notifier.error", f"❌ 邮件告警发送异常: {e}", level="error", exc_info=True, error=str(e))
+            return False
+
+    def send_messages(
+            self,
+            alert_msgs: List[AlertMessage],
+            on_sent: Optional[Callable[[], None]] = None,
+    ) -> bool:
+        """
+        在同一个SMTP连接上逐封发送多条告警
+
+        :param alert_msgs: 告警消息列表
+        :param on_sent: 每送达一封邮件后调用
+        :return: 是否全部发送成功
+        """
+        try:
+            messages = [self._create_message(alert_msg) for alert_msg in alert_msgs]
+            return self._deliver(messages, f"{len(messages)} 封告警邮件", on_sent)
+        except Exception as e:
+            self._emit("notifier.error", f"❌ 邮件告警发送异常: {e}", level="error", exc_info=True, error=str(e))
+            return False
+
+    def _deliver(
+            self,
+            messages: List[MIMEMultipart],
+            summary: str,
+            on_sent: Optional[Callable[[], None]] = None,
+    ) -> bool:
+        """
+        通过SMTP会话发送邮件
+
+        :param messages: 邮件消息列表
+        :param summary: 用于输出日志的简短描述
+        :param on_sent: 每送达一封邮件后调用
+        :return: 是否发送成功
+        """
+        try:
+            self._emit(
+                "email.sending",
+                f"📧 开始发送邮件: {summary}\n   收件人: {', '.join(self.to_addrs)}",
+                summary=summary,
+                recipients=self.to_addrs,
+            )
 
             # 所有收件人（包括抄送）
             all_recipients = self.to_addrs + self.cc_addrs
 
-            # 连接SMTP服务器并发送
-            if self.use_ssl:
-                print(f"   使用SSL连接: {self.smtp_host}:{self.smtp_port}")
-                with smtplib.SMTP_SSL(
-                        self.smtp_host,
-                        self.smtp_port,
-                        timeout=self.timeout
-                ) as smtp:
-                    print(f"   登录用户: {self.smtp_user}")
-                    smtp.login(self.smtp_user, self.smtp_password)
-                    smtp.send_message(message, self.from_addr, all_recipients)
-            else:
-                print(f"   使用普通连接: {self.smtp_host}:{self.smtp_port}")
-                with smtplib.SMTP(
-                        self.smtp_host,
-                        self.smtp_port,
-                        timeout=self.timeout
-                ) as smtp:
-                    if self.use_tls:
-                        print(f"   启动TLS加密")
-                        smtp.starttls()
-                    print(f"   登录用户: {self.smtp_user}")
-                    smtp.login(self.smtp_user, self.smtp_password)
-                    smtp.send_message(message, self.from_addr, all_recipients)
-
-            print(f"✅ 邮件告警发送成功: {alert_msg.level} - {alert_msg.message[:50]}")
+            self._smtp.send_many(messages, self.from_addr, all_recipients, on_sent)
+            if not self.keep_alive:
+                self._smtp.close()
+
+            self._emit("notifier.sent", f"✅ 邮件告警发送成功: {summary}", summary=summary)
             return True
 
         except smtplib.SMTPAuthenticationError as e:
-            print(f"❌ 邮件认证失败: {e}")
-            print(f"   提示: 请检查SMTP用户名和密码是否正确（QQ/163邮箱需要使用授权码）")
-            import traceback
-            traceback.print_exc()
+            self._emit(
+                "notifier.error",
+                f"❌ 邮件认证失败: {e}\n   提示: 请检查SMTP用户名和密码是否正确（QQ/163邮箱需要使用授权码）",
+                level="error",
+                exc_info=True,
+                error=str(e),
+            )
             return False
         except smtplib.SMTPConnectError as e:
-            print(f"❌ 无法连接到SMTP服务器: {e}")
-            print(f"   提示: 请检查smtp_host和smtp_port是否正确")
-            import traceback
-            traceback.print_exc()
+            self._emit(
+                "notifier.error",
+                f"❌ 无法连接到SMTP服务器: {e}\n   提示: 请检查smtp_host和smtp_port是否正确",
+                level="error",
+                exc_info=True,
+                error=str(e),
+            )
             return False
         except smtplib.SMTPException as e:
-            print(f"❌ SMTP错误: {e}")
-            import traceback
-            traceback.print_exc()
+            self._emit("notifier.error", f"❌ SMTP错误: {e}", level="error", exc_info=True, error=str(e))
             return False
         except Exception as e:
-            print(f"❌ 邮件告警发送异常: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
\ No newline at end of file
+            self._emit("notifier.error", f"❌ 邮件告警发送异常: {e}", level="error", exc_info=True, error=str(e))
+            return False
+
+    def close(self) -> None:
+        """关闭保持中的SMTP连接"""
+        self._smtp.close()
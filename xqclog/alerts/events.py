@@ -0,0 +1,112 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-25 15:00:00 UTC
+# 文件描述：告警管道的结构化事件（发送成功/失败、获取token等），默认输出到控制台，可关闭或替换处理函数
+# 文件路径：xqclog/alerts/events.py
+
+from typing import Dict, Any, Callable, Optional
+import sys
+import time
+import traceback
+
+
+class AlertEvent:
+    """告警管道事件"""
+
+    __slots__ = ("name", "level", "message", "fields", "time", "exc_info")
+
+    def __init__(
+            self,
+            name: str,
+            message: str,
+            level: str = "info",
+            fields: Optional[Dict[str, Any]] = None,
+            exc_info: Any = None,
+    ) -> None:
+        """
+        初始化事件
+
+        :param name: 事件名称，如 "notifier.sent"、"notifier.failed"
+        :param message: 可读的事件描述
+        :param level: 事件级别（info/warning/error）
+        :param fields: 结构化字段（notifier、summary、status_code 等）
+        :param exc_info: 异常信息（sys.exc_info() 的结果）
+        """
+        self.name = name
+        self.message = message
+        self.level = level
+        self.fields = fields or {}
+        self.time = time.time()
+        self.exc_info = exc_info
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为字典
+
+        :return: 字典表示
+        """
+        data = {"event": self.name, "level": self.level, "message": self.message, "time": self.time}
+        data.update(self.fields)
+        if self.exc_info:
+            data["exception"] = "".join(traceback.format_exception(*self.exc_info))
+        return data
+
+
+def console_handler(event: AlertEvent) -> None:
+    """
+    默认的事件处理函数：输出到控制台（与之前的 print 输出一致）
+
+    :param event: 事件
+    """
+    print(event.message)
+    if event.exc_info:
+        traceback.print_exception(*event.exc_info)
+
+
+# 当前的事件处理函数，None 表示关闭事件输出
+_handler: Optional[Callable[[AlertEvent], Any]] = console_handler
+
+
+def set_event_handler(handler: Optional[Callable[[AlertEvent], Any]]) -> Optional[Callable[[AlertEvent], Any]]:
+    """
+    设置事件处理函数
+
+    :param handler: 处理函数，接收 AlertEvent；None 表示关闭事件输出
+    :return: 原来的处理函数
+    """
+    global _handler
+    old, _handler = _handler, handler
+    return old
+
+
+def enable_events(enabled: bool = True) -> None:
+    """
+    开启或关闭事件输出（开启时保留已设置的处理函数，没有时使用控制台输出）
+
+    :param enabled: 是否开启
+    """
+    global _handler
+    if not enabled:
+        _handler = None
+    elif _handler is None:
+        _handler = console_handler
+
+
+def emit(name: str, message: str, level: str = "info", exc_info: bool = False, **fields: Any) -> None:
+    """
+    发出一个事件（关闭事件输出时几乎没有开销）
+
+    :param name: 事件名称
+    :param message: 可读的事件描述
+    :param level: 事件级别（info/warning/error）
+    :param exc_info: 是否附带当前正在处理的异常
+    :param fields: 结构化字段
+    """
+    handler = _handler
+    if handler is None:
+        return
+    try:
+        handler(AlertEvent(name, message, level, fields, sys.exc_info() if exc_info else None))
+    except Exception:
+        # 事件处理函数出错不能影响告警发送
+        pass
@@ -4,13 +4,51 @@
 # 文件描述：告警通知管理器，管理多个通知渠道
 # 文件路径：xqclog/alerts/manager.py
 
-from typing import List, Dict, Any, Type, Optional
+from typing import List, Dict, Any, Type, Optional, Sequence, Tuple, Union
+from datetime import datetime
+from pathlib import Path
+import atexit
+import signal
 import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
 
-from .base import BaseNotifier, AlertMessage
+from .base import BaseNotifier, AlertMessage, LEVEL_SEVERITY
 from .registry import NotifierRegistry
+from .dispatcher import AlertDispatcher
+from .dedup import AlertDeduplicator
+from .coordination import SharedAlertTable
+from .storm import StormController
+from .routing import AlertRouter
+from .process_backend import ProcessAlertBackend
+from .batching import AlertBatch, AlertBatcher
+from .transport import configure_transport
+from .scheduler import TimerScheduler, backoff_delay
+from .outbox import AlertOutbox
+from .bulkhead import BulkheadFull
+from .metrics import AlertMetrics
+from .events import emit, enable_events
+
+
+def _register_exit_hook(func) -> None:
+    """
+    注册解释器退出时的回调
+
+    Python 3.9+ 的线程池在 atexit 回调之前就会等待工作线程执行完全部排队任务，
+    这里尽量注册到线程池之前执行（threading._register_atexit），排空期限才能生效。
+
+    :param func: 无参数的回调函数
+    """
+    register = getattr(threading, "_register_atexit", None)
+    if register is None:
+        atexit.register(func)
+    else:
+        register(func)
+
+
+def _exit_on_signal(signum: int, frame: Any) -> None:
+    """SIGTERM 处理函数：转为正常退出（抛出 SystemExit），退出前的排空回调照常执行"""
+    raise SystemExit(128 + signum)
 
 
 class AlertManager:
@@ -34,13 +72,50 @@ class AlertManager:
     def __init__(self) -> None:
         """初始化告警管理器"""
         if not hasattr(self, '_initialized'):
-            self.notifiers: List[BaseNotifier] = []
+            # 通知器快照：不可变元组，增删时整体替换，发送路径读取时不加锁
+            self.notifiers: Tuple[BaseNotifier, ...] = ()
+            self._notifiers_lock = threading.Lock()  # 串行化通知器的增删
             self.registry = NotifierRegistry()
             self.strategy = "parallel"  # 发送策略
             self.retry_count = 3  # 重试次数
-            self.retry_delay = 1.0  # 重试延迟
+            self.retry_delay = 1.0  # 重试退避的基础延迟
+            self.retry_max_delay = 30.0  # 单次重试等待的上限
+            self.alert_deadline = 60.0  # 单条告警（含全部重试）的总期限
             self.timeout = 5.0  # 发送超时
-            self._executor = ThreadPoolExecutor(max_workers=10)
+            self.dispatch_timeout = 10.0  # 单条告警等待发送结果的期限
+            self.hedge_delay = 1.0  # hedged 策略在耗时样本不足时的对冲等待时间
+            self.queue_aging = 5.0  # 排队中的告警每等待多少秒提升一个级别
+            self._scheduler = TimerScheduler()  # 重试退避的定时调度器
+            self._retry_stats = {"retried": 0, "given_up": 0}
+            self._retry_stats_lock = threading.Lock()
+            # 等待超时统计（超时的发送在后台继续，完成后计入 late_*）
+            self._timeout_stats = {"timed_out": 0, "late_success": 0, "late_failed": 0}
+            self._timeout_stats_lock = threading.Lock()
+            self._metrics = AlertMetrics()  # 结果计数和耗时直方图
+            self._metrics_file: Optional[str] = None  # 定期写入的 Prometheus 指标文件
+            self._metrics_interval = 15.0
+            self._metrics_written = 0.0
+            self._warmup_report: Dict[str, Dict[str, Any]] = {}  # 各通知器的预热结果
+            self._warmup_lock = threading.Lock()
+            self._dispatcher: Optional[AlertDispatcher] = None  # 异步派发器（async_dispatch=True 时启用）
+            # 预计算的告警级别并集（供 alert_filter 使用，增删通知器时重算）
+            self._alert_levels: frozenset = frozenset()
+            self._has_enabled_notifier = False
+            self._dedup: Optional[AlertDeduplicator] = None  # 告警去重器（dedup=True 时启用）
+            self._batcher: Optional[AlertBatcher] = None  # 批量合并器（batch_window>0 时启用）
+            self._outbox: Optional[AlertOutbox] = None  # 持久化发件箱（配置 outbox 路径时启用）
+            self._shared: Optional[SharedAlertTable] = None  # 多进程共享表（配置 coordination 路径时启用）
+            self._storm: Optional[StormController] = None  # 告警风暴控制（配置 storm 时启用）
+            self._router: Optional[AlertRouter] = None  # 路由和静默规则（配置 routes/silences 时启用）
+            self._backend: Optional[ProcessAlertBackend] = None  # 子进程后端（alert_backend="process" 时启用）
+            self.drain_timeout = 3.0  # 关闭时排空待发送告警的期限
+            self._drain_deadline: Optional[float] = None  # 正在排空时的截止时间（所有发送和重试都不超过它）
+            self._exit_hook_installed = False
+            self._shut_down = False
+            # 后台维护线程（补发去重汇总等周期任务，按需启动）
+            self._housekeeping_thread: Optional[threading.Thread] = None
+            self._housekeeping_stop = threading.Event()
+            self._housekeeping_interval = 1.0
             self._initialized = True
 
     def configure(
@@ -49,32 +124,294 @@ class AlertManager:
             retry_count: int = 3,
             retry_delay: float = 1.0,
             timeout: float = 5.0,
+            async_dispatch: bool = False,
+            queue_size: int = 1000,
+            overflow: str = "drop_oldest",
+            block_timeout: float = 0.1,
+            dedup: bool = False,
+            dedup_window: float = 300.0,
+            dedup_max_entries: int = 1024,
+            batch_window: float = 0.0,
+            max_batch_size: int = 100,
+            http_options: Optional[Dict[str, Any]] = None,
+            retry_max_delay: float = 30.0,
+            deadline: float = 60.0,
+            outbox: Optional[str] = None,
+            outbox_fsync: str = "interval",
+            dispatch_timeout: Optional[float] = None,
+            hedge_delay: float = 1.0,
+            metrics_file: Optional[str] = None,
+            metrics_interval: float = 15.0,
+            events: bool = True,
+            coordination: Optional[str] = None,
+            storm: Union[bool, Dict[str, Any], None] = None,
+            routes: Optional[List[Dict[str, Any]]] = None,
+            silences: Optional[List[Dict[str, Any]]] = None,
+            drain_timeout: float = 3.0,
+            queue_aging: float = 5.0,
     ) -> None:
         """
         配置告警管理器
 
-        :param strategy: 发送策略（parallel/sequential/failover/priority）
+        :param strategy: 发送策略（parallel/sequential/failover/priority/hedged）
         :param retry_count: 重试次数
-        :param retry_delay: 重试延迟（秒）
+        :param retry_delay: 重试退避的基础延迟（秒），第N次重试最多等待 retry_delay * 2^(N-1)
         :param timeout: 发送超时（秒）
+        :param async_dispatch: 是否启用异步派发（日志线程只入队，由后台线程发送）
+        :param queue_size: 异步派发队列容量
+        :param overflow: 队列满时的策略（drop_oldest/drop_newest/block），只在同级别之间生效，
+                         队列中有更低级别的告警时总是先挤出低级别的
+        :param block_timeout: block 策略下入队的最长等待时间（秒）
+        :param dedup: 是否启用告警去重（同一指纹在抑制窗口内只发送一次）
+        :param dedup_window: 去重抑制窗口（秒），窗口结束后补发重复次数汇总
+        :param dedup_max_entries: 去重指纹表的最大条目数（LRU 淘汰）
+        :param batch_window: 批量合并窗口（秒），窗口内的告警合并为一条摘要发送，0 表示不合并
+        :param max_batch_size: 单个批次的最大告警数，达到后立即发送
+        :param http_options: 共享HTTP连接池配置（pool_connections/pool_maxsize/timeout/keep_alive），
+                             None 表示保持当前传输层
+        :param retry_max_delay: 单次重试等待时间的上限（秒）
+        :param deadline: 单条告警（含全部重试）的总期限（秒），超过后放弃
+        :param outbox: 持久化发件箱文件路径，未送达的告警在重启后由 replay_outbox() 补发，None 表示不启用
+        :param outbox_fsync: 发件箱的 fsync 策略（always/interval/never）
+        :param dispatch_timeout: 单条告警等待发送结果的期限（秒），所有通知器共用，
+                                 超过期限仍未完成的通知器标记为超时；None 表示 timeout * 2
+        :param hedge_delay: hedged 策略中，通知器耗时样本不足时等待多久（秒）再启动下一个渠道
+        :param metrics_file: Prometheus 文本格式指标文件路径（如 node_exporter textfile 目录下的 xqclog.prom），
+                             由后台线程定期写入；None 表示不写文件（仍可通过 get_stats() 获取）
+        :param metrics_interval: 指标文件的写入间隔（秒）
+        :param events: 是否输出告警管道事件（发送成功/失败等，默认输出到控制台）
+        :param coordination: 多进程共享表文件路径（如 "/tmp/xqclog-alerts.shm"），同一台机器上的工作进程
+                             配置为同一路径后共享去重和限流状态：同一指纹在窗口内只由一个进程发送，
+                             同名通知器的限流配额由所有进程共用；None 表示各进程独立
+        :param storm: 告警风暴控制，True 使用默认参数，或 {"threshold": 100, "window": 60, "exit_threshold": 50,
+                      "cool_down": 120, "sample_rate": 0.1, "summary_interval": 60}；告警量超过阈值后 CRITICAL 全部发送、
+                      ERROR 按指纹只发第一条、其他级别按比例采样，并定期向最高优先级的通知器发送抑制汇总
+        :param routes: 路由规则列表，如 [{"levels": ["CRITICAL"], "modules": "app.payment", "extra": {"team": "pay"},
+                       "notifiers": ["pay_dingtalk"], "continue": False}]；告警按顺序匹配，命中后只发送到规则中的通知器，
+                       没有命中任何规则的告警发送到所有通知器
+        :param silences: 静默规则列表，如 [{"start": "23:00", "end": "07:00", "weekdays": [5, 6], "levels": ["WARNING"],
+                         "notifiers": ["email"]}]，时间窗口内命中的告警不发送到规则中的通知器（未配置时为全部），
+                         start/end 也可以是 "2025-12-01 02:00" 这样的一次性维护窗口
+        :param drain_timeout: 关闭（shutdown 或进程退出）时排空待发送告警的期限（秒），期限内按级别从高到低发送，
+                              剩余的留在发件箱中（未启用发件箱时丢弃）
+        :param queue_aging: 派发队列和各通知器线程池中排队的告警按级别优先处理（CRITICAL 越过积压的 WARNING），
+                            每等待 queue_aging 秒提升一个级别（不会超过 CRITICAL），低级别不会一直得不到处理；
+                            0 表示严格按级别
         """
+        # 在当前进程内发送：停止子进程后端（已入队的告警会先交给子进程）
+        self.stop_process_backend()
+        self._shut_down = False
+        self.drain_timeout = drain_timeout
+
         self.strategy = strategy
         self.retry_count = retry_count
         self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self.alert_deadline = deadline
         self.timeout = timeout
+        self.dispatch_timeout = timeout * 2 if dispatch_timeout is None else dispatch_timeout
+        self.hedge_delay = hedge_delay
+        self.queue_aging = queue_aging
 
-    def add_notifier(
+        enable_events(events)
+        self._metrics_file = metrics_file
+        self._metrics_interval = metrics_interval
+
+        if http_options:
+            configure_transport(**http_options)
+
+        # 重新配置时先停掉旧的派发器（剩余告警会被处理完）
+        if self._dispatcher is not None:
+            self._dispatcher.stop(timeout=self.timeout)
+            self._dispatcher = None
+
+        if async_dispatch:
+            self._dispatcher = AlertDispatcher(
+                handler=self._dispatch_record,
+                queue_size=queue_size,
+                overflow=overflow,
+                block_timeout=block_timeout,
+                aging=queue_aging,
+                # 被溢出策略丢弃的告警不需要在重启后补发
+                on_drop=lambda record: self._ack_outbox(record["alert_msg"]),
+            )
+            self._dispatcher.start()
+
+        if self._outbox is not None:
+            self._outbox.close()
+            self._outbox = None
+        if outbox:
+            self._outbox = AlertOutbox(outbox, fsync=outbox_fsync)
+            self._outbox.start()
+
+        if self._shared is not None and (coordination is None or self._shared.path != Path(coordination)):
+            self._shared.close()
+            self._shared = None
+        if coordination and self._shared is None:
+            self._shared = SharedAlertTable(coordination)
+        for notifier in self.notifiers:
+            self._apply_coordination(notifier)
+            notifier.bulkhead.aging = queue_aging
+
+        self._dedup = AlertDeduplicator(dedup_window, dedup_max_entries, shared=self._shared) if dedup else None
+        self._storm = StormController.from_config(storm)
+        self._router = AlertRouter.from_config(routes, silences)
+        self._refresh_alert_filter()
+
+        # 重新配置前，先把旧批次中的告警发出去
+        if self._batcher is not None:
+            pending = self._batcher.flush()
+            if pending is not None:
+                self._send_message(pending)
+        self._batcher = AlertBatcher(batch_window, max_batch_size) if batch_window > 0 else None
+        # 维护线程的检查间隔不能比合并窗口粗太多
+        self._housekeeping_interval = min(1.0, max(batch_window / 4, 0.05)) if batch_window > 0 else 1.0
+
+        if self._dedup is not None or self._batcher is not None or self._storm is not None or self._metrics_file:
+            self._ensure_housekeeping()
+
+    def start_process_backend(
+            self,
+            config: Dict[str, Any],
+            queue_size: int = 1000,
+            overflow: str = "drop_oldest",
+            block_timeout: float = 0.1,
+            events: bool = True,
+    ) -> None:
+        """
+        启用子进程后端：告警交给受监督的子进程发送，当前进程只负责把告警记录写入管道
+
+        子进程按 config 创建通知器并持有连接池、重试、去重、发件箱等全部状态，
+        异常退出后由后台维护线程按指数退避重启。当前进程中的通知器会被清空。
+
+        :param config: 日志配置字典（LogConfig.to_dict()），必须可以序列化为 JSON
+        :param queue_size: 等待写入子进程的告警队列容量
+        :param overflow: 队列满时的策略（drop_oldest/drop_newest/block）
+        :param block_timeout: block 策略下日志调用的最长等待（秒）
+        :param events: 是否输出告警管道事件
+        :raises ValueError: 配置无法序列化
+        """
+        enable_events(events)
+        self._shut_down = False
+        self.drain_timeout = config.get("alert_drain_timeout", self.drain_timeout)
+        custom_notifiers = self.registry.custom_references()
+        for name, reference in custom_notifiers.items():
+            if reference.startswith("__main__:"):
+                emit(
+                    "backend.warning",
+                    f"⚠️ 自定义通知器 {name} 定义在主脚本中，子进程无法导入，请移到可导入的模块中",
+                    level="warning",
+                    notifier=name,
+                )
+
+        backend = ProcessAlertBackend(
+            config,
+            custom_notifiers=custom_notifiers,
+            queue_size=queue_size,
+            overflow=overflow,
+            block_timeout=block_timeout,
+            aging=config.get("alert_queue_aging", self.queue_aging),
+        )
+        self.stop_process_backend()
+        self._stop_thread_backend()
+        self.replace_notifiers(())
+
+        # 预过滤条件按通知器配置计算（当前进程中没有通知器实例）
+        levels = set()
+        has_enabled = False
+        for notifier_config in config.get("notifiers") or ():
+            if not notifier_config.get("enabled", True):
+                continue
+            has_enabled = True
+            levels.update(notifier_config.get("alert_levels") or ())
+        self._alert_levels = frozenset(levels)
+        self._has_enabled_notifier = has_enabled
+
+        backend.start()
+        self._backend = backend
+        self._ensure_housekeeping()
+
+    def _stop_thread_backend(self) -> None:
+        """
+        停止在当前进程内发送用到的组件（切换到子进程后端时调用）
+
+        派发队列和批次中的告警先用当前的通知器发送完，再关闭发件箱；去重、风暴和路由状态由子进程重新建立。
+        """
+        if self._dispatcher is not None:
+            self._dispatcher.stop(timeout=self.timeout)
+            self._dispatcher = None
+
+        batcher, self._batcher = self._batcher, None
+        if batcher is not None:
+            pending = batcher.flush()
+            if pending is not None:
+                self._send_message(pending)
+
+        if self._outbox is not None:
+            self._outbox.close()
+            self._outbox = None
+
+        self._dedup = None
+        self._storm = None
+        self._router = None
+
+    def stop_process_backend(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        停止子进程后端（先把队列中的告警写入子进程，子进程发送完后退出）
+
+        :param timeout: 等待的最长时间（秒），默认 dispatch_timeout
+        :return: 停止后的后端统计（含子进程退出码 returncode），未启用时返回None
+        """
+        backend, self._backend = self._backend, None
+        if backend is None:
+            return None
+        returncode = backend.stop(self.dispatch_timeout if timeout is None else timeout)
+        self._alert_levels = frozenset()
+        self._has_enabled_notifier = False
+        stats = backend.get_stats()
+        stats["returncode"] = returncode
+        return stats
+
+    def install_exit_hooks(self, signals: bool = True) -> None:
+        """
+        注册退出时的排空：解释器退出时调用 shutdown()（已手动调用过时跳过），可重复调用
+
+        :param signals: 是否把 SIGTERM 转为正常退出，使 kill、docker stop 等终止进程时也会排空；
+                        只在主线程中、且 SIGTERM 仍为默认处理方式时生效，不覆盖应用自己的信号处理
+        """
+        with self._lock:
+            if not self._exit_hook_installed:
+                _register_exit_hook(self._shutdown_at_exit)
+                self._exit_hook_installed = True
+
+        if not signals or threading.current_thread() is not threading.main_thread():
+            return
+        sigterm = getattr(signal, "SIGTERM", None)
+        if sigterm is not None and signal.getsignal(sigterm) is signal.SIG_DFL:
+            signal.signal(sigterm, _exit_on_signal)
+
+    def _shutdown_at_exit(self) -> None:
+        """退出回调：还没有关闭时排空待发送的告警"""
+        if self._shut_down:
+            return
+        try:
+            self.shutdown()
+        except Exception as e:
+            emit("shutdown.error", f"❌ 退出时排空告警失败: {e}", level="error", error=str(e))
+
+    def create_notifier(
             self,
             notifier_type: str,
             priority: int = 0,
             **config: Any
-    ) -> None:
+    ) -> BaseNotifier:
         """
-        添加通知器
+        创建通知器（不添加到管理器，配合 replace_notifiers 使用）
 
-        :param notifier_type: 通知器类型（dingtalk/weixin_webhook/weixin_app/email/custom）
+        :param notifier_type: 通知器类型（dingtalk/weixin_webhook/weixin_app/email/插件/custom）
         :param priority: 优先级（用于priority策略）
         :param config: 通知器配置
+        :return: 通知器实例
         """
         notifier_class = self.registry.get(notifier_type)
         if notifier_class is None:
@@ -86,212 +423,609 @@ class AlertManager:
         notifier = notifier_class(**config)
         # 将优先级作为属性添加到通知器
         notifier._priority = priority
-        self.notifiers.append(notifier)
+        self._apply_coordination(notifier)
+        notifier.bulkhead.aging = self.queue_aging
+        return notifier
+
+    def add_notifier(
+            self,
+            notifier_type: str,
+            priority: int = 0,
+            **config: Any
+    ) -> None:
+        """
+        添加通知器
+
+        :param notifier_type: 通知器类型（dingtalk/weixin_webhook/weixin_app/email/插件/custom）
+        :param priority: 优先级（用于priority策略）
+        :param config: 通知器配置
+        """
+        notifier = self.create_notifier(notifier_type, priority, **config)
+        with self._notifiers_lock:
+            self._publish_notifiers(self.notifiers + (notifier,))
+
+    def replace_notifiers(self, notifiers: Sequence[BaseNotifier]) -> None:
+        """
+        整体替换通知器（一次原子切换，重新初始化时使用）
+
+        已经开始发送的告警继续使用旧的通知器完成（包括重试），之后的告警只使用新的通知器，
+        切换过程中不会有告警看到空的或只添加了一部分的通知器列表。被移除的通知器在发送任务全部结束后释放线程。
+
+        :param notifiers: 新的通知器列表（通常由 create_notifier 创建）
+        """
+        with self._notifiers_lock:
+            old = self.notifiers
+            self._publish_notifiers(tuple(notifiers))
+        for notifier in old:
+            if notifier not in notifiers:
+                notifier.bulkhead.retire()
+
+    def _publish_notifiers(self, notifiers: Tuple[BaseNotifier, ...]) -> None:
+        """
+        按优先级排序并发布新的通知器快照（需持有 _notifiers_lock）
+
+        :param notifiers: 新的通知器元组
+        """
+        # 按优先级排序（从高到低，同优先级保持添加顺序）
+        notifiers = tuple(sorted(notifiers, key=lambda n: getattr(n, '_priority', 0), reverse=True))
+
+        # 限流通知器需要后台线程定期补发被合并的告警
+        if any(notifier.rate_limiter is not None for notifier in notifiers):
+            self._ensure_housekeeping()
+
+        # 先更新过滤条件和路由，再发布快照
+        self._refresh_alert_filter(notifiers)
+        self.notifiers = notifiers
+
+    def _refresh_alert_filter(self, notifiers: Optional[Sequence[BaseNotifier]] = None) -> None:
+        """
+        重新计算所有启用通知器的告警级别并集，并把路由规则绑定到当前的通知器
+
+        :param notifiers: 通知器列表，默认为当前的通知器快照
+        """
+        if notifiers is None:
+            notifiers = self.notifiers
+        levels = set()
+        has_enabled = False
+        for notifier in notifiers:
+            if not notifier.enabled:
+                continue
+            has_enabled = True
+            levels.update(notifier.alert_levels or ())
 
-        # 按优先级排序（从高到低）
-        self.notifiers.sort(key=lambda n: getattr(n, '_priority', 0), reverse=True)
+        self._alert_levels = frozenset(levels)
+        self._has_enabled_notifier = has_enabled
+        if self._router is not None:
+            self._router.bind(notifiers)
+
+    def alert_filter(self, record: Dict[str, Any]) -> bool:
+        """
+        loguru 过滤器：只放行可能触发告警的日志记录
+
+        与 BaseNotifier.should_send 的判断顺序一致：先看 _alert 强制标志，
+        再看级别是否在任一启用通知器的 alert_levels 中。
+        不会触发告警的记录在这里就被丢弃，不会构造 AlertMessage。
+
+        :param record: loguru 日志记录
+        :return: 是否交给告警sink处理
+        """
+        force_send = record["extra"].get("_alert")
+        if force_send is not None:
+            return bool(force_send) and self._has_enabled_notifier
+        return record["level"].name in self._alert_levels
 
     def register_custom_notifier(
             self,
             name: str,
-            notifier_class: Type[BaseNotifier]
+            notifier_class: Union[Type[BaseNotifier], str]
     ) -> None:
         """
         注册自定义通知器
 
         :param name: 通知器名称
-        :param notifier_class: 通知器类
+        :param notifier_class: 通知器类，或 "模块:类名" 字符串（第一次添加该类型的通知器时才导入）
         """
         self.registry.register(name, notifier_class)
 
     def _send_with_retry(
             self,
             notifier: BaseNotifier,
-            alert_msg: AlertMessage
+            alert_msg: Union[AlertMessage, AlertBatch],
+            deadline: float,
+            acquired: bool = False
     ) -> Dict[str, Any]:
         """
-        带重试的发送
+        带重试的发送（最多等待到期限，超时后发送在后台继续，结果标记为超时）
 
         :param notifier: 通知器实例
-        :param alert_msg: 告警消息
+        :param alert_msg: 告警消息或告警批次
+        :param deadline: 等待结果的期限（time.monotonic()）
+        :param acquired: 是否已获取过限流配额（补发限流暂存的告警时为True）
+        :return: 发送结果
+        """
+        return self._wait_result(notifier, alert_msg, self._deliver(notifier, alert_msg, acquired), deadline)
+
+    def _wait_result(
+            self,
+            notifier: BaseNotifier,
+            alert_msg: Union[AlertMessage, AlertBatch],
+            future: Future,
+            deadline: float
+    ) -> Dict[str, Any]:
+        """
+        等待单个通知器的发送结果，超过期限时返回超时结果并登记迟到的完成
+
+        :param notifier: 通知器实例
+        :param alert_msg: 告警消息或告警批次
+        :param future: _deliver 返回的Future
+        :param deadline: 等待结果的期限（time.monotonic()）
         :return: 发送结果
         """
+        try:
+            return future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            return self._timed_out(notifier, alert_msg, future)
+
+    def _timed_out(
+            self,
+            notifier: BaseNotifier,
+            alert_msg: Union[AlertMessage, AlertBatch],
+            future: Future
+    ) -> Dict[str, Any]:
+        """
+        生成超时结果，并在发送最终完成时记录迟到的结果
+
+        :param notifier: 通知器实例
+        :param alert_msg: 告警消息或告警批次
+        :param future: 仍未完成的Future
+        :return: 超时结果
+        """
+        with self._timeout_stats_lock:
+            self._timeout_stats["timed_out"] += 1
+        self._metrics.inc(notifier.name, "timed_out")
+
+        def on_done(done: Future) -> None:
+            result = done.result()
+            success = result["success"] and not result.get("skipped")
+            with self._timeout_stats_lock:
+                self._timeout_stats["late_success" if success else "late_failed"] += 1
+            if success:
+                # 迟到的成功同样算送达，不需要在重启后补发
+                self._ack_outbox(alert_msg)
+
+        future.add_done_callback(on_done)
+        return {
+            "notifier": notifier.name,
+            "success": False,
+            "attempts": None,
+            "error": "等待发送结果超时，发送仍在后台进行",
+            "skipped": False,
+            "rate_limited": False,
+            "circuit_open": False,
+            "timed_out": True,
+        }
+
+    def _deliver(
+            self,
+            notifier: BaseNotifier,
+            alert_msg: Union[AlertMessage, AlertBatch],
+            acquired: bool = False,
+            cancel: Optional[threading.Event] = None
+    ) -> Future:
+        """
+        带重试的发送（立即返回Future）
+
+        每次尝试都作为独立任务提交到该通知器的隔离舱线程池；失败后由定时调度器按指数退避 + 全抖动
+        重新提交，等待期间不占用任何工作线程。超过单条告警的总期限后放弃。
+
+        :param notifier: 通知器实例
+        :param alert_msg: 告警消息或告警批次
+        :param acquired: 是否已获取过限流配额（补发限流暂存的告警时为True）
+        :param cancel: 取消标志（hedged 策略中其他渠道已送达时设置），设置后不再开始新的尝试
+        :return: 完成时结果为发送结果字典的Future
+        """
+        future: Future = Future()
+        start = time.monotonic()
+        # 最终结果（包括超时后迟到的结果）都计入指标
+        future.add_done_callback(lambda done: self._record_delivery(notifier, alert_msg, done.result(), start))
         result = {
             "notifier": notifier.name,
             "success": False,
             "attempts": 0,
             "error": None,
             "skipped": False,  # 新增：是否跳过发送
+            "rate_limited": False,  # 是否因限流被暂存
+            "circuit_open": False,  # 是否因熔断被跳过
         }
+        breaker = notifier.circuit_breaker
+
+        def reject() -> Future:
+            result["circuit_open"] = True
+            result["error"] = "通知器已熔断，跳过发送"
+            if not future.done():
+                future.set_result(result)
+            return future
+
+        # 批次：只保留该通知器需要发送的告警，只剩一条时按普通告警发送
+        if isinstance(alert_msg, AlertBatch):
+            batch = alert_msg.filter(
+                lambda msg: (msg.targets is None or notifier in msg.targets) and notifier.should_send(msg)
+            )
+            if not batch:
+                result["skipped"] = True
+                result["success"] = True
+                future.set_result(result)
+                return future
+            alert_msg = batch.alerts[0] if batch.total == 1 else batch
+            result["batch_size"] = batch.total
 
         # 检查是否应该发送（移到这里，统一处理）
-        if not notifier.should_send(alert_msg):
+        elif not notifier.should_send(alert_msg):
             result["skipped"] = True
             result["success"] = True  # 跳过也算"成功"（没有错误）
-            return result
+            future.set_result(result)
+            return future
+
+        # 熔断：渠道已判定不可用时直接跳过，不占用限流配额
+        if breaker is not None and not breaker.is_available():
+            return reject()
 
-        for attempt in range(1, self.retry_count + 1):
-            result["attempts"] = attempt
+        # 限流：超限的告警暂存起来，稍后合并为一条摘要发送，避免白白消耗重试
+        if not acquired and not notifier.acquire_send_slot():
+            for deferred in (alert_msg.alerts if isinstance(alert_msg, AlertBatch) else (alert_msg,)):
+                displaced = notifier.defer(deferred)
+                if displaced is not None:
+                    # 暂存区已满被挤掉的告警只计入汇总总数，不再补发
+                    self._ack_outbox(displaced)
+            result["rate_limited"] = True
+            result["error"] = "超出发送频率限制，已暂存待合并发送"
+            future.set_result(result)
+            return future
+
+        deadline = time.monotonic() + self.alert_deadline
+
+        def cancelled() -> bool:
+            if cancel is None or not cancel.is_set():
+                return False
+            result["cancelled"] = True
+            result["error"] = "其他渠道已送达，取消发送"
+            future.set_result(result)
+            return True
+
+        def attempt() -> None:
+            if cancelled():
+                return
+            # 每次尝试都要经过熔断器（重试期间可能已经熔断，半开状态只放行试探请求）
+            if breaker is not None and not breaker.allow_request():
+                reject()
+                return
+
+            result["attempts"] += 1
+            sent_at = time.monotonic()
             try:
-                success = notifier.send(alert_msg)
+                if isinstance(alert_msg, AlertBatch):
+                    success = notifier.send_batch(alert_msg)
+                else:
+                    success = notifier.send(alert_msg)
                 if success:
+                    notifier.latency.observe(time.monotonic() - sent_at)
+                    if breaker is not None:
+                        breaker.record_success()
                     result["success"] = True
-                    return result
-                else:
-                    result["error"] = "发送失败"
+                    future.set_result(result)
+                    return
+                result["error"] = "发送失败"
             except Exception as e:
                 result["error"] = str(e)
 
-            # 如果不是最后一次尝试，等待后重试
-            if attempt < self.retry_count:
-                time.sleep(self.retry_delay)
+            if breaker is not None:
+                breaker.record_failure()
+
+            if result["attempts"] >= self.retry_count:
+                future.set_result(result)
+                return
+            if cancelled():
+                return
+
+            delay = backoff_delay(result["attempts"], self.retry_delay, self.retry_max_delay)
+            drain_deadline = self._drain_deadline
+            if time.monotonic() + delay > (deadline if drain_deadline is None else min(deadline, drain_deadline)):
+                # 超过总期限（或关闭时的排空期限）：放弃并计数
+                result["deadline_exceeded"] = True
+                with self._retry_stats_lock:
+                    self._retry_stats["given_up"] += 1
+                future.set_result(result)
+                return
+
+            with self._retry_stats_lock:
+                self._retry_stats["retried"] += 1
+            self._metrics.inc(notifier.name, "retried")
+            self._scheduler.call_later(delay, submit)
+
+        severity = LEVEL_SEVERITY.get(alert_msg.level, 0)
+
+        def evicted() -> None:
+            # 线程池积压时被更高级别的告警挤出（或关闭时被丢弃），不再发送
+            result["bulkhead_full"] = True
+            result["error"] = f"通知器 {notifier.name} 的待发送任务已满，已让位于更高级别的告警"
+            if not future.done():
+                future.set_result(result)
+
+        def submit() -> None:
+            try:
+                notifier.bulkhead.submit(attempt, severity, evicted)
+            except BulkheadFull as e:
+                # 该通知器积压过多：直接判定失败，不影响其他通知器
+                result["bulkhead_full"] = True
+                result["error"] = str(e)
+                future.set_result(result)
+            except RuntimeError as e:
+                # 线程池已关闭
+                result["error"] = str(e)
+                future.set_result(result)
+
+        submit()
+        return future
 
-        return result
+    def _record_delivery(
+            self,
+            notifier: BaseNotifier,
+            alert_msg: Union[AlertMessage, AlertBatch],
+            result: Dict[str, Any],
+            start: float
+    ) -> None:
+        """
+        把单个通知器的最终结果计入指标
 
-    def _send_parallel(self, alert_msg: AlertMessage) -> Dict[str, Any]:
+        :param notifier: 通知器实例
+        :param alert_msg: 告警消息或告警批次
+        :param result: 发送结果
+        :param start: 开始发送的时间（time.monotonic()）
         """
-        并行发送策略：同时发送到所有通知器
+        if result.get("skipped"):
+            self._metrics.record_delivery(notifier.name, "skipped")
+        elif result.get("rate_limited"):
+            self._metrics.record_delivery(notifier.name, "rate_limited")
+        elif result.get("circuit_open"):
+            self._metrics.record_delivery(notifier.name, "circuit_open")
+        elif result.get("cancelled"):
+            self._metrics.record_delivery(notifier.name, "cancelled")
+        elif result["success"]:
+            # 端到端耗时：从日志记录时间（批次取最早一条）到送达
+            recorded = alert_msg.first_time if isinstance(alert_msg, AlertBatch) else alert_msg.timestamp
+            end_to_end = None
+            if recorded is not None:
+                end_to_end = (datetime.now(recorded.tzinfo) - recorded).total_seconds()
+            self._metrics.record_delivery(notifier.name, "success", time.monotonic() - start, end_to_end)
+        else:
+            self._metrics.record_delivery(notifier.name, "failed", time.monotonic() - start)
 
-        :param alert_msg: 告警消息
-        :return: 发送结果
+    def _new_results(self, strategy: str, total: Optional[int] = None) -> Dict[str, Any]:
+        """
+        创建空的发送结果
+
+        :param strategy: 策略名称
+        :param total: 参与发送的通知器数量，默认为全部通知器
+        :return: 发送结果字典
         """
-        results = {
-            "strategy": "parallel",
-            "total": len(self.notifiers),
+        return {
+            "strategy": strategy,
+            "total": len(self.notifiers) if total is None else total,
             "success": 0,
             "failed": 0,
-            "skipped": 0,  # 新增：跳过的数量
+            "skipped": 0,
+            "rate_limited": 0,
+            "circuit_open": 0,
+            "timed_out": 0,
+            "cancelled": 0,
             "details": []
         }
 
-        # 使用线程池并行发送
+    def _targets(self, alert_msg: Union[AlertMessage, AlertBatch]) -> Sequence[BaseNotifier]:
+        """
+        告警要发送到的通知器（按优先级排序）
+
+        批次中各条告警的路由可能不同，批次发送到所有通知器，由 _deliver 按路由过滤批次中的告警。
+
+        :param alert_msg: 告警消息或告警批次
+        :return: 通知器快照（发送期间即使重新配置也不会改变）
+        """
+        targets = getattr(alert_msg, "targets", None)
+        return self.notifiers if targets is None else targets
+
+    @staticmethod
+    def _count_result(results: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """
+        将单个通知器的发送结果计入汇总
+
+        :param results: 汇总结果
+        :param result: 单个通知器的发送结果
+        """
+        results["details"].append(result)
+        if result.get("skipped"):
+            results["skipped"] += 1
+        elif result.get("rate_limited"):
+            results["rate_limited"] += 1
+        elif result.get("circuit_open"):
+            results["circuit_open"] += 1
+        elif result.get("timed_out"):
+            results["timed_out"] += 1
+        elif result.get("cancelled"):
+            results["cancelled"] += 1
+        elif result["success"]:
+            results["success"] += 1
+        else:
+            results["failed"] += 1
+
+    def _send_parallel(self, alert_msg: AlertMessage, deadline: float) -> Dict[str, Any]:
+        """
+        并行发送策略：同时发送到所有通知器
+
+        :param alert_msg: 告警消息
+        :param deadline: 等待结果的期限（time.monotonic()）
+        :return: 发送结果
+        """
+        targets = self._targets(alert_msg)
+        results = self._new_results("parallel", len(targets))
+
+        # 每个通知器在各自的线程池中发送
         futures = {
-            self._executor.submit(self._send_with_retry, notifier, alert_msg): notifier
-            for notifier in self.notifiers
+            self._deliver(notifier, alert_msg): notifier
+            for notifier in targets
         }
 
-        for future in as_completed(futures, timeout=self.timeout * 2):
-            try:
-                result = future.result()
-                results["details"].append(result)
-                if result.get("skipped"):
-                    results["skipped"] += 1
-                elif result["success"]:
-                    results["success"] += 1
-                else:
-                    results["failed"] += 1
-            except Exception as e:
-                notifier = futures[future]
-                results["details"].append({
-                    "notifier": notifier.name,
-                    "success": False,
-                    "error": str(e)
-                })
-                results["failed"] += 1
+        # 期限内完成的计入结果，其余标记为超时（发送在后台继续）
+        done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+        for future, notifier in futures.items():
+            if future in done:
+                self._count_result(results, future.result())
+            else:
+                self._count_result(results, self._timed_out(notifier, alert_msg, future))
 
         return results
 
-    def _send_sequential(self, alert_msg: AlertMessage) -> Dict[str, Any]:
+    def _send_sequential(self, alert_msg: AlertMessage, deadline: float) -> Dict[str, Any]:
         """
         顺序发送策略：按顺序发送到所有通知器
 
         :param alert_msg: 告警消息
+        :param deadline: 等待结果的期限（time.monotonic()）
         :return: 发送结果
         """
-        results = {
-            "strategy": "sequential",
-            "total": len(self.notifiers),
-            "success": 0,
-            "failed": 0,
-            "skipped": 0,
-            "details": []
-        }
+        targets = self._targets(alert_msg)
+        results = self._new_results("sequential", len(targets))
 
-        for notifier in self.notifiers:
-            result = self._send_with_retry(notifier, alert_msg)
-            results["details"].append(result)
-            if result.get("skipped"):
-                results["skipped"] += 1
-            elif result["success"]:
-                results["success"] += 1
-            else:
-                results["failed"] += 1
+        for notifier in targets:
+            self._count_result(results, self._send_with_retry(notifier, alert_msg, deadline))
 
         return results
 
-    def _send_failover(self, alert_msg: AlertMessage) -> Dict[str, Any]:
+    def _send_failover(self, alert_msg: AlertMessage, deadline: float) -> Dict[str, Any]:
         """
         故障转移策略：轮询发送直到成功
 
         :param alert_msg: 告警消息
+        :param deadline: 等待结果的期限（time.monotonic()）
         :return: 发送结果
         """
-        results = {
-            "strategy": "failover",
-            "total": len(self.notifiers),
-            "success": 0,
-            "failed": 0,
-            "skipped": 0,
-            "details": []
-        }
+        targets = self._targets(alert_msg)
+        results = self._new_results("failover", len(targets))
 
-        for notifier in self.notifiers:
-            result = self._send_with_retry(notifier, alert_msg)
-            results["details"].append(result)
-
-            if result.get("skipped"):
-                results["skipped"] += 1
-                continue  # 跳过的不算成功，继续尝试下一个
-            elif result["success"]:
-                results["success"] = 1
+        for notifier in targets:
+            result = self._send_with_retry(notifier, alert_msg, deadline)
+            self._count_result(results, result)
+
+            # 跳过、被限流、已熔断或超时的不算成功，继续尝试下一个
+            if result["success"] and not result.get("skipped"):
                 # 成功后立即返回，不再尝试其他通知器
                 return results
-            else:
-                results["failed"] += 1
 
         return results
 
-    def _send_priority(self, alert_msg: AlertMessage) -> Dict[str, Any]:
+    def _hedge_delay(self, notifier: BaseNotifier) -> float:
         """
-        优先级策略：按优先级发送，高优先级成功后继续发送同优先级
+        对冲等待时间：通知器超过该时间仍未响应时启动下一个渠道
+
+        :param notifier: 通知器实例
+        :return: 等待时间（秒），样本不足时使用配置的 hedge_delay，最长不超过单次发送超时
+        """
+        estimate = notifier.latency.p95()
+        if estimate is None:
+            return self.hedge_delay
+        return min(max(estimate, 0.01), self.timeout)
+
+    def _send_hedged(self, alert_msg: AlertMessage, deadline: float) -> Dict[str, Any]:
+        """
+        对冲策略：按优先级依次发送，当前渠道超过其 p95 耗时仍未响应（或已失败）时启动下一个渠道，
+        任一渠道送达即结束，取消尚未开始的发送
 
         :param alert_msg: 告警消息
+        :param deadline: 等待结果的期限（time.monotonic()）
         :return: 发送结果
         """
-        results = {
-            "strategy": "priority",
-            "total": len(self.notifiers),
-            "success": 0,
-            "failed": 0,
-            "skipped": 0,
-            "details": []
+        targets = self._targets(alert_msg)
+        results = self._new_results("hedged", len(targets))
+        cancel = threading.Event()
+        remaining = list(targets)
+        pending: Dict[Future, BaseNotifier] = {}
+        hedge_at = 0.0  # 启动下一个渠道的时间点
+
+        while True:
+            now = time.monotonic()
+            if remaining and (not pending or now >= hedge_at):
+                notifier = remaining.pop(0)
+                future = self._deliver(notifier, alert_msg, cancel=cancel)
+                pending[future] = notifier
+                hedge_at = now + self._hedge_delay(notifier)
+                continue
+            if not pending or now >= deadline:
+                break
+
+            wait_until = min(hedge_at, deadline) if remaining else deadline
+            done, _ = wait(pending, timeout=max(wait_until - now, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                notifier = pending.pop(future)
+                result = future.result()
+                self._count_result(results, result)
+                if result["success"] and not result.get("skipped"):
+                    # 已送达：取消其他渠道尚未开始的尝试，正在进行的发送结果不再等待
+                    cancel.set()
+                    for other, other_notifier in pending.items():
+                        self._count_result(results, self._hedge_abandoned(other_notifier, other))
+                    return results
+            if done:
+                # 有渠道结束但未送达（失败、跳过、被限流或熔断），立即启动下一个
+                hedge_at = time.monotonic()
+
+        for future, notifier in pending.items():
+            self._count_result(results, self._timed_out(notifier, alert_msg, future))
+        return results
+
+    @staticmethod
+    def _hedge_abandoned(notifier: BaseNotifier, future: Future) -> Dict[str, Any]:
+        """
+        其他渠道已送达时，仍在进行中的对冲发送的结果
+
+        :param notifier: 通知器实例
+        :param future: 发送任务
+        :return: 已完成时为实际结果，否则为取消结果（发送可能仍在后台完成）
+        """
+        if future.done():
+            return future.result()
+        return {
+            "notifier": notifier.name,
+            "success": False,
+            "attempts": None,
+            "error": "其他渠道已送达，不再等待",
+            "skipped": False,
+            "rate_limited": False,
+            "circuit_open": False,
+            "cancelled": True,
         }
 
+    def _send_priority(self, alert_msg: AlertMessage, deadline: float) -> Dict[str, Any]:
+        """
+        优先级策略：按优先级发送，高优先级成功后继续发送同优先级
+
+        :param alert_msg: 告警消息
+        :param deadline: 等待结果的期限（time.monotonic()）
+        :return: 发送结果
+        """
+        targets = self._targets(alert_msg)
+        results = self._new_results("priority", len(targets))
+
         # 按优先级分组（已经排序过）
         current_priority = None
-        continue_sending = True
-
-        for notifier in self.notifiers:
-            if not continue_sending:
-                break
 
+        for notifier in targets:
             priority = getattr(notifier, '_priority', 0)
 
-            # 如果优先级降低且已有成功发送，停止发送
+            # 如果优先级降低且已有成功发送，停止发送（已熔断的通知器不算成功，会继续降级到下一优先级）
             if current_priority is not None and priority < current_priority and results["success"] > 0:
                 break
 
             current_priority = priority
-
-            result = self._send_with_retry(notifier, alert_msg)
-            results["details"].append(result)
-
-            if result.get("skipped"):
-                results["skipped"] += 1
-            elif result["success"]:
-                results["success"] += 1
-            else:
-                results["failed"] += 1
+            self._count_result(results, self._send_with_retry(notifier, alert_msg, deadline))
 
         return results
 
@@ -309,8 +1043,13 @@ class AlertManager:
         :param message: 消息内容
         :param force_send: 强制发送标志（True=强制发送, False=强制不发送, None=根据配置判断）
         :param extra: 额外信息
-        :return: 发送结果
+        :return: 发送结果（启用子进程后端时只返回是否已交给子进程）
         """
+        backend = self._backend
+        if backend is not None:
+            accepted = backend.submit(level=level, message=message, force_send=force_send, **extra)
+            return {"strategy": self.strategy, "backend": "process", "accepted": accepted}
+
         if not self.notifiers:
             return {
                 "strategy": self.strategy,
@@ -322,7 +1061,25 @@ class AlertManager:
                 "message": "没有配置通知器"
             }
 
-        alert_msg = AlertMessage(
+        return self._process_alert(self._build_alert(level, message, force_send, extra))
+
+    @staticmethod
+    def _build_alert(
+            level: str,
+            message: str,
+            force_send: Optional[bool],
+            extra: Dict[str, Any]
+    ) -> AlertMessage:
+        """
+        构造告警消息
+
+        :param level: 日志级别
+        :param message: 消息内容
+        :param force_send: 强制发送标志
+        :param extra: 额外信息（module/function/line/extra/timestamp）
+        :return: 告警消息对象
+        """
+        return AlertMessage(
             level=level,
             message=message,
             extra=extra.get("extra", {}),
@@ -330,23 +1087,564 @@ class AlertManager:
             function=extra.get("function"),
             line=extra.get("line"),
             force_send=force_send,  # 传递强制发送标志
+            timestamp=extra.get("timestamp"),
         )
 
-        # 根据策略选择发送方式
-        if self.strategy == "parallel":
-            return self._send_parallel(alert_msg)
-        elif self.strategy == "sequential":
-            return self._send_sequential(alert_msg)
-        elif self.strategy == "failover":
-            return self._send_failover(alert_msg)
-        elif self.strategy == "priority":
-            return self._send_priority(alert_msg)
+    def _process_alert(self, alert_msg: AlertMessage) -> Dict[str, Any]:
+        """
+        处理一条告警：路由和静默、记入发件箱、风暴采样、去重、批量合并，然后按策略发送
+
+        :param alert_msg: 告警消息对象
+        :return: 发送结果
+        """
+        # 路由：只发送到命中规则的通知器，全部被静默的告警直接丢弃（不进入发件箱，不计入告警量）
+        if self._route(alert_msg) is not None and not alert_msg.targets:
+            results = self._new_results(self.strategy, 0)
+            results["silenced"] = True
+            results["message"] = "告警已被静默规则抑制"
+            return results
+
+        outbox = self._outbox
+        if outbox is not None and alert_msg.outbox_id is None:
+            alert_msg.outbox_id = outbox.append(alert_msg)
+
+        # 风暴采样：强制发送（alert=True）的告警总是放行，不会触发告警的级别不计入告警量
+        storm = self._storm
+        if storm is not None and alert_msg.force_send is None and alert_msg.level in self._alert_levels:
+            was_active = storm.active
+            admitted = storm.admit(alert_msg)
+            if storm.active and not was_active:
+                emit("storm.enter", "🌪️ 告警量超过阈值，进入风暴模式", level="warning", **storm.get_stats())
+            if not admitted:
+                self._ack_outbox(alert_msg)
+                results = self._new_results(self.strategy)
+                results["sampled_out"] = True
+                results["message"] = "告警风暴期间已被采样丢弃"
+                return results
+
+        # 去重：强制发送的告警不参与去重，不会触发告警的级别也不占用指纹表
+        dedup = self._dedup
+        if dedup is not None and alert_msg.force_send is None and alert_msg.level in self._alert_levels:
+            should_send, summaries = dedup.process(alert_msg)
+            for summary in summaries:
+                self._route(summary)
+                self._send_message(summary)
+            if not should_send:
+                self._ack_outbox(alert_msg)
+                results = self._new_results(self.strategy)
+                results["deduplicated"] = True
+                results["message"] = "重复告警已抑制"
+                return results
+
+        # 批量合并：先放入批次，窗口结束或批次已满时再按策略发送摘要
+        batcher = self._batcher
+        if batcher is not None:
+            batch = batcher.add(alert_msg)
+            if batch is not None:
+                return self._send_message(batch)
+            results = self._new_results(self.strategy)
+            results["batched"] = True
+            results["message"] = "告警已加入批次，将在合并窗口结束后发送"
+            return results
+
+        return self._send_message(alert_msg)
+
+    def _route(self, alert_msg: AlertMessage) -> Optional[tuple]:
+        """
+        按路由和静默规则计算告警的目标通知器（结果保存在 alert_msg.targets）
+
+        :param alert_msg: 告警消息对象
+        :return: 目标通知器元组，None 表示所有通知器（包括没有配置路由规则时）
+        """
+        router = self._router
+        if router is not None:
+            alert_msg.targets = router.route(alert_msg)
+        return alert_msg.targets
+
+    def _send_message(self, alert_msg: Union[AlertMessage, AlertBatch]) -> Dict[str, Any]:
+        """
+        按配置的策略发送一条告警消息或一个告警批次
+
+        发送引擎不会向调用方抛出异常：超过期限仍未完成的通知器标记为超时，其他异常记录在结果中。
+
+        :param alert_msg: 告警消息或告警批次
+        :return: 发送结果
+        """
+        # 批次中的告警在合并窗口内路由结果可能已过期（通知器被替换后旧结果引用的是旧对象），发送前按当前规则重新路由
+        if isinstance(alert_msg, AlertBatch):
+            router = self._router
+            for msg in alert_msg.alerts:
+                msg.targets = router.route(msg) if router is not None else None
+
+        # 单条告警的等待期限，所有通知器共用
+        start = time.monotonic()
+        deadline = start + self.dispatch_timeout
+        drain_deadline = self._drain_deadline
+        if drain_deadline is not None:
+            deadline = min(deadline, drain_deadline)
+        try:
+            if self.strategy == "parallel":
+                results = self._send_parallel(alert_msg, deadline)
+            elif self.strategy == "sequential":
+                results = self._send_sequential(alert_msg, deadline)
+            elif self.strategy == "failover":
+                results = self._send_failover(alert_msg, deadline)
+            elif self.strategy == "priority":
+                results = self._send_priority(alert_msg, deadline)
+            elif self.strategy == "hedged":
+                results = self._send_hedged(alert_msg, deadline)
+            else:
+                raise ValueError(f"未知的发送策略: {self.strategy}")
+        except Exception as e:
+            emit("dispatch.error", f"❌ 告警发送异常: {e}", level="error", strategy=self.strategy, error=str(e))
+            results = self._new_results(self.strategy)
+            results["error"] = str(e)
+            return results
+
+        self._metrics.record_dispatch(self.strategy, results, time.monotonic() - start)
+
+        # 有渠道送达，或者所有渠道都跳过时，从发件箱中移除；全部失败的告警留在发件箱里，下次启动时补发
+        # （超时的在迟到成功时移除，限流暂存的在包含它的汇总送达后移除）
+        if results["success"] > 0 or (
+                results["failed"] == 0 and results["timed_out"] == 0 and results["rate_limited"] == 0
+        ):
+            self._ack_outbox(alert_msg)
+        return results
+
+    def _ack_outbox(self, alert_msg: Union[AlertMessage, AlertBatch]) -> None:
+        """
+        在发件箱中标记告警已处理
+
+        :param alert_msg: 告警消息或告警批次
+        """
+        outbox = self._outbox
+        if outbox is None:
+            return
+        for msg in (alert_msg.alerts if isinstance(alert_msg, AlertBatch) else (alert_msg,)):
+            if msg.outbox_id is not None:
+                outbox.ack(msg.outbox_id)
+
+    def replay_outbox(self) -> int:
+        """
+        补发发件箱中上次运行未送达的告警（在临时后台线程中合并为一个批次发送，不阻塞调用方）
+
+        :return: 待补发的告警数量
+        """
+        outbox = self._outbox
+        if outbox is None or not self.notifiers:
+            return 0
+
+        alerts = []
+        for outbox_id, alert_msg in outbox.pending():
+            alert_msg.outbox_id = outbox_id
+            self._route(alert_msg)
+            alerts.append(alert_msg)
+        if alerts:
+            threading.Thread(
+                target=self._send_message,
+                args=(AlertBatch(alerts),),
+                name="xqclog-alert-replay",
+                daemon=True,
+            ).start()
+        return len(alerts)
+
+    def warmup(self, wait: bool = False, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        在后台预热所有通知器（解析域名、建立连接、获取token、验证SMTP登录），不阻塞调用方
+
+        各通知器并行预热，预热失败只记录在报告中，不影响之后的发送。
+
+        :param wait: 是否等待预热完成
+        :param timeout: 等待的最长时间（秒），None 表示一直等待
+        :return: 预热报告（见 get_warmup_report）
+        """
+        notifiers = [notifier for notifier in self.notifiers if notifier.enabled]
+        with self._warmup_lock:
+            self._warmup_report = {
+                notifier.name: {"ready": False, "pending": True, "elapsed": None, "steps": {}, "error": None}
+                for notifier in notifiers
+            }
+
+        threads = [
+            threading.Thread(
+                target=self._warmup_notifier,
+                args=(notifier,),
+                name=f"xqclog-warmup-{notifier.name}",
+                daemon=True,
+            )
+            for notifier in notifiers
+        ]
+        for thread in threads:
+            thread.start()
+        if wait:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            for thread in threads:
+                thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        return self.get_warmup_report()
+
+    def _warmup_notifier(self, notifier: BaseNotifier) -> None:
+        """
+        预热单个通知器并记录结果
+
+        :param notifier: 通知器实例
+        """
+        start = time.monotonic()
+        entry: Dict[str, Any] = {"ready": False, "pending": False, "elapsed": None, "steps": {}, "error": None}
+        try:
+            notifier.warmup(entry["steps"])
+            entry["ready"] = True
+        except Exception as e:
+            entry["error"] = str(e)
+        entry["elapsed"] = round(time.monotonic() - start, 4)
+
+        with self._warmup_lock:
+            self._warmup_report[notifier.name] = entry
+
+        if entry["ready"]:
+            emit(
+                "warmup.ready",
+                f"🔥 通知器 {notifier.name} 预热完成，耗时 {entry['elapsed']:.3f}s",
+                notifier=notifier.name,
+                elapsed=entry["elapsed"],
+                steps=entry["steps"],
+            )
         else:
-            raise ValueError(f"未知的发送策略: {self.strategy}")
+            emit(
+                "warmup.failed",
+                f"⚠️ 通知器 {notifier.name} 预热失败: {entry['error']}",
+                level="warning",
+                notifier=notifier.name,
+                elapsed=entry["elapsed"],
+                error=entry["error"],
+            )
+
+    def _send_storm_summary(self, summary: AlertMessage) -> None:
+        """
+        把风暴汇总发送到最高优先级的可用通知器（不等待结果）
+
+        :param summary: 风暴汇总消息
+        """
+        emit("storm.summary", summary.message, level="warning")
+        for notifier in self.notifiers:
+            if notifier.is_available():
+                self._deliver(notifier, summary)
+                return
+
+    def get_warmup_report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取预热报告
+
+        :return: {通知器名称: {"ready": 是否就绪, "pending": 是否仍在预热, "elapsed": 总耗时（秒）,
+                              "steps": {步骤名: 耗时}, "error": 失败原因}}
+        """
+        with self._warmup_lock:
+            return {name: dict(entry) for name, entry in self._warmup_report.items()}
+
+    def _ensure_housekeeping(self) -> None:
+        """按需启动后台维护线程"""
+        # shutdown 后立即重新初始化时，旧线程可能还没退出：先等它退出，否则会以为线程仍在运行而不再启动
+        thread = self._housekeeping_thread
+        if (
+                thread is not None
+                and thread.is_alive()
+                and self._housekeeping_stop.is_set()
+                and thread is not threading.current_thread()
+        ):
+            thread.join()
+        with self._lock:
+            thread = self._housekeeping_thread
+            if thread is not None and thread.is_alive():
+                return
+            self._housekeeping_stop.clear()
+            self._housekeeping_thread = threading.Thread(
+                target=self._housekeeping_loop,
+                name="xqclog-alert-housekeeping",
+                daemon=True,
+            )
+            self._housekeeping_thread.start()
+
+    def _housekeeping_loop(self) -> None:
+        """后台维护线程主循环"""
+        while not self._housekeeping_stop.wait(self._housekeeping_interval):
+            try:
+                self._housekeeping()
+            except Exception as e:
+                emit("housekeeping.error", f"❌ 告警后台维护异常: {e}", level="error", error=str(e))
+
+    def _housekeeping(self) -> None:
+        """执行周期性维护任务：检查子进程后端、发送到期的批次、补发重复汇总和限流期间暂存的告警、写入指标文件"""
+        backend = self._backend
+        if backend is not None:
+            backend.check()
+
+        batcher = self._batcher
+        if batcher is not None:
+            batch = batcher.flush_due()
+            if batch is not None:
+                self._send_message(batch)
+
+        dedup = self._dedup
+        if dedup is not None:
+            for summary in dedup.flush_expired():
+                self._route(summary)
+                self._send_message(summary)
+
+        storm = self._storm
+        if storm is not None:
+            summary = storm.poll()
+            if summary is not None:
+                self._send_storm_summary(summary)
+
+        for notifier in self.notifiers:
+            # 熔断期间暂存的告警继续保留，等渠道恢复后再补发
+            if notifier.has_deferred() and notifier.is_available() and notifier.acquire_send_slot():
+                alerts, total = notifier.pop_deferred()
+                self._deliver_deferred(notifier, AlertBatch(alerts, omitted=total - len(alerts)))
+
+        if self._metrics_file and time.monotonic() - self._metrics_written >= self._metrics_interval:
+            self._metrics_written = time.monotonic()
+            try:
+                self.write_metrics()
+            except Exception as e:
+                emit("metrics.error", f"❌ 告警指标写入失败: {e}", level="error", error=str(e))
+
+    def _deliver_deferred(self, notifier: BaseNotifier, batch: AlertBatch) -> Future:
+        """
+        发送限流期间暂存的告警汇总，送达后才从发件箱中移除其中的告警
+
+        :param notifier: 通知器实例
+        :param batch: 暂存告警组成的批次
+        :return: 完成时结果为发送结果字典的Future
+        """
+        future = self._deliver(notifier, batch, acquired=True)
+
+        def on_done(done: Future) -> None:
+            if done.result()["success"]:
+                self._ack_outbox(batch)
+
+        future.add_done_callback(on_done)
+        return future
+
+    def submit_alert(
+            self,
+            level: str,
+            message: str,
+            force_send: Optional[bool] = None,
+            **extra: Any
+    ) -> bool:
+        """
+        提交告警：启用异步派发时只入队并立即返回，否则同步发送
+
+        :param level: 日志级别
+        :param message: 消息内容
+        :param force_send: 强制发送标志（True=强制发送, False=强制不发送, None=根据配置判断）
+        :param extra: 额外信息（module/function/line/extra/timestamp）
+        :return: 是否已受理（异步模式下队列满被丢弃时返回False）
+        """
+        backend = self._backend
+        if backend is not None:
+            return backend.submit(level=level, message=message, force_send=force_send, **extra)
+
+        dispatcher = self._dispatcher
+        if dispatcher is None:
+            try:
+                self.send_alert(level, message, force_send=force_send, **extra)
+            except Exception as e:
+                # 告警处理失败不能影响日志调用
+                emit("alert.error", f"❌ 告警处理异常: {e}", level="error", error=str(e))
+                return False
+            return True
+
+        alert_msg = self._build_alert(level, message, force_send, extra)
+        # 入队前先记入发件箱（只进内存队列，由发件箱的后台线程写盘）
+        outbox = self._outbox
+        if outbox is not None:
+            alert_msg.outbox_id = outbox.append(alert_msg)
+
+        accepted = dispatcher.submit({"alert_msg": alert_msg}, LEVEL_SEVERITY.get(level, 0))
+        if not accepted:
+            # 被主动丢弃的告警不需要在重启后补发
+            self._ack_outbox(alert_msg)
+        return accepted
+
+    def _dispatch_record(self, record: Dict[str, Any]) -> None:
+        """
+        派发线程回调：按配置的策略发送一条告警记录
+
+        :param record: submit_alert 入队的告警记录
+        """
+        alert_msg = record["alert_msg"]
+        if not self.notifiers:
+            self._ack_outbox(alert_msg)
+            return
+        self._process_alert(alert_msg)
+
+    def get_dispatch_stats(self) -> Dict[str, Any]:
+        """
+        获取异步派发统计（入队、处理、丢弃数量及队列深度）
+
+        :return: 统计信息字典，未启用异步派发时返回空字典
+        """
+        if self._dispatcher is None:
+            return {}
+        return self._dispatcher.get_stats()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取告警管道的指标快照
+
+        :return: {
+            "notifiers": {名称: {"counters": 各结果计数, "latency": 发送耗时直方图, "end_to_end": 端到端耗时直方图}},
+            "strategies": {策略: {"counters": 各结果计数, "latency": 耗时直方图}},
+            "dispatch"/"retry"/"timeouts"/"outbox"/"routing"/"backend"/"circuits"/"bulkheads": 各组件的统计
+        }
+        """
+        stats = self._metrics.snapshot()
+        stats["dispatch"] = self.get_dispatch_stats()
+        stats["retry"] = self.get_retry_stats()
+        stats["timeouts"] = self.get_timeout_stats()
+        stats["outbox"] = self.get_outbox_stats()
+        stats["coordination"] = self.get_coordination_stats()
+        stats["storm"] = self.get_storm_stats()
+        stats["routing"] = self.get_routing_stats()
+        stats["backend"] = self.get_backend_stats()
+        stats["circuits"] = self.get_circuit_stats()
+        stats["bulkheads"] = self.get_bulkhead_stats()
+        stats["latency_estimates"] = {notifier.name: notifier.latency.snapshot() for notifier in self.notifiers}
+        return stats
+
+    def write_metrics(self, path: Optional[str] = None) -> None:
+        """
+        把指标以 Prometheus 文本格式写入文件
+
+        :param path: 文件路径，None 表示使用配置的 metrics_file
+        """
+        path = path or self._metrics_file
+        if not path:
+            raise ValueError("没有配置指标文件路径")
+
+        dispatch = self.get_dispatch_stats()
+        gauges = {
+            "queue_depth": dispatch.get("queue_size", 0),
+            "queue_dropped": dispatch.get("dropped", 0),
+            "retries_scheduled": self._scheduler.pending(),
+            "outbox_pending": self.get_outbox_stats().get("pending", 0),
+        }
+        gauges["bulkhead_inflight"] = {
+            (("notifier", name),): bulkhead["inflight"] for name, bulkhead in self.get_bulkhead_stats().items()
+        }
+        self._metrics.write_prometheus(path, gauges)
+
+    def get_timeout_stats(self) -> Dict[str, Any]:
+        """
+        获取等待超时统计（超时次数，以及超时后在后台最终成功/失败的次数）
+
+        :return: 统计信息字典
+        """
+        with self._timeout_stats_lock:
+            return dict(self._timeout_stats)
+
+    def _apply_coordination(self, notifier: BaseNotifier) -> None:
+        """
+        按是否启用多进程协调，为通知器切换共享或本地的令牌桶
+
+        :param notifier: 通知器实例
+        """
+        local = getattr(notifier, '_local_rate_limiter', notifier.rate_limiter)
+        notifier._local_rate_limiter = local
+        if local is None:
+            return
+        notifier.rate_limiter = local if self._shared is None else self._shared.token_bucket(notifier.name, local)
+
+    def get_storm_stats(self) -> Dict[str, Any]:
+        """
+        获取告警风暴状态（是否处于风暴模式、最近告警量、累计抑制数量）
+
+        :return: 状态字典，未启用风暴控制时返回空字典
+        """
+        if self._storm is None:
+            return {}
+        return self._storm.get_stats()
+
+    def get_backend_stats(self) -> Dict[str, Any]:
+        """
+        获取子进程后端统计
+
+        :return: 写入/丢失的告警数、启动和重启次数、子进程状态，未启用时返回 {"enabled": False}
+        """
+        backend = self._backend
+        if backend is None:
+            return {"enabled": False}
+        stats = backend.get_stats()
+        stats["enabled"] = True
+        return stats
+
+    def get_routing_stats(self) -> Dict[str, Any]:
+        """
+        获取路由统计
+
+        :return: 命中路由规则、走默认路由、被静默的告警数量，未配置路由规则时返回 {"enabled": False}
+        """
+        router = self._router
+        if router is None:
+            return {"enabled": False}
+        stats = router.get_stats()
+        stats["enabled"] = True
+        return stats
+
+    def get_coordination_stats(self) -> Dict[str, Any]:
+        """
+        获取多进程共享表统计（当前进程申请/被抑制的次数、表中仍在窗口内的指纹数）
+
+        :return: 统计信息字典，未启用多进程协调时返回空字典
+        """
+        if self._shared is None:
+            return {}
+        return self._shared.get_stats()
+
+    def get_outbox_stats(self) -> Dict[str, Any]:
+        """
+        获取发件箱统计（写入、确认、fsync、压缩次数及未送达数量）
+
+        :return: 统计信息字典，未启用发件箱时返回空字典
+        """
+        if self._outbox is None:
+            return {}
+        return self._outbox.get_stats()
+
+    def get_retry_stats(self) -> Dict[str, Any]:
+        """
+        获取重试统计（已安排的重试次数、超过总期限被放弃的告警数）
+
+        :return: 统计信息字典
+        """
+        stats = dict(self._retry_stats)
+        stats["scheduled"] = self._scheduler.pending()
+        return stats
+
+    def get_circuit_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各通知器的熔断器状态
+
+        :return: {通知器名称: 状态字典}，未启用熔断的通知器不包含在内
+        """
+        return {
+            notifier.name: notifier.circuit_breaker.get_stats()
+            for notifier in self.notifiers
+            if notifier.circuit_breaker is not None
+        }
+
+    def get_bulkhead_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        获取各通知器隔离舱（独立线程池）的统计
+
+        :return: {通知器名称: 统计信息字典}
+        """
+        return {notifier.name: notifier.bulkhead.get_stats() for notifier in self.notifiers}
 
     def clear_notifiers(self) -> None:
-        """清空所有通知器"""
-        self.notifiers.clear()
+        """清空所有通知器（已开始的发送和重试继续执行完，不等待）"""
+        self.replace_notifiers(())
 
     def get_notifiers_count(self) -> int:
         """
@@ -356,9 +1654,144 @@ class AlertManager:
         """
         return len(self.notifiers)
 
-    def shutdown(self) -> None:
-        """关闭管理器，清理资源"""
-        self._executor.shutdown(wait=True)
+    def shutdown(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        关闭管理器：在期限内按级别从高到低发送待发送的告警，剩余的留在发件箱中（未启用发件箱时丢弃）
+
+        待发送的告警包括异步派发队列、未到期的批次和限流暂存的告警；排空期间的发送和重试都不会超过期限，
+        期限到后还在排队的发送任务被丢弃，正在执行的发送无法中断（受 timeout 限制）。
+
+        :param timeout: 排空期限（秒），默认 drain_timeout
+        :return: 排空报告 {"flushed": 期限内送达的告警数, "persisted": 留在发件箱中的告警数,
+                 "dropped": 丢弃的告警数（包括未启用发件箱时发送失败或超时的告警）, "cancelled": 被丢弃的发送任务数,
+                 "levels": {级别: {"flushed", "unsent"}}, "elapsed": 耗时（秒）}
+        """
+        start = time.monotonic()
+        deadline = start + (self.drain_timeout if timeout is None else timeout)
+        self._drain_deadline = deadline
+        self._shut_down = True
+        self._housekeeping_stop.set()
+        report: Dict[str, Any] = {"flushed": 0, "persisted": 0, "dropped": 0, "cancelled": 0, "levels": {}}
+
+        def remaining() -> float:
+            return max(deadline - time.monotonic(), 0.0)
+
+        def count(alert_msg: Union[AlertMessage, AlertBatch], key: str) -> None:
+            counts = alert_msg.level_counts if isinstance(alert_msg, AlertBatch) else {alert_msg.level: 1}
+            for level, n in counts.items():
+                level_report = report["levels"].setdefault(level, {"flushed": 0, "unsent": 0})
+                level_report[key] += n
+
+        def settle(alert_msg: Union[AlertMessage, AlertBatch], results: Dict[str, Any]) -> None:
+            """按发送结果计入报告：有渠道送达才算 flushed，失败或超时的留在发件箱中（未启用发件箱时丢弃）"""
+            n = alert_msg.total if isinstance(alert_msg, AlertBatch) else 1
+            if results["success"] > 0:
+                count(alert_msg, "flushed")
+                report["flushed"] += n
+                return
+            # 失败、超时的告警没有从发件箱中移除；全部熔断的告警已被移除，无法补发
+            kept = results["failed"] or results["timed_out"] or results.get("error")
+            if kept or results["circuit_open"]:
+                count(alert_msg, "unsent")
+                if not kept or self._outbox is None:
+                    report["dropped"] += n
+
+        backend = self.stop_process_backend(remaining())
+        if backend is not None:
+            report["dropped"] += backend["lost"]
+            report["backend"] = backend
+
+        # 收集待发送的告警：派发队列（正在发送的一条会先完成）、未到期的批次
+        pending: List[Union[AlertMessage, AlertBatch]] = []
+        if self._dispatcher is not None:
+            pending.extend(record["alert_msg"] for record in self._dispatcher.drain(remaining()))
+            self._dispatcher = None
+        batcher, self._batcher = self._batcher, None
+        if batcher is not None:
+            batch = batcher.flush()
+            if batch is not None:
+                pending.append(batch)
+
+        # 还在退避等待中的重试立即执行（排空期间不会再安排超过期限的重试）
+        for task in self._scheduler.stop():
+            if remaining() > 0:
+                task.func(*task.args)
+
+        # CRITICAL 优先，同级别按入队顺序
+        pending.sort(key=lambda msg: LEVEL_SEVERITY.get(msg.level, 0), reverse=True)
+        unsent: List[AlertMessage] = []
+        for alert_msg in pending:
+            if remaining() > 0:
+                if isinstance(alert_msg, AlertBatch):
+                    settle(alert_msg, self._send_message(alert_msg))
+                else:
+                    settle(alert_msg, self._process_alert(alert_msg))
+            else:
+                count(alert_msg, "unsent")
+                unsent.extend(alert_msg.alerts if isinstance(alert_msg, AlertBatch) else (alert_msg,))
+
+        # 限流暂存的告警：期限内合并为一条摘要发送，否则和未发送的告警一起处理
+        for notifier in self.notifiers:
+            if not notifier.has_deferred():
+                continue
+            alerts, total = notifier.pop_deferred()
+            batch = AlertBatch(alerts, omitted=total - len(alerts))
+            if remaining() > 0 and notifier.is_available():
+                future = self._deliver_deferred(notifier, batch)
+                try:
+                    delivered = future.result(timeout=remaining())["success"]
+                except FutureTimeoutError:
+                    delivered = False
+                if delivered:
+                    count(batch, "flushed")
+                    report["flushed"] += batch.total
+                else:
+                    # 没有送达的暂存告警仍在发件箱中（未启用发件箱时丢弃），被挤掉的只计入总数
+                    count(batch, "unsent")
+                    report["dropped"] += batch.omitted + (len(alerts) if self._outbox is None else 0)
+            else:
+                count(batch, "unsent")
+                unsent.extend(alerts)
+                report["dropped"] += batch.omitted
+
+        # 等待正在进行的发送，期限到后丢弃还在排队的发送任务
+        for notifier in self.notifiers:
+            notifier.bulkhead.wait_idle(remaining())
+        for notifier in self.notifiers:
+            report["cancelled"] += notifier.bulkhead.shutdown(wait=False, cancel_pending=True)
+        self._scheduler.stop()
+
+        outbox = self._outbox
+        if outbox is not None:
+            # 未发送的告警写入发件箱（异步派发的告警入队时已经写入），下次启动时补发
+            for alert_msg in unsent:
+                if alert_msg.outbox_id is None:
+                    alert_msg.outbox_id = outbox.append(alert_msg)
+            outbox.close()
+            self._outbox = None
+            report["persisted"] = outbox.get_stats()["pending"]
+        else:
+            report["dropped"] += len(unsent)
+
+        if self._metrics_file:
+            # 退出前写入最终的指标
+            try:
+                self.write_metrics()
+            except Exception as e:
+                emit("metrics.error", f"❌ 告警指标写入失败: {e}", level="error", error=str(e))
+
+        self._drain_deadline = None
+        report["elapsed"] = round(time.monotonic() - start, 3)
+        lost = report["dropped"] + report["cancelled"]
+        if pending or unsent or lost or report["persisted"]:
+            emit(
+                "shutdown.drained",
+                f"📤 告警排空完成：发送 {report['flushed']} 条，发件箱中 {report['persisted']} 条，"
+                f"丢弃 {report['dropped']} 条，取消发送任务 {report['cancelled']} 个（耗时 {report['elapsed']} 秒）",
+                level="warning" if lost else "info",
+                **report,
+            )
+        return report
 
 
 # 全局实例
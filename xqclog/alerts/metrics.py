@@ -0,0 +1,345 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-25 16:00:00 UTC
+# 文件描述：告警管道指标（按通知器/策略的结果计数和固定分桶的耗时直方图），支持导出 Prometheus 文本格式
+# 文件路径：xqclog/alerts/metrics.py
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union
+from bisect import bisect_left
+from pathlib import Path
+import math
+import os
+import threading
+
+# 默认的耗时分桶上界（秒）
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 单个通知器的发送结果类型
+OUTCOMES = ("success", "failed", "skipped", "retried", "timed_out", "rate_limited", "circuit_open", "cancelled")
+
+# 正态分布 95 分位对应的标准差倍数
+_Z95 = 1.645
+
+# 瞬时值：{指标名: 值}，带标签的指标为 {指标名: {((标签名, 标签值), ...): 值}}
+Gauges = Dict[str, Union[float, Dict[Tuple[Tuple[str, Any], ...], float]]]
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图（不加锁，由 AlertMetrics 统一加锁）"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """
+        初始化直方图
+
+        :param buckets: 递增的分桶上界（秒），最后隐含一个 +Inf 桶
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        记录一次耗时
+
+        :param value: 耗时（秒）
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        累计分桶计数（Prometheus 的 le 语义）
+
+        :return: [(上界, 累计次数), ...]，最后一项为 "+Inf"
+        """
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        估算分位数（取所在分桶的上界）
+
+        :param q: 分位（0~1）
+        :return: 估算值（秒），没有数据时返回None
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return self.buckets[-1] if self.buckets else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取直方图快照
+
+        :return: 快照字典
+        """
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class LatencyEstimator:
+    """
+    在线估计单个通知器的响应耗时（指数加权的均值和方差，O(1) 更新，近期样本权重更高）
+
+    用于对冲发送：当前渠道超过估计的 p95 耗时仍未响应时，启动下一个渠道。
+    """
+
+    __slots__ = ("alpha", "min_samples", "mean", "var", "count", "_lock")
+
+    def __init__(self, alpha: float = 0.2, min_samples: int = 5) -> None:
+        """
+        初始化估计器
+
+        :param alpha: 新样本的权重（0~1，越大越快跟上耗时变化）
+        :param min_samples: 样本数少于该值时不给出估计
+        """
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        记录一次响应耗时
+
+        :param value: 耗时（秒）
+        """
+        with self._lock:
+            if self.count == 0:
+                self.mean = value
+            else:
+                diff = value - self.mean
+                increment = self.alpha * diff
+                self.mean += increment
+                self.var = (1 - self.alpha) * (self.var + diff * increment)
+            self.count += 1
+
+    def p95(self) -> Optional[float]:
+        """
+        估计的 95 分位耗时（均值 + 1.645 倍标准差）
+
+        :return: 估计值（秒），样本不足时返回None
+        """
+        with self._lock:
+            if self.count < self.min_samples:
+                return None
+            return self.mean + _Z95 * math.sqrt(self.var)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取估计器快照
+
+        :return: 快照字典
+        """
+        p95 = self.p95()
+        with self._lock:
+            return {
+                "count": self.count,
+                "mean": round(self.mean, 6),
+                "stddev": round(math.sqrt(self.var), 6),
+                "p95": None if p95 is None else round(p95, 6),
+            }
+
+
+class AlertMetrics:
+    """告警管道指标（线程安全，每次记录只持有一次锁）"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """
+        初始化指标
+
+        :param buckets: 耗时直方图的分桶上界（秒）
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._notifier_counts: Dict[str, Dict[str, int]] = {}
+        self._strategy_counts: Dict[str, Dict[str, int]] = {}
+        self._notifier_latency: Dict[str, LatencyHistogram] = {}  # 单个通知器发送耗时（含重试）
+        self._strategy_latency: Dict[str, LatencyHistogram] = {}  # 按策略发送一条告警的耗时
+        self._end_to_end: Dict[str, LatencyHistogram] = {}  # 从日志记录到送达的耗时
+
+    def _histogram(self, table: Dict[str, LatencyHistogram], key: str) -> LatencyHistogram:
+        """获取（按需创建）直方图（需持有锁）"""
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = LatencyHistogram(self.buckets)
+        return histogram
+
+    @staticmethod
+    def _counter(table: Dict[str, Dict[str, int]], key: str) -> Dict[str, int]:
+        """获取（按需创建）计数器（需持有锁）"""
+        counters = table.get(key)
+        if counters is None:
+            counters = table[key] = dict.fromkeys(OUTCOMES, 0)
+        return counters
+
+    def inc(self, notifier: str, outcome: str, value: int = 1) -> None:
+        """
+        通知器计数加一
+
+        :param notifier: 通知器名称
+        :param outcome: 结果类型（见 OUTCOMES）
+        :param value: 增加的数量
+        """
+        with self._lock:
+            counters = self._counter(self._notifier_counts, notifier)
+            counters[outcome] = counters.get(outcome, 0) + value
+
+    def record_delivery(
+            self,
+            notifier: str,
+            outcome: str,
+            latency: Optional[float] = None,
+            end_to_end: Optional[float] = None
+    ) -> None:
+        """
+        记录单个通知器的最终发送结果
+
+        :param notifier: 通知器名称
+        :param outcome: 结果类型
+        :param latency: 发送耗时（秒，含重试），None 表示不记录（如跳过）
+        :param end_to_end: 从日志记录到送达的耗时（秒），只在送达时记录
+        """
+        with self._lock:
+            counters = self._counter(self._notifier_counts, notifier)
+            counters[outcome] = counters.get(outcome, 0) + 1
+            if latency is not None:
+                self._histogram(self._notifier_latency, notifier).observe(latency)
+            if end_to_end is not None:
+                self._histogram(self._end_to_end, notifier).observe(max(end_to_end, 0.0))
+
+    def record_dispatch(self, strategy: str, results: Dict[str, Any], latency: float) -> None:
+        """
+        记录一次按策略发送的汇总结果
+
+        :param strategy: 策略名称
+        :param results: 发送结果汇总
+        :param latency: 耗时（秒）
+        """
+        with self._lock:
+            counters = self._counter(self._strategy_counts, strategy)
+            for outcome in OUTCOMES:
+                value = results.get(outcome)
+                if isinstance(value, int):
+                    counters[outcome] += value
+            self._histogram(self._strategy_latency, strategy).observe(latency)
+
+    def reset(self) -> None:
+        """清空所有指标"""
+        with self._lock:
+            self._notifier_counts.clear()
+            self._strategy_counts.clear()
+            self._notifier_latency.clear()
+            self._strategy_latency.clear()
+            self._end_to_end.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取指标快照
+
+        :return: {"notifiers": {...}, "strategies": {...}}
+        """
+        with self._lock:
+            notifiers = {
+                name: {
+                    "counters": dict(counters),
+                    "latency": self._notifier_latency[name].snapshot() if name in self._notifier_latency else None,
+                    "end_to_end": self._end_to_end[name].snapshot() if name in self._end_to_end else None,
+                }
+                for name, counters in self._notifier_counts.items()
+            }
+            strategies = {
+                name: {
+                    "counters": dict(counters),
+                    "latency": self._strategy_latency[name].snapshot() if name in self._strategy_latency else None,
+                }
+                for name, counters in self._strategy_counts.items()
+            }
+        return {"notifiers": notifiers, "strategies": strategies}
+
+    def to_prometheus(self, gauges: Optional[Gauges] = None, prefix: str = "xqclog_alert") -> str:
+        """
+        导出为 Prometheus 文本格式
+
+        :param gauges: 额外的瞬时值（如队列深度），{指标名: 值}；
+                       带标签的指标为 {指标名: {((标签名, 标签值), ...): 值}}，同一指标只声明一次类型
+        :param prefix: 指标名前缀
+        :return: Prometheus 文本格式内容
+        """
+        lines: List[str] = []
+
+        def counters(name: str, label: str, table: Dict[str, Dict[str, int]], help_text: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for key, values in sorted(table.items()):
+                for outcome, value in values.items():
+                    lines.append(f'{prefix}_{name}{{{label}="{_escape(key)}",outcome="{outcome}"}} {value}')
+
+        def histograms(name: str, label: str, table: Dict[str, LatencyHistogram], help_text: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for key, histogram in sorted(table.items()):
+                key = _escape(key)
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{prefix}_{name}_bucket{{{label}="{key}",le="{bound}"}} {count}')
+                lines.append(f'{prefix}_{name}_sum{{{label}="{key}"}} {histogram.sum}')
+                lines.append(f'{prefix}_{name}_count{{{label}="{key}"}} {histogram.count}')
+
+        with self._lock:
+            counters("notifier_total", "notifier", self._notifier_counts, "按通知器统计的发送结果")
+            counters("strategy_total", "strategy", self._strategy_counts, "按策略统计的发送结果")
+            histograms("notifier_latency_seconds", "notifier", self._notifier_latency, "单个通知器发送耗时（含重试）")
+            histograms("strategy_latency_seconds", "strategy", self._strategy_latency, "按策略发送一条告警的耗时")
+            histograms("end_to_end_seconds", "notifier", self._end_to_end, "从日志记录到送达的耗时")
+
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            if not isinstance(value, dict):
+                lines.append(f"{prefix}_{name} {value}")
+                continue
+            for labels, sample in sorted(value.items()):
+                label_text = ",".join(f'{label}="{_escape(label_value)}"' for label, label_value in labels)
+                lines.append(f"{prefix}_{name}{{{label_text}}} {sample}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, gauges: Optional[Gauges] = None) -> None:
+        """
+        把指标写入文件（供 node_exporter 的 textfile collector 采集），先写临时文件再原子替换
+
+        :param path: 文件路径（textfile collector 要求以 .prom 结尾）
+        :param gauges: 额外的瞬时值
+        """
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus(gauges))
+        os.replace(tmp_path, target)
+
+
+def _escape(value: str) -> str:
+    """转义 Prometheus 标签值"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,248 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-24 09:00:00 UTC
+# 文件描述：告警持久化发件箱（追加写日志），进程崩溃或重启后补发未送达的告警
+# 文件路径：xqclog/alerts/outbox.py
+
+from typing import Dict, Any, List, Optional, Tuple
+from collections import deque
+from pathlib import Path
+import itertools
+import json
+import os
+import threading
+import time
+
+from .base import AlertMessage
+from .events import emit
+
+
+class AlertOutbox:
+    """
+    告警发件箱（JSON Lines 追加日志，线程安全）
+
+    每条待发送告警写入一行 {"op": "add"}，送达后写入一行 {"op": "done"}。
+    日志调用只把记录放入内存队列，序列化、写盘和 fsync 都在后台写入线程中批量完成。
+    已送达的记录累积到一定数量后重写文件（压缩），只保留仍未送达的告警。
+    """
+
+    # fsync 策略
+    FSYNC_POLICIES = ("always", "interval", "never")
+
+    def __init__(
+            self,
+            path: str,
+            fsync: str = "interval",
+            flush_interval: float = 0.2,
+            fsync_interval: float = 1.0,
+            compact_threshold: int = 1000,
+    ) -> None:
+        """
+        初始化发件箱
+
+        :param path: 日志文件路径（每个进程应使用独立的文件）
+        :param fsync: fsync 策略（always-每批写入后同步, interval-每隔 fsync_interval 秒同步, never-交给操作系统）
+        :param flush_interval: 后台线程批量写入的间隔（秒）
+        :param fsync_interval: interval 策略下的同步间隔（秒）
+        :param compact_threshold: 已送达记录累积到该数量时压缩文件
+        """
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"未知的 fsync 策略: {fsync}")
+
+        self.path = Path(path)
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.compact_threshold = compact_threshold
+
+        # 启动时读出上次未送达的告警，新编号从已有的最大编号之后开始
+        self._live: Dict[int, str] = self._load()  # 未送达的记录 {编号: 序列化后的行}
+        self._counter = itertools.count(max(self._live, default=0) + 1)
+
+        self._queue: deque = deque()  # 待写入的操作 (op, 编号, 告警)
+        self._cond = threading.Condition(threading.Lock())
+        self._file = None
+        self._done_since_compact = 0
+        self._last_fsync = time.monotonic()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"appended": 0, "acked": 0, "writes": 0, "fsyncs": 0, "compactions": 0, "errors": 0}
+
+    def _load(self) -> Dict[int, str]:
+        """
+        读取日志文件，返回未送达的记录（忽略崩溃时写了一半的行）
+
+        :return: {编号: 原始行}
+        """
+        live: Dict[int, str] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get("op") == "add":
+                        live[entry["id"]] = line if line.endswith("\n") else line + "\n"
+                    elif entry.get("op") == "done":
+                        live.pop(entry["id"], None)
+        except FileNotFoundError:
+            pass
+        return live
+
+    def start(self) -> None:
+        """启动后台写入线程（启动前先压缩一次，清掉上次运行遗留的已送达记录）"""
+        with self._cond:
+            if self._running:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._rewrite()
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="xqclog-alert-outbox", daemon=True)
+            self._thread.start()
+
+    def pending(self) -> List[Tuple[int, AlertMessage]]:
+        """
+        上次运行遗留（以及当前尚未送达）的告警
+
+        :return: [(编号, 告警消息), ...]，按编号排序
+        """
+        with self._cond:
+            lines = sorted(self._live.items())
+        return [(outbox_id, AlertMessage.from_dict(json.loads(line)["alert"])) for outbox_id, line in lines]
+
+    def append(self, alert_msg: AlertMessage) -> int:
+        """
+        记录一条待发送的告警（只入内存队列，不做IO）
+
+        :param alert_msg: 告警消息
+        :return: 发件箱编号，送达后用它调用 ack()
+        """
+        outbox_id = next(self._counter)
+        with self._cond:
+            self._queue.append(("add", outbox_id, alert_msg))
+        return outbox_id
+
+    def ack(self, outbox_id: int) -> None:
+        """
+        标记告警已送达（只入内存队列，不做IO）
+
+        :param outbox_id: append() 返回的编号
+        """
+        with self._cond:
+            self._queue.append(("done", outbox_id, None))
+
+    def _run(self) -> None:
+        """后台写入线程主循环"""
+        while True:
+            with self._cond:
+                if self._running and not self._queue:
+                    self._cond.wait(self.flush_interval)
+                running = self._running
+            try:
+                self._flush()
+            except Exception as e:
+                self._stats["errors"] += 1
+                emit("outbox.error", f"❌ 告警发件箱写入失败: {e}", level="error", path=str(self.path), error=str(e))
+            if not running:
+                return
+
+    def _flush(self) -> None:
+        """把队列中的操作批量写入文件"""
+        with self._cond:
+            ops, self._queue = self._queue, deque()
+        if not ops:
+            self._maybe_fsync(force=False)
+            return
+
+        # 序列化在锁外完成，不阻塞日志线程入队
+        lines = []
+        for op, outbox_id, alert_msg in ops:
+            if op == "add":
+                line = json.dumps(
+                    {"op": "add", "id": outbox_id, "alert": alert_msg.to_dict()},
+                    ensure_ascii=False,
+                    default=str,
+                ) + "\n"
+            else:
+                line = json.dumps({"op": "done", "id": outbox_id}) + "\n"
+            lines.append((op, outbox_id, line))
+
+        with self._cond:
+            for op, outbox_id, line in lines:
+                if op == "add":
+                    self._live[outbox_id] = line
+                    self._stats["appended"] += 1
+                else:
+                    self._live.pop(outbox_id, None)
+                    self._done_since_compact += 1
+                    self._stats["acked"] += 1
+
+            if self._done_since_compact >= self.compact_threshold:
+                # 直接重写为只含未送达记录的新文件，本批操作已体现在 _live 中
+                self._rewrite()
+                return
+
+        self._file.write("".join(line for _, _, line in lines))
+        self._file.flush()
+        self._stats["writes"] += 1
+        self._maybe_fsync(force=self.fsync == "always")
+
+    def _maybe_fsync(self, force: bool) -> None:
+        """按 fsync 策略同步到磁盘"""
+        if self.fsync == "never" or self._file is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+            self._stats["fsyncs"] += 1
+
+    def _rewrite(self) -> None:
+        """压缩：只保留未送达的记录，写临时文件后原子替换（需持有锁）"""
+        if self._file is not None:
+            self._file.close()
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(line for _, line in sorted(self._live.items())))
+            f.flush()
+            if self.fsync != "never":
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._done_since_compact = 0
+        self._stats["compactions"] += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        写完队列中剩余的操作并关闭文件
+
+        :param timeout: 等待写入线程结束的最长时间（秒）
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._cond:
+            if self._done_since_compact:
+                # 正常退出时顺便压缩，只留下仍未送达的告警
+                self._rewrite()
+            if self._file is not None:
+                if self.fsync != "never":
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取发件箱统计
+
+        :return: 统计信息字典
+        """
+        stats = dict(self._stats)
+        stats["pending"] = len(self._live)
+        stats["queued"] = len(self._queue)
+        return stats
@@ -0,0 +1,136 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-29 09:00:00 UTC
+# 文件描述：按级别排序的待发送队列，高级别优先出队，等待越久优先级越高（老化），满时先挤出低级别
+# 文件路径：xqclog/alerts/priority.py
+
+from typing import Dict, Any, List, Optional, Tuple
+from collections import deque
+import time
+
+# 相邻日志级别的严重程度差（与 LEVEL_SEVERITY 一致，如 WARNING=30、ERROR=40）
+LEVEL_STEP = 10
+
+# CRITICAL 的严重程度（与 LEVEL_SEVERITY 一致），达到该级别的项不参与老化，总是最先出队
+CRITICAL_SEVERITY = 50
+
+
+class PriorityBacklog:
+    """
+    优先级待处理队列（非线程安全，由调用方加锁）
+
+    按严重程度分桶，桶内先进先出。有 CRITICAL 时总是先取 CRITICAL；否则比较各桶队首的排序键
+    入队时间 - 严重程度 / LEVEL_STEP * aging，即每等待 aging 秒相当于提升一个级别，
+    等待足够久的低级别也会被处理（如默认 5 秒时，等待超过 5 秒的 WARNING 排在刚入队的 ERROR 之前）。
+    aging 为 0 时严格按级别出队。排序键在入队时就已确定，出队只需比较各桶队首（级别数很少）。
+    """
+
+    def __init__(self, aging: float = 5.0) -> None:
+        """
+        初始化队列
+
+        :param aging: 每等待多少秒提升一个级别（最多提升到 CRITICAL 之下），0 表示严格按级别出队（低级别可能一直得不到处理）
+        """
+        if aging < 0:
+            raise ValueError("aging 不能小于 0")
+        self.aging = aging
+        self._buckets: Dict[int, deque] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, item: Any, severity: int = 0) -> None:
+        """
+        入队
+
+        :param item: 待处理项
+        :param severity: 严重程度（LEVEL_SEVERITY 中的数值）
+        """
+        key = time.monotonic() - severity / LEVEL_STEP * self.aging
+        bucket = self._buckets.get(severity)
+        if bucket is None:
+            bucket = self._buckets[severity] = deque()
+        bucket.append((key, item))
+        self._size += 1
+
+    def pop(self) -> Any:
+        """
+        取出优先级最高的一项
+
+        :return: 待处理项
+        :raises IndexError: 队列为空
+        """
+        highest = max((severity for severity, bucket in self._buckets.items() if bucket), default=None)
+        if highest is None:
+            raise IndexError("pop from an empty backlog")
+        if highest >= CRITICAL_SEVERITY or not self.aging:
+            return self._take(highest, newest=False)
+
+        best: Optional[Tuple[float, int]] = None
+        for severity, bucket in self._buckets.items():
+            if bucket and (best is None or bucket[0][0] < best[0]):
+                best = (bucket[0][0], severity)
+        return self._take(best[1], newest=False)
+
+    def lowest_severity(self) -> Optional[int]:
+        """
+        队列中最低的严重程度
+
+        :return: 严重程度，队列为空时返回None
+        """
+        return min((severity for severity, bucket in self._buckets.items() if bucket), default=None)
+
+    def evict(self, newest: bool = False) -> Any:
+        """
+        从最低级别中挤出一项
+
+        :param newest: True 挤出该级别中最新的一项，False 挤出最旧的一项
+        :return: 被挤出的项
+        :raises IndexError: 队列为空
+        """
+        severity = self.lowest_severity()
+        if severity is None:
+            raise IndexError("evict from an empty backlog")
+        return self._take(severity, newest)
+
+    def remove(self, item: Any) -> bool:
+        """
+        移除指定的项（按 is 比较，需要遍历）
+
+        :param item: 待移除的项
+        :return: 是否找到并移除
+        """
+        for bucket in self._buckets.values():
+            for entry in bucket:
+                if entry[1] is item:
+                    bucket.remove(entry)
+                    self._size -= 1
+                    return True
+        return False
+
+    def _take(self, severity: int, newest: bool) -> Any:
+        """从指定级别的桶中取出一项"""
+        bucket = self._buckets[severity]
+        _, item = bucket.pop() if newest else bucket.popleft()
+        self._size -= 1
+        return item
+
+    def drain(self) -> List[Any]:
+        """
+        取出全部待处理项
+
+        :return: 按出队顺序排列的列表
+        """
+        items = []
+        while self._size:
+            items.append(self.pop())
+        return items
+
+    def counts(self) -> Dict[int, int]:
+        """
+        各严重程度的待处理数量
+
+        :return: {严重程度: 数量}
+        """
+        return {severity: len(bucket) for severity, bucket in sorted(self._buckets.items()) if bucket}
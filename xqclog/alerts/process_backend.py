@@ -0,0 +1,324 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-28 09:00:00 UTC
+# 文件描述：告警子进程后端，日志进程只把告警记录写入管道，由受监督的子进程负责渲染、发送和重试
+# 文件路径：xqclog/alerts/process_backend.py
+
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from .base import LEVEL_SEVERITY
+from .dispatcher import AlertDispatcher
+from .events import emit
+
+# 子进程的入口模块
+WORKER_MODULE = "xqclog.alerts.worker"
+
+# 子进程稳定运行超过该时间（秒）后，重启退避从头计算
+_STABLE_AFTER = 60.0
+
+# 停止时，在期限之外额外等待子进程退出的时间（秒）：子进程按相同的排空期限发送剩余告警，
+# 还需要写入发件箱并退出
+_EXIT_GRACE = 1.0
+
+
+def encode_record(
+        level: str,
+        message: str,
+        force_send: Optional[bool] = None,
+        module: Optional[str] = None,
+        function: Optional[str] = None,
+        line: Optional[int] = None,
+        extra: Optional[Dict[str, Any]] = None,
+        timestamp: Optional[datetime] = None,
+) -> bytes:
+    """
+    把一条告警编码为管道中的一行（紧凑的 JSON 数组）
+
+    :return: 以换行结尾的 UTF-8 字节串
+    """
+    record = [
+        level,
+        message,
+        force_send,
+        module,
+        function,
+        line,
+        extra or {},
+        timestamp.isoformat() if timestamp is not None else None,
+    ]
+    # extra 中无法序列化的值按字符串发送
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+def decode_record(data: bytes) -> Dict[str, Any]:
+    """
+    解码管道中的一行（encode_record 的逆操作）
+
+    :param data: 一行数据
+    :return: submit_alert 的关键字参数
+    """
+    level, message, force_send, module, function, line, extra, timestamp = json.loads(data)
+    return {
+        "level": level,
+        "message": message,
+        "force_send": force_send,
+        "module": module,
+        "function": function,
+        "line": line,
+        "extra": extra,
+        "timestamp": datetime.fromisoformat(timestamp) if timestamp else None,
+    }
+
+
+class ProcessAlertBackend:
+    """
+    告警子进程后端（线程安全）
+
+    子进程（python -m xqclog.alerts.worker）按相同的配置创建通知器，持有连接池、重试、去重等全部状态；
+    日志线程只把告警放进有界队列，由写入线程编码后写入子进程的标准输入。
+    子进程退出后按指数退避自动重启（由告警管理器的后台维护线程检查），重启期间的告警在队列中等待。
+    """
+
+    def __init__(
+            self,
+            config: Dict[str, Any],
+            custom_notifiers: Optional[Dict[str, str]] = None,
+            queue_size: int = 1000,
+            overflow: str = "drop_oldest",
+            block_timeout: float = 0.1,
+            restart_delay: float = 1.0,
+            max_restart_delay: float = 60.0,
+            aging: float = 5.0,
+    ) -> None:
+        """
+        初始化子进程后端
+
+        :param config: 子进程使用的日志配置（LogConfig.to_dict() 的结果，必须可以序列化为 JSON）
+        :param custom_notifiers: 自定义通知器 {名称: "模块:类名"}，子进程中按名称注册
+        :param queue_size: 等待写入子进程的告警队列容量
+        :param overflow: 队列满时的策略（drop_oldest/drop_newest/block）
+        :param block_timeout: block 策略下的最长等待（秒）
+        :param restart_delay: 子进程退出后第一次重启前的等待时间（秒），连续失败时指数增长
+        :param max_restart_delay: 重启等待时间的上限（秒）
+        :param aging: 队列中的告警每等待多少秒提升一个级别（高级别的告警先写入子进程）
+        :raises ValueError: 配置无法序列化（如通知器配置中包含函数或对象）
+        """
+        try:
+            payload = json.dumps({"config": config, "custom_notifiers": custom_notifiers or {}}, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"alert_backend='process' 要求告警配置可以序列化为 JSON: {e}") from None
+        self._handshake = (payload + "\n").encode("utf-8")
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+
+        self._dispatcher = AlertDispatcher(
+            handler=self._write,
+            queue_size=queue_size,
+            overflow=overflow,
+            block_timeout=block_timeout,
+            aging=aging,
+        )
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self._started_at = 0.0
+        self._failures = 0  # 连续异常退出的次数
+        self._restart_at = 0.0  # 下一次允许启动子进程的时间
+        self._stopping = False
+        self._stats = {"written": 0, "lost": 0, "starts": 0, "restarts": 0}
+
+    @staticmethod
+    def _command() -> List[str]:
+        """子进程的启动命令"""
+        return [sys.executable, "-m", WORKER_MODULE]
+
+    @staticmethod
+    def _environment() -> Dict[str, str]:
+        """子进程的环境变量：沿用当前进程的模块搜索路径，保证能导入 xqclog 和自定义通知器"""
+        env = dict(os.environ)
+        paths = [path or os.getcwd() for path in sys.path if path == "" or os.path.isdir(path)]
+        env["PYTHONPATH"] = os.pathsep.join(paths)
+        env.setdefault("PYTHONIOENCODING", "utf-8")
+        return env
+
+    def _spawn(self) -> Optional[subprocess.Popen]:
+        """
+        启动子进程并发送配置（需持有锁）
+
+        :return: 子进程，启动失败时返回None
+        """
+        try:
+            proc = subprocess.Popen(self._command(), stdin=subprocess.PIPE, env=self._environment())
+            proc.stdin.write(self._handshake)
+            proc.stdin.flush()
+        except OSError as e:
+            self._schedule_restart()
+            emit("backend.error", f"❌ 告警子进程启动失败: {e}", level="error", error=str(e))
+            return None
+
+        if self._stats["starts"]:
+            self._stats["restarts"] += 1
+        self._stats["starts"] += 1
+        self._proc = proc
+        self._started_at = time.monotonic()
+        emit("backend.started", f"🚀 告警子进程已启动（pid={proc.pid}）", pid=proc.pid)
+        return proc
+
+    def _schedule_restart(self) -> float:
+        """
+        记录一次异常退出并计算重启等待时间（需持有锁）
+
+        :return: 等待时间（秒）
+        """
+        if self._started_at and time.monotonic() - self._started_at >= _STABLE_AFTER:
+            self._failures = 0
+        delay = min(self.restart_delay * (2 ** self._failures), self.max_restart_delay)
+        self._failures += 1
+        self._restart_at = time.monotonic() + delay
+        return delay
+
+    def _reap(self, proc: subprocess.Popen) -> None:
+        """子进程已退出或管道已断开：清理并安排重启（需持有锁）"""
+        if self._proc is not proc:
+            return
+        self._proc = None
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        code = proc.poll()
+        delay = self._schedule_restart()
+        emit(
+            "backend.exited",
+            f"⚠️ 告警子进程已退出（pid={proc.pid}，退出码 {code}），{delay:.1f} 秒后重启",
+            level="warning",
+            pid=proc.pid,
+            returncode=code,
+            restart_in=delay,
+        )
+
+    def _running(self) -> Optional[subprocess.Popen]:
+        """
+        获取运行中的子进程，已退出且到了重启时间时重新启动（需持有锁）
+
+        :return: 子进程，不可用时返回None
+        """
+        proc = self._proc
+        if proc is not None and proc.poll() is not None:
+            self._reap(proc)
+            proc = None
+        if proc is None and not self._stopping and time.monotonic() >= self._restart_at:
+            proc = self._spawn()
+        return proc
+
+    def start(self) -> None:
+        """启动子进程和写入线程"""
+        with self._lock:
+            self._stopping = False
+            self._running()
+        self._dispatcher.start()
+
+    def submit(self, level: str, message: str, force_send: Optional[bool] = None, **extra: Any) -> bool:
+        """
+        提交告警（只入队，由写入线程编码并写入子进程）
+
+        :param level: 日志级别
+        :param message: 消息内容
+        :param force_send: 强制发送标志
+        :param extra: 与 submit_alert 相同（module/function/line/extra/timestamp），其余参数忽略
+        :return: 是否成功入队
+        """
+        return self._dispatcher.submit({
+            "level": level,
+            "message": message,
+            "force_send": force_send,
+            "module": extra.get("module"),
+            "function": extra.get("function"),
+            "line": extra.get("line"),
+            "extra": extra.get("extra"),
+            "timestamp": extra.get("timestamp"),
+        }, LEVEL_SEVERITY.get(level, 0))
+
+    def _write(self, alert: Dict[str, Any]) -> None:
+        """
+        写入线程回调：把告警写入子进程，子进程不可用时等待重启
+
+        :param alert: 告警参数
+        """
+        data = encode_record(**alert)
+        while True:
+            with self._lock:
+                proc = self._running()
+                stopping = self._stopping
+                wait = self._restart_at - time.monotonic()
+
+            if proc is not None:
+                # 只有写入线程写管道，写入时不持有锁（子进程处理慢时不阻塞状态检查）
+                try:
+                    proc.stdin.write(data)
+                    proc.stdin.flush()
+                except (OSError, ValueError):
+                    # 管道已断开（子进程崩溃）或已被 stop() 关闭，重启后重新写入（停止期间计为丢失）
+                    with self._lock:
+                        self._reap(proc)
+                    continue
+                self._stats["written"] += 1
+                return
+
+            if stopping:
+                self._stats["lost"] += 1
+                return
+            time.sleep(min(max(wait, 0.01), 0.5))
+
+    def check(self) -> None:
+        """检查子进程是否存活，已退出时按退避时间重启（由后台维护线程定期调用）"""
+        with self._lock:
+            self._running()
+
+    def stop(self, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        停止后端：先把队列中的告警写入子进程，再关闭管道，等待子进程发送完剩余告警后退出
+
+        :param timeout: 总期限（秒），期限内未写入子进程的告警计为丢失；子进程在期限之外最多再等待
+                        _EXIT_GRACE 秒，仍未退出时强制结束；None 表示一直等待
+        :return: 子进程的退出码，没有运行中的子进程时返回None
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._dispatcher.stop(timeout)
+        with self._lock:
+            self._stopping = True
+            proc, self._proc = self._proc, None
+        if proc is None:
+            return None
+        try:
+            proc.stdin.close()
+        except (OSError, ValueError):
+            # 写入线程超时后仍可能在写管道
+            pass
+        try:
+            return proc.wait(None if deadline is None else max(deadline - time.monotonic(), 0) + _EXIT_GRACE)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            emit("backend.killed", f"⚠️ 告警子进程未能在期限内退出，已强制结束（pid={proc.pid}）",
+                 level="warning", pid=proc.pid)
+            return proc.wait()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取后端统计
+
+        :return: 统计信息字典（写入/丢失的告警数、启动和重启次数、子进程状态、队列统计）
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            proc = self._proc
+            stats["pid"] = proc.pid if proc is not None else None
+            stats["alive"] = proc is not None and proc.poll() is None
+        stats["queue"] = self._dispatcher.get_stats()
+        return stats
@@ -0,0 +1,99 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-21 09:00:00 UTC
+# 文件描述：令牌桶限流器，避免超出钉钉、企业微信等平台的发送频率限制
+# 文件路径：xqclog/alerts/ratelimit.py
+
+from typing import Dict, Any, Optional, Union
+import threading
+import time
+
+
+class TokenBucket:
+    """令牌桶限流器（线程安全）"""
+
+    def __init__(self, rate: float, per: float = 60.0, burst: Optional[int] = None) -> None:
+        """
+        初始化令牌桶
+
+        :param rate: 每个周期内允许发送的消息数
+        :param per: 周期长度（秒），默认60秒
+        :param burst: 桶容量（允许的突发数量），默认等于 rate
+        """
+        if rate <= 0 or per <= 0:
+            raise ValueError("rate 和 per 必须大于 0")
+
+        self.rate = rate
+        self.per = per
+        self.capacity = float(burst if burst is not None else rate)
+        self._fill_rate = rate / per  # 每秒补充的令牌数
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Union[Dict[str, Any], bool, None]) -> Optional['TokenBucket']:
+        """
+        根据配置创建令牌桶
+
+        :param config: 限流配置，如 {"rate": 20, "per": 60, "burst": 20}；None/False 表示不限流
+        :return: TokenBucket实例或None
+        """
+        if not config:
+            return None
+        if not isinstance(config, dict):
+            raise ValueError(f"rate_limit 配置格式错误: {config}")
+        return cls(
+            rate=config["rate"],
+            per=config.get("per", 60.0),
+            burst=config.get("burst"),
+        )
+
+    def _refill(self, now: float) -> None:
+        """按流逝时间补充令牌（需持有锁）"""
+        elapsed = now - self._last
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self._fill_rate)
+            self._last = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        尝试获取令牌（不阻塞）
+
+        :param tokens: 需要的令牌数
+        :return: 是否获取成功
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        """
+        距离可获取令牌还需等待的时间
+
+        :param tokens: 需要的令牌数
+        :return: 等待时间（秒），0 表示当前可用
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = tokens - self._tokens
+            return max(missing, 0.0) / self._fill_rate
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取限流器状态
+
+        :return: 状态字典
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate": self.rate,
+                "per": self.per,
+                "capacity": self.capacity,
+                "tokens": round(self._tokens, 3),
+            }
+
@@ -1,63 +1,179 @@
 # 作者：Xiaoqiang
 # 微信公众号：XiaoqiangClub
 # 创建时间：2025-11-18 12:00:00 UTC
-# 文件描述：通知器注册表，管理内置和自定义通知器
+# 文件描述：通知器注册表，管理内置、插件（entry points）和自定义通知器，通知器模块在第一次使用时才导入
 # 文件路径：xqclog/alerts/registry.py
 
-from typing import Dict, Type, Optional
+from typing import Dict, Type, Optional, Union, Any
+from importlib import import_module
+import threading
 
 from .base import BaseNotifier
+from .events import emit
+
+# 第三方通知器的 entry points 分组，插件在 pyproject.toml 中声明：
+# [project.entry-points."xqclog.notifiers"]
+# slack = "xqclog_slack:SlackNotifier"
+ENTRY_POINT_GROUP = "xqclog.notifiers"
+
+# 内置通知器："模块:类名"（模块相对于 xqclog.alerts），第一次使用时才导入
+BUILTIN_NOTIFIERS = {
+    "dingtalk": ".dingtalk:DingTalkNotifier",
+    "weixin_webhook": ".weixin_webhook:WeixinWebhookNotifier",
+    "weixin_app": ".weixin_app:WeixinAppNotifier",
+    "email": ".email:EmailNotifier",
+}
+
+
+def _entry_points(group: str) -> list:
+    """
+    列出指定分组的 entry points（不加载）
+
+    :param group: 分组名称
+    :return: EntryPoint 列表
+    """
+    from importlib import metadata
+
+    eps = metadata.entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=group))
+    # Python 3.8/3.9：返回 {分组: [EntryPoint, ...]}
+    return list(eps.get(group, []))
 
 
 class NotifierRegistry:
-    """通知器注册表"""
+    """
+    通知器注册表（线程安全）
+
+    登记的可以是通知器类，也可以是 "模块:类名" 字符串或 EntryPoint，
+    后两者在 get() 第一次请求该类型时才导入并缓存，未使用的通知器不会拖慢启动。
+    """
 
-    def __init__(self) -> None:
-        """初始化注册表"""
-        self._registry: Dict[str, Type[BaseNotifier]] = {}
+    def __init__(self, discover_plugins: bool = True) -> None:
+        """
+        初始化注册表
+
+        :param discover_plugins: 是否从 entry points 发现第三方通知器（在第一次查找未知类型时才扫描）
+        """
+        self._registry: Dict[str, Union[Type[BaseNotifier], str, Any]] = {}
+        self._lock = threading.Lock()
+        self._plugins_discovered = not discover_plugins
         self._register_builtin()
 
     def _register_builtin(self) -> None:
-        """注册内置通知器"""
-        from .dingtalk import DingTalkNotifier
-        from .weixin_webhook import WeixinWebhookNotifier
-        from .weixin_app import WeixinAppNotifier
-        from .email import EmailNotifier  # 新增
+        """注册内置通知器（只登记引用，不导入）"""
+        self._registry.update(BUILTIN_NOTIFIERS)
+
+    def _discover_plugins(self) -> None:
+        """扫描 entry points 并登记第三方通知器（只登记引用，不导入，需持有锁）"""
+        if self._plugins_discovered:
+            return
+        self._plugins_discovered = True
+        try:
+            entry_points = _entry_points(ENTRY_POINT_GROUP)
+        except Exception as e:
+            emit("registry.error", f"❌ 扫描通知器插件失败: {e}", level="error", exc_info=True, error=str(e))
+            return
+        for ep in entry_points:
+            # 内置和手动注册的通知器优先
+            self._registry.setdefault(ep.name, ep)
+
+    @staticmethod
+    def _load(reference: Any) -> Type[BaseNotifier]:
+        """
+        导入通知器引用
 
-        self._registry["dingtalk"] = DingTalkNotifier
-        self._registry["weixin_webhook"] = WeixinWebhookNotifier
-        self._registry["weixin_app"] = WeixinAppNotifier
-        self._registry["email"] = EmailNotifier  # 新增
+        :param reference: "模块:类名" 字符串或 EntryPoint
+        :return: 通知器类
+        """
+        if isinstance(reference, str):
+            module_name, _, attr = reference.partition(":")
+            module = import_module(module_name, __package__ if module_name.startswith(".") else None)
+            notifier_class = getattr(module, attr)
+        else:
+            notifier_class = reference.load()
+
+        if not (isinstance(notifier_class, type) and issubclass(notifier_class, BaseNotifier)):
+            raise TypeError(f"{notifier_class} 必须继承自 BaseNotifier")
+        return notifier_class
 
     def register(
             self,
             name: str,
-            notifier_class: Type[BaseNotifier]
+            notifier_class: Union[Type[BaseNotifier], str]
     ) -> None:
         """
         注册通知器
 
         :param name: 通知器名称
-        :param notifier_class: 通知器类
+        :param notifier_class: 通知器类，或 "模块:类名" 字符串（第一次使用时才导入）
         """
-        if not issubclass(notifier_class, BaseNotifier):
+        if not isinstance(notifier_class, str) and not (
+                isinstance(notifier_class, type) and issubclass(notifier_class, BaseNotifier)
+        ):
             raise TypeError(f"{notifier_class} 必须继承自 BaseNotifier")
 
-        self._registry[name] = notifier_class
+        with self._lock:
+            self._registry[name] = notifier_class
 
     def get(self, name: str) -> Optional[Type[BaseNotifier]]:
         """
-        获取通知器类
+        获取通知器类（按需导入并缓存）
 
         :param name: 通知器名称
         :return: 通知器类或None
+        :raises ImportError: 通知器模块导入失败
+        :raises TypeError: 引用的对象不是通知器类
+        """
+        notifier_class = self._registry.get(name)
+        if isinstance(notifier_class, type):
+            return notifier_class
+
+        with self._lock:
+            if name not in self._registry:
+                self._discover_plugins()
+            reference = self._registry.get(name)
+            if reference is None or isinstance(reference, type):
+                return reference
+            notifier_class = self._load(reference)
+            self._registry[name] = notifier_class
+            return notifier_class
+
+    def is_loaded(self, name: str) -> bool:
+        """
+        通知器类是否已导入
+
+        :param name: 通知器名称
+        :return: 是否已导入
+        """
+        return isinstance(self._registry.get(name), type)
+
+    def custom_references(self) -> Dict[str, str]:
+        """
+        手动注册的通知器的 "模块:类名" 引用（供子进程后端在子进程中重新注册）
+
+        :return: {名称: "模块:类名"}，不包括内置通知器和插件（子进程会自行发现）
         """
-        return self._registry.get(name)
+        references = {}
+        with self._lock:
+            items = list(self._registry.items())
+        for name, entry in items:
+            if BUILTIN_NOTIFIERS.get(name) == entry:
+                continue
+            if isinstance(entry, str):
+                references[name] = entry
+            elif isinstance(entry, type):
+                if entry.__module__.startswith(__package__ + ".") and BUILTIN_NOTIFIERS.get(name):
+                    continue
+                references[name] = f"{entry.__module__}:{entry.__qualname__}"
+        return references
 
     def list_all(self) -> list:
         """
-        列出所有已注册的通知器名称
+        列出所有已注册的通知器名称（包括未导入的内置通知器和插件）
 
         :return: 通知器名称列表
         """
-        return list(self._registry.keys())
\ No newline at end of file
+        with self._lock:
+            self._discover_plugins()
+            return list(self._registry.keys())
@@ -0,0 +1,388 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-27 14:00:00 UTC
+# 文件描述：告警路由规则和静默窗口，规则在配置时编译为索引（级别位图、模块前缀树、extra 哈希表），匹配开销不随规则数增长
+# 文件路径：xqclog/alerts/routing.py
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union, TYPE_CHECKING
+from datetime import datetime, time as dt_time
+import threading
+
+from .base import AlertMessage
+from .events import emit
+
+if TYPE_CHECKING:
+    from .base import BaseNotifier
+
+# extra 匹配中表示"有该字段即可，不限值"
+ANY_VALUE = "*"
+
+# 路由结果缓存的最大条目数（按命中的规则组合缓存）
+_MAX_CACHED_ROUTES = 1024
+
+
+def _as_list(value: Union[str, Sequence[Any], None]) -> Optional[List[Any]]:
+    """把单个值或列表统一为列表，None 保持为None"""
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)) or not isinstance(value, (list, tuple, set, frozenset)):
+        return [value]
+    return list(value)
+
+
+def _bits(mask: int) -> List[int]:
+    """
+    列出位图中为 1 的位（从低到高，即规则的配置顺序）
+
+    :param mask: 位图
+    :return: 位序号列表
+    """
+    result = []
+    while mask:
+        low = mask & -mask
+        result.append(low.bit_length() - 1)
+        mask ^= low
+    return result
+
+
+class SilenceWindow:
+    """
+    静默时间窗口
+
+    start/end 为 "HH:MM" 时表示每天重复（可跨零点，可用 weekdays 限定星期几，0 为周一）；
+    为 "YYYY-MM-DD HH:MM" 等 ISO 格式时表示一次性的时间段（如维护窗口）。
+    """
+
+    __slots__ = ("start", "end", "daily", "weekdays")
+
+    def __init__(self, start: str, end: str, weekdays: Optional[Sequence[int]] = None) -> None:
+        """
+        初始化静默窗口
+
+        :param start: 开始时间（"HH:MM" 或 ISO 格式的日期时间）
+        :param end: 结束时间（格式与 start 相同）
+        :param weekdays: 每天重复的窗口只在这些星期几生效（0=周一 ... 6=周日），None 表示每天
+        """
+        self.daily = len(start) <= 8 and len(end) <= 8
+        try:
+            if self.daily:
+                self.start = dt_time.fromisoformat(start)
+                self.end = dt_time.fromisoformat(end)
+            else:
+                self.start = datetime.fromisoformat(start)
+                self.end = datetime.fromisoformat(end)
+        except ValueError:
+            raise ValueError(f"静默窗口时间格式错误: {start} ~ {end}") from None
+        self.weekdays = frozenset(weekdays) if weekdays is not None else None
+
+    def contains(self, moment: datetime) -> bool:
+        """
+        时间点是否在窗口内
+
+        :param moment: 本地时间（不带时区）
+        :return: 是否在窗口内
+        """
+        if not self.daily:
+            return self.start <= moment < self.end
+
+        clock = moment.time()
+        if self.start <= self.end:
+            inside, weekday = self.start <= clock < self.end, moment.weekday()
+        elif clock >= self.start:
+            inside, weekday = True, moment.weekday()
+        elif clock < self.end:
+            # 跨零点的窗口：零点之后的部分属于前一天开始的窗口
+            inside, weekday = True, (moment.weekday() - 1) % 7
+        else:
+            return False
+        return inside and (self.weekdays is None or weekday in self.weekdays)
+
+
+class RuleIndex:
+    """
+    一组匹配规则的索引（编译后只读，线程安全）
+
+    每条规则可以按级别（levels）、模块前缀（modules，按 "." 分段匹配）和 extra 字段（extra）过滤，
+    未配置的条件表示不限。match() 返回所有命中规则的位图（第 i 位对应第 i 条规则）：
+        级别：每个级别预先算好接受它的规则位图，查一次字典
+        模块：按模块名的分段走前缀树，沿途合并位图
+        extra：按规则中出现过的字段名查哈希表，再用位运算要求每条规则的所有字段都匹配
+    """
+
+    def __init__(self, rules: Sequence[Dict[str, Any]]) -> None:
+        """
+        编译规则
+
+        :param rules: 规则列表，每条规则可包含：
+            - levels: 级别或级别列表，如 ["ERROR", "CRITICAL"]
+            - modules: 模块前缀或前缀列表，如 "app.db"（匹配 app.db 和 app.db.pool，不匹配 app.dbx）
+            - extra: {字段: 值}，值可以是列表（任一即可）或 "*"（有该字段即可），多个字段需同时匹配
+        """
+        self.size = len(rules)
+        all_rules = (1 << self.size) - 1
+
+        self._any_level = 0
+        self._by_level: Dict[str, int] = {}
+        self._any_module = 0
+        self._trie: Dict[str, Any] = {}  # {分段: [位图, 子节点]}
+        # {字段名: [配置了该字段的规则, 不限值的规则, {值: 规则位图}]}
+        self._by_key: Dict[str, List[Any]] = {}
+
+        for i, rule in enumerate(rules):
+            bit = 1 << i
+
+            levels = _as_list(rule.get("levels"))
+            if levels is None:
+                self._any_level |= bit
+            else:
+                for level in levels:
+                    self._by_level[str(level).upper()] = self._by_level.get(str(level).upper(), 0) | bit
+
+            modules = _as_list(rule.get("modules"))
+            if modules is None:
+                self._any_module |= bit
+            else:
+                for prefix in modules:
+                    node = [0, self._trie]
+                    for segment in str(prefix).split("."):
+                        node = node[1].setdefault(segment, [0, {}])
+                    node[0] |= bit
+
+            extra = rule.get("extra") or {}
+            if not isinstance(extra, dict):
+                raise ValueError(f"路由规则的 extra 必须是字典: {extra}")
+            for key, values in extra.items():
+                entry = self._by_key.setdefault(key, [0, 0, {}])
+                entry[0] |= bit
+                if values == ANY_VALUE:
+                    entry[1] |= bit
+                    continue
+                for value in _as_list(values):
+                    entry[2][value] = entry[2].get(value, 0) | bit
+
+        # 级别不在任何规则中时，只有不限级别的规则可能命中
+        self._by_level = {level: mask | self._any_level for level, mask in self._by_level.items()}
+        self._all_rules = all_rules
+
+    def _match_module(self, module: Optional[str]) -> int:
+        """按模块名的分段走前缀树，合并沿途节点的位图"""
+        mask = self._any_module
+        if not module or not self._trie:
+            return mask
+        children = self._trie
+        for segment in module.split("."):
+            node = children.get(segment)
+            if node is None:
+                break
+            mask |= node[0]
+            children = node[1]
+        return mask
+
+    def match(self, alert_msg: AlertMessage) -> int:
+        """
+        匹配告警
+
+        :param alert_msg: 告警消息对象
+        :return: 命中规则的位图
+        """
+        mask = self._by_level.get(alert_msg.level, self._any_level)
+        if mask:
+            mask &= self._match_module(alert_msg.module)
+        if not mask or not self._by_key:
+            return mask
+
+        extra = alert_msg.extra
+        for key, (constrained, any_value, by_value) in self._by_key.items():
+            if not mask & constrained:
+                continue
+            if key in extra:
+                try:
+                    accepted = any_value | by_value.get(extra[key], 0)
+                except TypeError:  # 不可哈希的值
+                    accepted = any_value
+            else:
+                accepted = 0
+            # 配置了该字段的规则必须匹配，没配置的不受影响
+            mask &= (self._all_rules ^ constrained) | accepted
+            if not mask:
+                break
+        return mask
+
+
+class AlertRouter:
+    """
+    告警路由器（线程安全）
+
+    路由规则（routes）：告警按配置顺序匹配规则，命中后只发送到该规则的 notifiers，
+    规则配置 "continue": True 时继续匹配后面的规则（合并通知器）；没有命中任何规则的告警发送到所有通知器，
+    命中的规则中的通知器都不存在（名称写错或尚未添加）时同样发送到所有通知器，并输出警告事件。
+    静默规则（silences）：命中且处于时间窗口内的告警不发送到该规则的 notifiers（未配置时为所有通知器），
+    强制发送（alert=True）的告警不受静默影响。
+    通知器自身的 enabled、alert_levels 仍然生效。
+    """
+
+    def __init__(
+            self,
+            routes: Optional[Sequence[Dict[str, Any]]] = None,
+            silences: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        编译路由和静默规则
+
+        :param routes: 路由规则列表，如 [{"levels": ["CRITICAL"], "modules": "app.payment",
+                       "extra": {"team": "pay"}, "notifiers": ["pay_dingtalk"], "continue": False}]
+        :param silences: 静默规则列表，如 [{"start": "23:00", "end": "07:00", "levels": ["WARNING"],
+                         "notifiers": ["email"]}]，匹配条件与路由规则相同
+        """
+        self.routes = list(routes or [])
+        self.silences = list(silences or [])
+
+        for rule in self.routes:
+            if not _as_list(rule.get("notifiers")):
+                raise ValueError(f"路由规则缺少 notifiers: {rule}")
+        self._route_index = RuleIndex(self.routes)
+        self._route_names = [frozenset(_as_list(rule["notifiers"])) for rule in self.routes]
+        self._route_continue = [bool(rule.get("continue", False)) for rule in self.routes]
+
+        self._silence_index = RuleIndex(self.silences)
+        self._silence_windows = []
+        self._silence_names: List[Optional[frozenset]] = []
+        for rule in self.silences:
+            if "start" not in rule or "end" not in rule:
+                raise ValueError(f"静默规则缺少 start/end: {rule}")
+            self._silence_windows.append(SilenceWindow(rule["start"], rule["end"], rule.get("weekdays")))
+            names = _as_list(rule.get("notifiers"))
+            self._silence_names.append(frozenset(names) if names is not None else None)
+
+        self._notifiers: Tuple['BaseNotifier', ...] = ()
+        self._cache: Dict[int, Tuple['BaseNotifier', ...]] = {}
+        self._stats = {"routed": 0, "default": 0, "unresolved": 0, "silenced": 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_config(
+            cls,
+            routes: Optional[Sequence[Dict[str, Any]]],
+            silences: Optional[Sequence[Dict[str, Any]]]
+    ) -> Optional['AlertRouter']:
+        """
+        根据配置创建路由器
+
+        :param routes: 路由规则列表
+        :param silences: 静默规则列表
+        :return: AlertRouter实例，两者都没有配置时返回None
+        """
+        if not routes and not silences:
+            return None
+        return cls(routes, silences)
+
+    def bind(self, notifiers: Sequence['BaseNotifier']) -> None:
+        """
+        绑定当前的通知器列表（增删通知器后调用），规则中的名称在这里解析为通知器
+
+        :param notifiers: 按优先级排好序的通知器列表
+        """
+        self._notifiers = tuple(notifiers)
+        self._cache = {}
+
+    def _targets(self, mask: int) -> Tuple['BaseNotifier', ...]:
+        """
+        命中规则对应的通知器（按规则组合缓存，保持优先级顺序），规则中有不存在的通知器时输出警告事件
+
+        :param mask: 生效的路由规则位图
+        :return: 通知器元组（规则中的通知器都不存在时为空）
+        """
+        cache = self._cache
+        targets = cache.get(mask)
+        if targets is None:
+            names = frozenset().union(*(self._route_names[i] for i in _bits(mask)))
+            targets = tuple(notifier for notifier in self._notifiers if notifier.name in names)
+            missing = names.difference(notifier.name for notifier in targets)
+            if missing:
+                emit(
+                    "routing.unknown_notifier",
+                    f"⚠️ 路由规则引用了不存在的通知器: {', '.join(sorted(missing))}，"
+                    + ("只发送到存在的通知器" if targets else "已改为发送到所有通知器"),
+                    level="warning",
+                    notifiers=sorted(missing),
+                )
+            if len(cache) >= _MAX_CACHED_ROUTES:
+                cache.clear()
+            cache[mask] = targets
+        return targets
+
+    def _effective_routes(self, mask: int) -> int:
+        """按配置顺序应用 continue：命中的第一条规则不继续时，忽略后面的规则"""
+        effective = 0
+        for i in _bits(mask):
+            effective |= 1 << i
+            if not self._route_continue[i]:
+                break
+        return effective
+
+    def _silenced(self, alert_msg: AlertMessage) -> Optional[frozenset]:
+        """
+        当前处于静默中的通知器
+
+        :return: 被静默的通知器名称集合，空集合表示没有静默，None 表示全部静默
+        """
+        mask = self._silence_index.match(alert_msg)
+        if not mask:
+            return frozenset()
+
+        moment = alert_msg.timestamp
+        if moment.tzinfo is not None:
+            moment = moment.astimezone().replace(tzinfo=None)
+        silenced: set = set()
+        for i in _bits(mask):
+            if self._silence_windows[i].contains(moment):
+                names = self._silence_names[i]
+                if names is None:
+                    return None
+                silenced |= names
+        return frozenset(silenced)
+
+    def route(self, alert_msg: AlertMessage) -> Optional[Tuple['BaseNotifier', ...]]:
+        """
+        计算告警应发送到的通知器
+
+        :param alert_msg: 告警消息对象
+        :return: 通知器元组（按优先级排序，可能为空），None 表示发送到所有通知器
+        """
+        mask = self._route_index.match(alert_msg) if self.routes else 0
+        targets = self._targets(self._effective_routes(mask)) if mask else None
+        unresolved = targets is not None and not targets
+        if unresolved:
+            # 规则中的通知器都不存在：按没有命中规则处理，不能因为名称写错就丢弃告警
+            targets = None
+
+        if self.silences and alert_msg.force_send is not True:
+            silenced = self._silenced(alert_msg)
+            if silenced is None:
+                targets = ()
+            elif silenced:
+                pool = self._notifiers if targets is None else targets
+                targets = tuple(notifier for notifier in pool if notifier.name not in silenced)
+
+        with self._stats_lock:
+            if targets is not None and not targets:
+                self._stats["silenced"] += 1
+            elif unresolved:
+                self._stats["unresolved"] += 1
+            elif mask:
+                self._stats["routed"] += 1
+            else:
+                self._stats["default"] += 1
+        return targets
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取路由统计
+
+        :return: 统计信息字典
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["routes"] = len(self.routes)
+        stats["silences"] = len(self.silences)
+        return stats
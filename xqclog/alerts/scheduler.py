@@ -0,0 +1,131 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-23 15:00:00 UTC
+# 文件描述：基于最小堆的定时调度器，用于重试退避等延迟任务，等待期间不占用工作线程
+# 文件路径：xqclog/alerts/scheduler.py
+
+from typing import Any, Callable, List, Optional
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from .events import emit
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    指数退避 + 全抖动（full jitter）
+
+    :param attempt: 已失败的次数（从1开始）
+    :param base: 基础延迟（秒）
+    :param cap: 最大延迟（秒）
+    :return: 本次等待时间（秒），在 [0, min(cap, base * 2^(attempt-1))] 内均匀分布
+    """
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class ScheduledTask:
+    """调度任务句柄"""
+
+    __slots__ = ("when", "seq", "func", "args", "cancelled")
+
+    def __init__(self, when: float, seq: int, func: Callable[..., Any], args: tuple) -> None:
+        self.when = when
+        self.seq = seq
+        self.func = func
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """取消任务（尚未执行时生效）"""
+        self.cancelled = True
+
+    def __lt__(self, other: 'ScheduledTask') -> bool:
+        return (self.when, self.seq) < (other.when, other.seq)
+
+
+class TimerScheduler:
+    """定时调度器（单个后台线程 + 最小堆）"""
+
+    def __init__(self, name: str = "xqclog-alert-scheduler") -> None:
+        """
+        初始化调度器
+
+        :param name: 调度线程名称
+        """
+        self.name = name
+        self._heap: List[ScheduledTask] = []
+        self._cond = threading.Condition(threading.Lock())
+        self._counter = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def call_later(self, delay: float, func: Callable[..., Any], *args: Any) -> ScheduledTask:
+        """
+        延迟执行任务（任务在调度线程中执行，应只做轻量操作，如把任务提交到线程池）
+
+        :param delay: 延迟时间（秒）
+        :param func: 要执行的函数
+        :param args: 函数参数
+        :return: 任务句柄，可用于取消
+        """
+        task = ScheduledTask(time.monotonic() + max(delay, 0), next(self._counter), func, args)
+        with self._cond:
+            heapq.heappush(self._heap, task)
+            self._ensure_started()
+            # 新任务可能比当前等待的任务更早到期
+            self._cond.notify()
+        return task
+
+    def _ensure_started(self) -> None:
+        """按需启动调度线程（需持有锁）"""
+        if self._running and self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """调度线程主循环"""
+        while True:
+            with self._cond:
+                while self._running:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0].when - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if not self._running:
+                    return
+                task = heapq.heappop(self._heap)
+
+            if task.cancelled:
+                continue
+            try:
+                task.func(*task.args)
+            except Exception as e:
+                emit("scheduler.error", f"❌ 定时任务执行异常: {e}", level="error", exc_info=True, error=str(e))
+
+    def pending(self) -> int:
+        """
+        待执行的任务数
+
+        :return: 任务数量
+        """
+        return len(self._heap)
+
+    def stop(self) -> List[ScheduledTask]:
+        """
+        停止调度线程
+
+        :return: 尚未执行（且未取消）的任务，由调用方决定立即执行还是丢弃
+        """
+        with self._cond:
+            self._running = False
+            tasks, self._heap = self._heap, []
+            self._cond.notify_all()
+        return [task for task in sorted(tasks) if not task.cancelled]
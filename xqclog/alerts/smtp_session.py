@@ -0,0 +1,250 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-22 14:00:00 UTC
+# 文件描述：可复用的SMTP会话池，保持登录状态，复用前用NOOP做健康检查
+# 文件路径：xqclog/alerts/smtp_session.py
+
+from typing import Callable, List, Optional, Sequence, Tuple
+from email.message import Message
+import smtplib
+import socket
+import threading
+import time
+
+# 连接已失效时 smtplib 可能抛出的异常（SMTPException 是 OSError 的子类，收件人被拒等服务器错误不能算作断开）
+# 只有在 DATA 命令之前出现时才重连重发：之后服务器可能已经收下了邮件，重发会导致重复
+_DISCONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+
+
+class SMTPSession:
+    """SMTP会话池（线程安全）"""
+
+    def __init__(
+            self,
+            host: str,
+            port: int,
+            user: str,
+            password: str,
+            use_ssl: bool = False,
+            use_tls: bool = False,
+            timeout: float = 10,
+            max_connections: int = 1,
+            max_idle_time: float = 300.0,
+            smtp_factory: Optional[Callable[..., smtplib.SMTP]] = None,
+    ) -> None:
+        """
+        初始化SMTP会话池
+
+        :param host: SMTP服务器地址
+        :param port: SMTP服务器端口
+        :param user: SMTP用户名
+        :param password: SMTP密码
+        :param use_ssl: 是否使用SSL
+        :param use_tls: 是否使用STARTTLS
+        :param timeout: 连接和发送超时（秒）
+        :param max_connections: 池中保留的最大空闲连接数
+        :param max_idle_time: 空闲超过该时间（秒）的连接直接丢弃，不再尝试复用
+        :param smtp_factory: 自定义连接工厂 (host, port, timeout) -> SMTP，用于连接本地测试服务器
+        """
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_ssl = use_ssl
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_connections = max(max_connections, 1)
+        self.max_idle_time = max_idle_time
+        self.smtp_factory = smtp_factory
+
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []  # (连接, 最后使用时间)
+        self._lock = threading.Lock()
+        self.connects = 0  # 新建连接次数（用于观察复用效果）
+
+    def _connect(self) -> smtplib.SMTP:
+        """
+        新建连接并登录
+
+        :return: 已登录的SMTP连接
+        """
+        if self.smtp_factory is not None:
+            smtp = self.smtp_factory(self.host, self.port, timeout=self.timeout)
+        elif self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+
+        try:
+            if self.use_tls and not self.use_ssl:
+                smtp.starttls()
+            smtp.login(self.user, self.password)
+        except Exception:
+            self._quietly_close(smtp)
+            raise
+
+        self.connects += 1
+        return smtp
+
+    @staticmethod
+    def _quietly_close(smtp: smtplib.SMTP) -> None:
+        """关闭连接，忽略错误"""
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _is_alive(smtp: smtplib.SMTP) -> bool:
+        """
+        用 NOOP 检查连接是否仍然可用
+
+        :param smtp: SMTP连接
+        :return: 是否可用
+        """
+        try:
+            return smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self) -> Tuple[smtplib.SMTP, bool]:
+        """
+        取出一个可用连接（优先复用空闲连接）
+
+        :return: (连接, 是否为复用的连接)
+        """
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                smtp, last_used = self._idle.pop()
+
+            if now - last_used <= self.max_idle_time and self._is_alive(smtp):
+                return smtp, True
+            self._quietly_close(smtp)
+
+        return self._connect(), False
+
+    def _release(self, smtp: smtplib.SMTP) -> None:
+        """
+        归还连接到池中
+
+        :param smtp: SMTP连接
+        """
+        with self._lock:
+            if len(self._idle) < self.max_connections:
+                self._idle.append((smtp, time.monotonic()))
+                return
+        self._quietly_close(smtp)
+
+    @staticmethod
+    def _send_message(smtp: smtplib.SMTP, message: Message, from_addr: str, recipients: List[str]) -> None:
+        """
+        发送一封邮件，失败时在异常的 data_started 属性中记录是否已经开始 DATA 命令
+
+        :param smtp: SMTP连接
+        :param message: 邮件消息
+        :param from_addr: 发件人地址
+        :param recipients: 收件人列表
+        """
+        data = getattr(smtp, "data", None)
+        if data is None:
+            # 自定义连接工厂返回的对象没有 data 方法时无法区分阶段，按未开始处理
+            try:
+                smtp.send_message(message, from_addr, recipients)
+            except Exception as e:
+                e.data_started = False
+                raise
+            return
+
+        own_data = vars(smtp).get("data")
+        started = False
+
+        def tracked_data(msg: bytes) -> Tuple[int, bytes]:
+            nonlocal started
+            started = True
+            return data(msg)
+
+        smtp.data = tracked_data
+        try:
+            smtp.send_message(message, from_addr, recipients)
+        except Exception as e:
+            e.data_started = started
+            raise
+        finally:
+            if own_data is None:
+                del smtp.data
+            else:
+                smtp.data = own_data
+
+    def send_many(
+            self,
+            messages: Sequence[Message],
+            from_addr: str,
+            recipients: List[str],
+            on_sent: Optional[Callable[[], None]] = None,
+    ) -> int:
+        """
+        通过同一个连接发送多封邮件，连接被服务器断开时自动重连一次
+
+        :param messages: 邮件消息列表
+        :param from_addr: 发件人地址
+        :param recipients: 收件人列表
+        :param on_sent: 每送达一封邮件后调用（中途失败时调用方据此只重发剩余的邮件）
+        :return: 发送成功的邮件数量
+        """
+        sent = 0
+        smtp, reused = self._acquire()
+        try:
+            for message in messages:
+                try:
+                    self._send_message(smtp, message, from_addr, recipients)
+                except _DISCONNECT_ERRORS as e:
+                    if not reused or e.data_started:
+                        raise
+                    # 复用的连接在健康检查之后、发送邮件内容之前被服务器断开：重连后重发当前邮件
+                    self._quietly_close(smtp)
+                    smtp, reused = self._connect(), False
+                    self._send_message(smtp, message, from_addr, recipients)
+                sent += 1
+                if on_sent is not None:
+                    on_sent()
+        except Exception:
+            self._quietly_close(smtp)
+            raise
+
+        self._release(smtp)
+        return sent
+
+    def send(self, message: Message, from_addr: str, recipients: List[str]) -> None:
+        """
+        发送一封邮件
+
+        :param message: 邮件消息
+        :param from_addr: 发件人地址
+        :param recipients: 收件人列表
+        """
+        self.send_many([message], from_addr, recipients)
+
+    def warmup(self) -> None:
+        """预先建立连接并登录（验证账号密码），连接留在池中供第一封邮件复用"""
+        smtp, _ = self._acquire()
+        self._release(smtp)
+
+    def close(self) -> None:
+        """关闭池中所有空闲连接"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            self._quietly_close(smtp)
+
+    def idle_count(self) -> int:
+        """
+        当前空闲连接数
+
+        :return: 空闲连接数
+        """
+        return len(self._idle)
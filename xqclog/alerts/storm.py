@@ -0,0 +1,230 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-26 14:00:00 UTC
+# 文件描述：告警风暴控制，告警量超过阈值时自动进入风暴模式并按级别采样，回落后带滞后地退出
+# 文件路径：xqclog/alerts/storm.py
+
+from typing import Dict, Any, Optional, Union
+from collections import deque
+import random
+import threading
+import time
+
+from .base import AlertMessage
+from .dedup import fingerprint
+
+
+class StormController:
+    """
+    告警风暴控制器（线程安全）
+
+    统计最近 window 秒内的告警量，达到 threshold 时进入风暴模式：
+        CRITICAL：全部发送
+        ERROR：每个指纹在每个汇总周期内只发送第一条
+        其他级别（WARNING 等）：按 sample_rate 随机采样
+    告警量降到 exit_threshold 以下并持续 cool_down 秒后退出风暴模式。
+    风暴期间每隔 summary_interval 秒生成一条抑制汇总。
+    """
+
+    def __init__(
+            self,
+            threshold: int = 100,
+            window: float = 60.0,
+            exit_threshold: Optional[int] = None,
+            cool_down: float = 120.0,
+            sample_rate: float = 0.1,
+            summary_interval: float = 60.0,
+            max_fingerprints: int = 1024,
+    ) -> None:
+        """
+        初始化风暴控制器
+
+        :param threshold: 最近 window 秒内的告警数达到该值时进入风暴模式
+        :param window: 统计告警量的时间窗口（秒）
+        :param exit_threshold: 告警数低于该值时开始计算退出时间，默认 threshold 的一半
+        :param cool_down: 告警量持续低于 exit_threshold 达到该时间（秒）后退出风暴模式
+        :param sample_rate: 风暴期间 WARNING 等级别告警的采样比例（0~1）
+        :param summary_interval: 风暴期间发送抑制汇总的间隔（秒），ERROR 的指纹记录也按此周期清空
+        :param max_fingerprints: 每个汇总周期内记录的 ERROR 指纹上限，超出后新指纹按 sample_rate 采样
+        """
+        if threshold <= 0 or window <= 0:
+            raise ValueError("threshold 和 window 必须大于 0")
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate 必须在 [0, 1] 之间")
+
+        self.threshold = threshold
+        self.window = window
+        self.exit_threshold = threshold // 2 if exit_threshold is None else exit_threshold
+        self.cool_down = cool_down
+        self.sample_rate = sample_rate
+        self.summary_interval = summary_interval
+        self.max_fingerprints = max_fingerprints
+
+        self._buckets: deque = deque()  # 每秒的告警数 [秒, 数量]
+        self._count = 0  # 窗口内的告警总数
+        self._active = False
+        self._started_at = 0.0
+        self._calm_since: Optional[float] = None  # 告警量开始低于退出阈值的时间
+        self._exit_pending = False  # 已退出风暴模式，结束汇总尚未生成
+        self._fingerprints: set = set()
+        self._period_start = 0.0
+        self._period_suppressed: Dict[str, int] = {}  # 本汇总周期内各级别被抑制的数量
+        self._storm_suppressed = 0  # 本次风暴累计被抑制的数量
+        self._storms = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Union[Dict[str, Any], bool, None]) -> Optional['StormController']:
+        """
+        根据配置创建风暴控制器
+
+        :param config: 风暴配置，如 {"threshold": 100, "window": 60, "sample_rate": 0.1}；None/False 表示不启用
+        :return: StormController实例或None
+        """
+        if not config:
+            return None
+        if config is True:
+            return cls()
+        if not isinstance(config, dict):
+            raise ValueError(f"storm 配置格式错误: {config}")
+        return cls(**config)
+
+    @property
+    def active(self) -> bool:
+        """是否处于风暴模式"""
+        return self._active
+
+    def _record(self, now: float) -> None:
+        """记录一条告警并淘汰窗口外的计数（需持有锁）"""
+        second = int(now)
+        if self._buckets and self._buckets[-1][0] == second:
+            self._buckets[-1][1] += 1
+        else:
+            self._buckets.append([second, 1])
+        self._count += 1
+        self._expire(now)
+
+    def _expire(self, now: float) -> None:
+        """淘汰窗口外的计数（需持有锁）"""
+        oldest = now - self.window
+        while self._buckets and self._buckets[0][0] < oldest:
+            self._count -= self._buckets.popleft()[1]
+
+    def _update_state(self, now: float) -> Optional[str]:
+        """
+        按当前告警量切换风暴模式（需持有锁）
+
+        :return: "enter"/"exit" 表示发生了切换，否则为None
+        """
+        if not self._active:
+            if self._count >= self.threshold:
+                self._active = True
+                self._started_at = now
+                self._calm_since = None
+                self._period_start = now
+                self._fingerprints.clear()
+                self._period_suppressed = {}
+                self._storm_suppressed = 0
+                self._storms += 1
+                return "enter"
+            return None
+
+        if self._count >= self.exit_threshold:
+            self._calm_since = None
+        elif self._calm_since is None:
+            self._calm_since = now
+        elif now - self._calm_since >= self.cool_down:
+            self._active = False
+            self._exit_pending = True
+            return "exit"
+        return None
+
+    def admit(self, alert_msg: AlertMessage, now: Optional[float] = None) -> bool:
+        """
+        记录一条告警并判断是否放行
+
+        :param alert_msg: 告警消息对象（调用方应已排除强制发送/强制不发送的告警）
+        :param now: 当前时间（time.monotonic()），用于测试
+        :return: 是否发送此告警
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._record(now)
+            self._update_state(now)
+            if not self._active:
+                return True
+
+            level = alert_msg.level
+            if level == "CRITICAL":
+                return True
+            if level == "ERROR":
+                fp = fingerprint(alert_msg)
+                if fp not in self._fingerprints and len(self._fingerprints) < self.max_fingerprints:
+                    self._fingerprints.add(fp)
+                    return True
+                if fp not in self._fingerprints and random.random() < self.sample_rate:
+                    return True
+            elif random.random() < self.sample_rate:
+                return True
+
+            self._period_suppressed[level] = self._period_suppressed.get(level, 0) + 1
+            self._storm_suppressed += 1
+            return False
+
+    def poll(self, now: Optional[float] = None) -> Optional[AlertMessage]:
+        """
+        周期性检查：告警停止后也能退出风暴模式，并生成风暴汇总消息（由后台维护线程调用）
+
+        :param now: 当前时间（time.monotonic()），用于测试
+        :return: 需要发送的汇总消息（强制发送），没有时返回None
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._active:
+                self._expire(now)
+                self._update_state(now)
+
+            exited = self._exit_pending
+            if exited:
+                self._exit_pending = False
+                minutes = (now - self._started_at) / 60
+                message = f"告警风暴已结束：持续 {minutes:.1f} 分钟，共抑制 {self._storm_suppressed} 条告警"
+            elif self._active and now - self._period_start >= self.summary_interval and self._period_suppressed:
+                detail = "，".join(f"{level}×{count}" for level, count in sorted(self._period_suppressed.items()))
+                message = (
+                    f"告警风暴进行中：最近 {self._count} 条/{self.window:.0f}秒，"
+                    f"本周期抑制 {sum(self._period_suppressed.values())} 条（{detail}），"
+                    f"累计抑制 {self._storm_suppressed} 条"
+                )
+            else:
+                return None
+
+            suppressed = dict(self._period_suppressed)
+            self._period_start = now
+            self._period_suppressed = {}
+            self._fingerprints.clear()
+
+        return AlertMessage(
+            level="SUCCESS" if exited else "CRITICAL",
+            message=message,
+            extra={"storm_suppressed": suppressed, "_storm": True},
+            force_send=True,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取风暴控制器状态
+
+        :return: 状态字典
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "active": self._active,
+                "recent_alerts": self._count,
+                "threshold": self.threshold,
+                "exit_threshold": self.exit_threshold,
+                "storms": self._storms,
+                "suppressed": self._storm_suppressed,
+                "period_suppressed": dict(self._period_suppressed),
+            }
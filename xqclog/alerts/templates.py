@@ -0,0 +1,324 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-25 09:00:00 UTC
+# 文件描述：告警消息模板，模板在创建时编译一次，按级别缓存静态片段，渲染时只做一次拼接
+# 文件路径：xqclog/alerts/templates.py
+
+from typing import Dict, Any, List, Optional, Callable, Iterable, Tuple, Union, TYPE_CHECKING
+from string import Formatter
+
+if TYPE_CHECKING:
+    from .base import AlertMessage
+    from .batching import AlertBatch
+
+# 各级别的emoji
+LEVEL_EMOJIS = {
+    "DEBUG": "🔍",
+    "INFO": "ℹ️",
+    "SUCCESS": "✅",
+    "WARNING": "⚠️",
+    "ERROR": "❌",
+    "CRITICAL": "🚨",
+}
+
+# 各级别的颜色（HTML）
+LEVEL_COLORS = {
+    "DEBUG": "#6c757d",
+    "INFO": "#0dcaf0",
+    "SUCCESS": "#198754",
+    "WARNING": "#ffc107",
+    "ERROR": "#dc3545",
+    "CRITICAL": "#8b0000",
+}
+
+# 只与级别有关的字段，按级别预先替换进静态片段
+LEVEL_FIELDS = ("level", "emoji", "color")
+
+# 每条告警都不同的字段
+ALERT_FIELDS = ("time", "message", "module", "function", "line", "location", "extra")
+
+# 批量摘要的字段
+BATCH_FIELDS = ("total", "first", "last", "levels", "messages")
+
+# 一个编译后的片段：(字段名, 格式说明)，字段名为 None 时格式说明即为静态文本
+_Segment = Tuple[Optional[str], str]
+
+
+def _compile(source: str, fields: Iterable[str]) -> List[_Segment]:
+    """
+    把 str.format 风格的模板解析为片段列表，相邻的静态文本合并为一段
+
+    :param source: 模板文本，如 "## {emoji} {level}级别日志告警"
+    :param fields: 允许使用的字段名
+    :return: 片段列表
+    :raises ValueError: 模板语法错误或使用了未知字段
+    """
+    allowed = set(fields)
+    segments: List[_Segment] = []
+    try:
+        parsed = list(Formatter().parse(source))
+    except ValueError as e:
+        raise ValueError(f"告警模板语法错误: {e}") from None
+
+    for literal, field, spec, conversion in parsed:
+        if literal:
+            if segments and segments[-1][0] is None:
+                segments[-1] = (None, segments[-1][1] + literal)
+            else:
+                segments.append((None, literal))
+        if field is None:
+            continue
+        if field not in allowed:
+            raise ValueError(f"告警模板使用了未知字段: {{{field}}}，可用字段: {', '.join(sorted(allowed))}")
+        if conversion:
+            raise ValueError(f"告警模板不支持转换符: {{{field}!{conversion}}}")
+        segments.append((field, spec or ""))
+    return segments
+
+
+def _bind_level(segments: List[_Segment], level: str) -> List[_Segment]:
+    """
+    把级别字段替换为静态文本，并合并相邻的静态片段
+
+    :param segments: 编译后的片段列表
+    :param level: 日志级别
+    :return: 新的片段列表
+    """
+    level_values = {
+        "level": level,
+        "emoji": LEVEL_EMOJIS.get(level, "📝"),
+        "color": LEVEL_COLORS.get(level, "#6c757d"),
+    }
+    bound: List[_Segment] = []
+    for field, text in segments:
+        if field in level_values:
+            field, text = None, format(level_values[field], text)
+        if field is None and bound and bound[-1][0] is None:
+            bound[-1] = (None, bound[-1][1] + text)
+        else:
+            bound.append((field, text))
+    return bound
+
+
+class SectionTemplate:
+    """可选段落模板（如位置信息、额外信息），没有条目时渲染为空字符串"""
+
+    def __init__(self, header: str, item: str, footer: str = "", separator: str = "") -> None:
+        """
+        初始化段落模板
+
+        :param header: 段落标题
+        :param item: 每个条目的模板，可用字段 {key}、{value} 和 {index}（从1开始的序号）
+        :param footer: 段落结尾
+        :param separator: 条目之间的分隔符
+        """
+        self.header = header
+        self.footer = footer
+        self.separator = separator
+        self._item = _compile(item, ("key", "value", "index"))
+
+    def render(self, items: Iterable[Tuple[str, Any]], escape: Optional[Callable[[str], str]] = None) -> str:
+        """
+        渲染段落
+
+        :param items: (名称, 值) 列表
+        :param escape: 值的转义函数（如 html.escape）
+        :return: 渲染结果
+        """
+        parts = []
+        for index, (key, value) in enumerate(items, 1):
+            if escape is None:
+                values = {"key": key, "value": str(value), "index": index}
+            else:
+                values = {"key": escape(str(key)), "value": escape(str(value)), "index": index}
+            if self.separator and index > 1:
+                parts.append(self.separator)
+            for field, text in self._item:
+                parts.append(text if field is None else format(values[field], text))
+        if not parts:
+            return ""
+        return self.header + "".join(parts) + self.footer
+
+
+class AlertTemplate:
+    """
+    告警消息模板
+
+    模板使用 str.format 语法，可用字段：
+        {level} {emoji} {color}：级别相关（每个级别只替换一次并缓存）
+        {time} {message} {module} {function} {line}：告警内容
+        {location} {extra}：位置信息、额外信息段落（由 SectionTemplate 渲染，没有内容时为空）
+    """
+
+    def __init__(
+            self,
+            source: str,
+            location: Optional[SectionTemplate] = None,
+            extra: Optional[SectionTemplate] = None,
+            escape: Optional[Callable[[str], str]] = None,
+            time_format: str = '%Y-%m-%d %H:%M:%S',
+    ) -> None:
+        """
+        初始化并编译模板
+
+        :param source: 模板文本
+        :param location: 位置信息段落模板
+        :param extra: 额外信息段落模板
+        :param escape: 对告警内容的转义函数（HTML 模板应传入 html.escape）
+        :param time_format: {time} 的时间格式
+        :raises ValueError: 模板语法错误或使用了未知字段
+        """
+        self.source = source
+        self.location = location
+        self.extra = extra
+        self.escape = escape
+        self.time_format = time_format
+        self._segments = _compile(source, LEVEL_FIELDS + ALERT_FIELDS)
+        self._by_level: Dict[str, List[_Segment]] = {}
+
+    @classmethod
+    def from_config(
+            cls,
+            config: Union[str, Dict[str, Any], 'AlertTemplate', None],
+            default: Optional['AlertTemplate'] = None
+    ) -> Optional['AlertTemplate']:
+        """
+        根据配置创建模板，未配置的部分沿用默认模板
+
+        :param config: 模板文本，或 {"body": ..., "location": {"header", "item", "footer"},
+                       "extra": {...}, "time_format": ...}；None 表示使用默认模板
+        :param default: 默认模板（可为None）
+        :return: 编译后的模板（未配置且没有默认模板时为None）
+        """
+        if config is None:
+            return default
+        if isinstance(config, AlertTemplate):
+            return config
+        if isinstance(config, str):
+            config = {"body": config}
+        if not isinstance(config, dict) or "body" not in config:
+            raise ValueError(f"template 配置格式错误: {config}")
+
+        def section(key: str) -> Optional[SectionTemplate]:
+            value = config.get(key)
+            if value is None:
+                return getattr(default, key, None)
+            return SectionTemplate(**value)
+
+        return cls(
+            config["body"],
+            location=section("location"),
+            extra=section("extra"),
+            escape=getattr(default, "escape", None),
+            time_format=config.get("time_format", getattr(default, "time_format", '%Y-%m-%d %H:%M:%S')),
+        )
+
+    def _segments_for(self, level: str) -> List[_Segment]:
+        """
+        获取替换好级别字段的片段（按级别缓存）
+
+        :param level: 日志级别
+        :return: 片段列表
+        """
+        segments = self._by_level.get(level)
+        if segments is None:
+            segments = self._by_level[level] = _bind_level(self._segments, level)
+        return segments
+
+    def render(self, alert_msg: 'AlertMessage') -> str:
+        """
+        渲染告警消息
+
+        :param alert_msg: 告警消息对象
+        :return: 渲染结果
+        """
+        escape = self.escape or str
+        values = {
+            "time": alert_msg.timestamp.strftime(self.time_format),
+            "message": escape(alert_msg.message),
+            "module": escape(alert_msg.module or ""),
+            "function": escape(alert_msg.function or ""),
+            "line": alert_msg.line or "",
+            "location": "",
+            "extra": "",
+        }
+        if self.location is not None:
+            values["location"] = self.location.render(
+                (
+                    (label, value) for label, value in (
+                        ("模块", alert_msg.module),
+                        ("函数", alert_msg.function),
+                        ("行号", alert_msg.line),
+                    ) if value
+                ),
+                self.escape,
+            )
+        if self.extra is not None:
+            values["extra"] = self.extra.render(
+                # 跳过内部使用的字段（以下划线开头）
+                ((key, value) for key, value in alert_msg.extra.items() if not key.startswith('_')),
+                self.escape,
+            )
+
+        return "".join(
+            text if field is None else format(values[field], text)
+            for field, text in self._segments_for(alert_msg.level)
+        )
+
+
+class BatchTemplate:
+    """
+    批量告警摘要模板，与 AlertTemplate 一样在创建时编译、按级别缓存
+
+    模板使用 str.format 语法，可用字段：
+        {level} {emoji} {color}：批次级别
+        {total}：告警总数
+        {first} {last}：首末时间
+        {levels}：级别统计段落（{key} 为级别，{value} 为数量）
+        {messages}：高频消息段落（{key} 为消息，{value} 为次数，{index} 为序号）
+    """
+
+    def __init__(
+            self,
+            source: str,
+            levels: SectionTemplate,
+            messages: SectionTemplate,
+            escape: Optional[Callable[[str], str]] = None,
+    ) -> None:
+        """
+        初始化并编译模板
+
+        :param source: 模板文本
+        :param levels: 级别统计段落模板
+        :param messages: 高频消息段落模板
+        :param escape: 对消息内容的转义函数（HTML 模板应传入 html.escape）
+        :raises ValueError: 模板语法错误或使用了未知字段
+        """
+        self.source = source
+        self.levels = levels
+        self.messages = messages
+        self.escape = escape
+        self._segments = _compile(source, LEVEL_FIELDS + BATCH_FIELDS)
+        self._by_level: Dict[str, List[_Segment]] = {}
+
+    def render(self, batch: 'AlertBatch', top_n: int = 5) -> str:
+        """
+        渲染批量摘要
+
+        :param batch: 告警批次
+        :param top_n: 高频消息条数
+        :return: 渲染结果
+        """
+        segments = self._by_level.get(batch.level)
+        if segments is None:
+            segments = self._by_level[batch.level] = _bind_level(self._segments, batch.level)
+
+        first, last = batch.time_range()
+        values = {
+            "total": batch.total,
+            "first": first,
+            "last": last,
+            "levels": self.levels.render(batch.level_summary(), self.escape),
+            "messages": self.messages.render(batch.top_messages(top_n), self.escape),
+        }
+        return "".join(text if field is None else format(values[field], text) for field, text in segments)
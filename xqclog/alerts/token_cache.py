@@ -0,0 +1,130 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-23 09:00:00 UTC
+# 文件描述：基于文件的access_token缓存，多个工作进程通过文件锁共享同一个token
+# 文件路径：xqclog/alerts/token_cache.py
+
+from typing import Dict, Any, Optional, Tuple, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+@contextmanager
+def file_lock(lock_path: Path) -> Iterator[None]:
+    """
+    跨进程文件锁（POSIX 使用 flock，Windows 使用 msvcrt.locking）
+
+    :param lock_path: 锁文件路径
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            yield
+
+
+class FileTokenCache:
+    """文件token缓存（进程间共享）"""
+
+    # 同一路径在进程内共用一把线程锁（flock 只在进程之间互斥）
+    _thread_locks: Dict[str, threading.Lock] = {}
+    _thread_locks_guard = threading.Lock()
+
+    def __init__(self, path: str) -> None:
+        """
+        初始化token缓存
+
+        :param path: 缓存文件路径（同一台机器上的工作进程应配置为同一个路径）
+        """
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        with self._thread_locks_guard:
+            self._thread_lock = self._thread_locks.setdefault(str(self.path.absolute()), threading.Lock())
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """持有跨进程锁（同时在进程内互斥）"""
+        with self._thread_lock:
+            with file_lock(self.lock_path):
+                yield
+
+    def _read_all(self) -> Dict[str, Any]:
+        """读取整个缓存文件，文件不存在或损坏时返回空字典"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_all(self, data: Dict[str, Any]) -> None:
+        """先写临时文件再原子替换，其他进程不会读到写了一半的文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self, key: str) -> Optional[Tuple[str, float]]:
+        """
+        读取缓存的token（调用方应持有 locked()）
+
+        :param key: 缓存键
+        :return: (token, 过期时间戳) 或 None
+        """
+        entry = self._read_all().get(key)
+        if not isinstance(entry, dict) or not entry.get("access_token"):
+            return None
+        return entry["access_token"], float(entry.get("expires_at", 0))
+
+    def store(self, key: str, token: str, expires_at: float) -> None:
+        """
+        写入token（调用方应持有 locked()）
+
+        :param key: 缓存键
+        :param token: access_token
+        :param expires_at: 过期时间戳（time.time()）
+        """
+        data = self._read_all()
+        data[key] = {"access_token": token, "expires_at": expires_at}
+        self._write_all(data)
+
+    def invalidate(self, key: str, token: Optional[str] = None) -> None:
+        """
+        删除缓存的token
+
+        :param key: 缓存键
+        :param token: 只有缓存中的token与之相同时才删除（避免误删其他进程刚刷新的token）
+        """
+        with self.locked():
+            data = self._read_all()
+            entry = data.get(key)
+            if entry is None or (token is not None and entry.get("access_token") != token):
+                return
+            del data[key]
+            self._write_all(data)
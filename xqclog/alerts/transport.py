@@ -0,0 +1,281 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-22 09:00:00 UTC
+# 文件描述：通知器共享的HTTP传输层（按主机复用连接池），支持注入假传输用于离线压测
+# 文件路径：xqclog/alerts/transport.py
+
+from typing import Dict, Any, Optional, List
+from urllib.parse import urlsplit
+import socket
+import threading
+import time
+
+
+class HttpTransport:
+    """共享的HTTP传输层（基于 requests.Session 连接池，线程安全）"""
+
+    def __init__(
+            self,
+            pool_connections: int = 10,
+            pool_maxsize: int = 10,
+            timeout: float = 5.0,
+            keep_alive: bool = True,
+    ) -> None:
+        """
+        初始化HTTP传输层
+
+        :param pool_connections: 缓存连接池的主机数量
+        :param pool_maxsize: 每个主机连接池的最大连接数（应不小于并发发送的线程数）
+        :param timeout: 默认请求超时（秒），调用时未指定 timeout 则使用此值
+        :param keep_alive: 是否保持长连接（关闭后每次请求都会重新握手）
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        """
+        获取（按需创建）共享的 Session
+
+        :return: requests.Session实例
+        """
+        session = self._session
+        if session is not None:
+            return session
+
+        with self._lock:
+            if self._session is None:
+                # 延迟导入，只用控制台日志的程序不需要加载 requests
+                import requests
+                from requests.adapters import HTTPAdapter
+                from http.cookiejar import DefaultCookiePolicy
+
+                session = requests.Session()
+                # 告警接口不需要cookie，禁用后多线程共享Session不会互相影响
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                if not self.keep_alive:
+                    session.headers["Connection"] = "close"
+                self._session = session
+            return self._session
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs: Any):
+        """
+        发送HTTP请求
+
+        :param method: 请求方法
+        :param url: 请求地址
+        :param timeout: 超时时间（秒），None 使用默认超时
+        :param kwargs: 传给 requests 的其他参数（json/params/headers 等）
+        :return: 响应对象（需提供 status_code 和 json()）
+        """
+        return self._get_session().request(
+            method,
+            url,
+            timeout=self.timeout if timeout is None else timeout,
+            **kwargs
+        )
+
+    def get(self, url: str, **kwargs: Any):
+        """
+        发送GET请求
+
+        :param url: 请求地址
+        :param kwargs: 请求参数
+        :return: 响应对象
+        """
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any):
+        """
+        发送POST请求
+
+        :param url: 请求地址
+        :param kwargs: 请求参数
+        :return: 响应对象
+        """
+        return self.request("POST", url, **kwargs)
+
+    @staticmethod
+    def resolve(url: str) -> None:
+        """
+        预先解析目标主机的域名（让系统DNS缓存提前生效）
+
+        :param url: 目标地址
+        """
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)
+
+    def warmup(self, url: str, timeout: Optional[float] = None) -> None:
+        """
+        预先建立到目标主机的连接（完成TLS握手）并放入连接池
+
+        只向主机根路径发送 HEAD 请求，不调用告警接口，响应状态码不影响结果。
+
+        :param url: 目标地址（只使用协议、主机和端口）
+        :param timeout: 超时时间（秒），None 使用默认超时
+        """
+        parts = urlsplit(url)
+        response = self.request("HEAD", f"{parts.scheme}://{parts.netloc}/", timeout=timeout, allow_redirects=False)
+        # 读完并关闭响应，连接才会回到连接池
+        response.close()
+
+    def close(self) -> None:
+        """关闭连接池"""
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+class FakeResponse:
+    """假响应对象（配合 FakeTransport 使用）"""
+
+    def __init__(self, status_code: int = 200, payload: Optional[Dict[str, Any]] = None) -> None:
+        """
+        初始化假响应
+
+        :param status_code: HTTP状态码
+        :param payload: json() 返回的数据，默认 {"errcode": 0}
+        """
+        self.status_code = status_code
+        self._payload = payload if payload is not None else {"errcode": 0}
+
+    def json(self) -> Dict[str, Any]:
+        """
+        获取响应数据
+
+        :return: 响应数据
+        """
+        return dict(self._payload)
+
+
+class FakeTransport:
+    """假HTTP传输层：不发出真实请求，只记录请求并返回预设响应，用于离线测试和压测"""
+
+    def __init__(
+            self,
+            status_code: int = 200,
+            payload: Optional[Dict[str, Any]] = None,
+            latency: float = 0.0,
+    ) -> None:
+        """
+        初始化假传输层
+
+        :param status_code: 返回的HTTP状态码
+        :param payload: 返回的数据，默认 {"errcode": 0}（企业微信获取token时会自动补充 access_token）
+        :param latency: 模拟的请求耗时（秒）
+        """
+        self.status_code = status_code
+        self.payload = payload
+        self.latency = latency
+        self.requests: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs: Any) -> FakeResponse:
+        """
+        记录请求并返回预设响应
+
+        :param method: 请求方法
+        :param url: 请求地址
+        :param timeout: 超时时间（忽略）
+        :param kwargs: 请求参数
+        :return: 假响应对象
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests.append({"method": method, "url": url, **kwargs})
+
+        payload = self.payload
+        if payload is None:
+            payload = {"errcode": 0, "access_token": "fake-token", "expires_in": 7200}
+        return FakeResponse(self.status_code, payload)
+
+    def get(self, url: str, **kwargs: Any) -> FakeResponse:
+        """
+        记录GET请求
+
+        :param url: 请求地址
+        :param kwargs: 请求参数
+        :return: 假响应对象
+        """
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> FakeResponse:
+        """
+        记录POST请求
+
+        :param url: 请求地址
+        :param kwargs: 请求参数
+        :return: 假响应对象
+        """
+        return self.request("POST", url, **kwargs)
+
+    def resolve(self, url: str) -> None:
+        """
+        不做真实的域名解析
+
+        :param url: 目标地址
+        """
+
+    def warmup(self, url: str, timeout: Optional[float] = None) -> None:
+        """
+        记录预热请求
+
+        :param url: 目标地址
+        :param timeout: 超时时间（忽略）
+        """
+        self.request("HEAD", url)
+
+    def close(self) -> None:
+        """无需释放资源"""
+
+
+# 全局共享的传输层
+_transport: Any = HttpTransport()
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Any:
+    """
+    获取全局HTTP传输层
+
+    :return: 传输层实例
+    """
+    return _transport
+
+
+def set_transport(transport: Any) -> Any:
+    """
+    替换全局HTTP传输层（如注入 FakeTransport 进行离线压测）
+
+    :param transport: 新的传输层，需提供 get/post/request/close 方法
+    :return: 被替换的旧传输层
+    """
+    global _transport
+    with _transport_lock:
+        old, _transport = _transport, transport
+    return old
+
+
+def configure_transport(**options: Any) -> HttpTransport:
+    """
+    按配置重建全局HTTP传输层
+
+    :param options: HttpTransport 的构造参数（pool_connections/pool_maxsize/timeout/keep_alive）
+    :return: 新的传输层实例
+    """
+    transport = HttpTransport(**options)
+    old = set_transport(transport)
+    old.close()
+    return transport
@@ -4,16 +4,43 @@
 # 文件描述：企业微信应用消息告警通知器
 # 文件路径：xqclog/alerts/weixin_app.py
 
-import requests
+import threading
 import time
-from typing import Any, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from .base import BaseNotifier, AlertMessage
+from .batching import AlertBatch
+from .token_cache import FileTokenCache
+from .templates import AlertTemplate, BatchTemplate, SectionTemplate
+
+# access_token 无效或过期时企业微信返回的错误码
+_TOKEN_INVALID_ERRCODES = (40001, 40014, 42001)
 
 
 class WeixinAppNotifier(BaseNotifier):
     """企业微信应用消息通知器"""
 
+    # 企业微信应用消息对同一成员每分钟最多30条
+    default_rate_limit = {"rate": 30, "per": 60}
+
+    default_template = AlertTemplate(
+        "## {level}级别日志告警\n\n"
+        "**时间**: {time}\n"
+        "**消息**: {message}\n"
+        "{location}{extra}",
+        location=SectionTemplate("\n### 位置信息\n", "- {key}: `{value}`\n"),
+        extra=SectionTemplate("\n### 额外信息\n", "- {key}: {value}\n"),
+    )
+
+    # 批量摘要Markdown模板
+    default_batch_template = BatchTemplate(
+        "## 告警汇总：共 {total} 条\n\n"
+        "**时间范围**: {first} ~ {last}\n"
+        "{levels}{messages}",
+        levels=SectionTemplate("\n### 级别统计\n", "- {key}: `{value}` 条\n"),
+        messages=SectionTemplate("\n### 高频消息\n", "{index}. ({value}次) {key}\n"),
+    )
+
     def __init__(self, **config: Any) -> None:
         """
         初始化企业微信应用通知器
@@ -26,10 +53,15 @@ class WeixinAppNotifier(BaseNotifier):
             - toparty: 接收消息的部门ID列表，用|分隔（可选）
             - totag: 接收消息的标签ID列表，用|分隔（可选）
             - enabled: 是否启用（可选，默认True）
+            - name: 通知器名称（可选，默认为类型名，路由和静默规则按名称引用）
             - alert_levels: 触发告警的级别列表（可选）
             - timeout: 请求超时时间（可选，默认5秒）
+            - rate_limit: 限流配置（可选，默认30条/分钟，False 表示关闭）
+            - token_refresh_ahead: 在token过期前多少秒开始后台刷新（可选，默认300秒）
+            - token_cache_file: 跨进程共享的token缓存文件路径（可选，多worker部署时配置为同一路径）
+            - template: 自定义Markdown模板（可选）
         """
-        super().__init__("weixin_app", **config)
+        super().__init__(config.pop("name", None) or "weixin_app", **config)
 
         self.corpid = config.get("corpid")
         self.corpsecret = config.get("corpsecret")
@@ -43,20 +75,98 @@ class WeixinAppNotifier(BaseNotifier):
         self.totag = config.get("totag", "")
         self.timeout = config.get("timeout", 5)
 
-        # access_token缓存
+        # access_token缓存（_token_expire_time 为墙钟时间，便于跨进程共享）
         self._access_token: Optional[str] = None
         self._token_expire_time: float = 0
+        self._token_lock = threading.Lock()  # 进程内单飞：同一时间只有一个线程去获取token
+        self._token_refreshing = False
+        self.token_refresh_ahead = config.get("token_refresh_ahead", 300)
+
+        token_cache_file = config.get("token_cache_file")
+        self._token_cache = FileTokenCache(token_cache_file) if token_cache_file else None
+        self._token_cache_key = f"{self.corpid}:{self.agentid}"
 
     def _get_access_token(self) -> Optional[str]:
         """
-        获取access_token（带缓存）
+        获取access_token（带缓存，快过期时在后台提前刷新）
 
         :return: access_token或None
         """
-        # 检查缓存
-        if self._access_token and time.time() < self._token_expire_time:
+        token, expire_time = self._access_token, self._token_expire_time
+        now = time.time()
+        if token and now < expire_time:
+            if now >= expire_time - self.token_refresh_ahead:
+                self._schedule_token_refresh()
+            return token
+
+        return self._refresh_access_token(min_remaining=0)
+
+    def _schedule_token_refresh(self) -> None:
+        """启动后台线程提前刷新token（已有刷新任务时不重复启动）"""
+        if self._token_refreshing:
+            return
+        self._token_refreshing = True
+
+        def refresh() -> None:
+            try:
+                self._refresh_access_token(min_remaining=self.token_refresh_ahead)
+            finally:
+                self._token_refreshing = False
+
+        threading.Thread(target=refresh, name="xqclog-weixin-token", daemon=True).start()
+
+    def _refresh_access_token(self, min_remaining: float) -> Optional[str]:
+        """
+        刷新access_token：进程内单飞，配置了缓存文件时进程间也只有一个去请求
+
+        :param min_remaining: 现有token剩余有效期不少于该秒数时直接复用
+        :return: access_token或None
+        """
+        with self._token_lock:
+            # 等锁期间可能已经被其他线程刷新
+            if self._access_token and time.time() < self._token_expire_time - min_remaining:
+                return self._access_token
+
+            if self._token_cache is None:
+                fetched = self._fetch_access_token()
+            else:
+                with self._token_cache.locked():
+                    cached = self._token_cache.load(self._token_cache_key)
+                    if cached and time.time() < cached[1] - min_remaining:
+                        fetched = cached
+                    else:
+                        fetched = self._fetch_access_token()
+                        if fetched:
+                            self._token_cache.store(self._token_cache_key, *fetched)
+
+            if fetched is None:
+                # 刷新失败时，未过期的旧token仍然可用
+                if self._access_token and time.time() < self._token_expire_time:
+                    return self._access_token
+                return None
+
+            self._access_token, self._token_expire_time = fetched
             return self._access_token
 
+    def _invalidate_access_token(self, token: str) -> None:
+        """
+        作废服务端判定无效的token，下次发送时重新获取
+
+        :param token: 无效的token
+        """
+        with self._token_lock:
+            if self._access_token == token:
+                self._access_token = None
+                self._token_expire_time = 0
+        if self._token_cache is not None:
+            self._token_cache.invalidate(self._token_cache_key, token)
+
+    def _fetch_access_token(self) -> Optional[Tuple[str, float]]:
+        """
+        请求企业微信接口获取新的access_token
+
+        :return: (access_token, 过期时间戳) 或 None
+        """
         try:
             # 获取新的access_token
             url = "https://qyapi.weixin.qq.com/cgi-bin/gettoken"
@@ -65,30 +175,50 @@ class WeixinAppNotifier(BaseNotifier):
                 "corpsecret": self.corpsecret,
             }
 
-            response = requests.get(url, params=params, timeout=self.timeout)
+            response = self.http.get(url, params=params, timeout=self.timeout)
 
             if response.status_code == 200:
                 result = response.json()
                 if result.get("errcode") == 0:
-                    self._access_token = result.get("access_token")
                     # 提前5分钟过期
                     expires_in = result.get("expires_in", 7200)
-                    self._token_expire_time = time.time() + expires_in - 300
-                    print(f"✅ 获取企业微信access_token成功")
-                    return self._access_token
+                    self._emit("token.fetched", "✅ 获取企业微信access_token成功")
+                    return result.get("access_token"), time.time() + expires_in - 300
                 else:
-                    print(f"❌ 获取企业微信access_token失败: {result.get('errmsg')}")
+                    self._emit(
+                        "token.failed",
+                        f"❌ 获取企业微信access_token失败: {result.get('errmsg')}",
+                        level="error",
+                        errcode=result.get("errcode"),
+                    )
                     return None
             else:
-                print(f"❌ 获取企业微信access_token失败: HTTP {response.status_code}")
+                self._emit(
+                    "token.failed",
+                    f"❌ 获取企业微信access_token失败: HTTP {response.status_code}",
+                    level="error",
+                    status_code=response.status_code,
+                )
                 return None
 
         except Exception as e:
-            print(f"❌ 获取企业微信access_token异常: {e}")
-            import traceback
-            traceback.print_exc()
+            self._emit("token.error", f"❌ 获取企业微信access_token异常: {e}", level="error", exc_info=True, error=str(e))
             return None
 
+    def warmup(self, steps: Dict[str, float]) -> None:
+        """
+        预热：解析域名、建立连接并提前获取access_token
+
+        :param steps: 各步骤耗时
+        """
+        self._warmup_http(steps, "https://qyapi.weixin.qq.com/cgi-bin/gettoken", timeout=self.timeout)
+
+        def fetch_token() -> None:
+            if self._refresh_access_token(min_remaining=self.token_refresh_ahead) is None:
+                raise RuntimeError("获取access_token失败")
+
+        self._warmup_step(steps, "token", fetch_token)
+
     def send(self, alert_msg: AlertMessage) -> bool:
         """
         发送企业微信应用消息
@@ -102,57 +232,79 @@ class WeixinAppNotifier(BaseNotifier):
             if not access_token:
                 return False
 
-            # 构造markdown消息内容
-            content = f"## {alert_msg.level}级别日志告警\n\n"
-            content += f"**时间**: {alert_msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            content += f"**消息**: {alert_msg.message}\n"
-
-            if alert_msg.module or alert_msg.function or alert_msg.line:
-                content += "\n### 位置信息\n"
-                if alert_msg.module:
-                    content += f"- 模块: `{alert_msg.module}`\n"
-                if alert_msg.function:
-                    content += f"- 函数: `{alert_msg.function}`\n"
-                if alert_msg.line:
-                    content += f"- 行号: `{alert_msg.line}`\n"
-
-            if alert_msg.extra:
-                content += "\n### 额外信息\n"
-                for key, value in alert_msg.extra.items():
-                    if key.startswith('_'):
-                        continue
-                    content += f"- {key}: {value}\n"
-
-            # 构造请求数据（使用markdown消息）
-            data = {
-                "touser": self.touser,
-                "toparty": self.toparty,
-                "totag": self.totag,
-                "msgtype": "markdown",
-                "agentid": self.agentid,
-                "markdown": {
-                    "content": content
-                }
+            return self._post_markdown(
+                access_token,
+                self.template.render(alert_msg),
+                f"{alert_msg.level} - {alert_msg.message[:50]}",
+            )
+
+        except Exception as e:
+            self._emit("notifier.error", f"❌ 企业微信应用消息发送异常: {e}", level="error", exc_info=True, error=str(e))
+            return False
+
+    def send_batch(self, batch: AlertBatch) -> bool:
+        """
+        发送批量告警摘要
+
+        :param batch: 告警批次
+        :return: 是否发送成功
+        """
+        try:
+            access_token = self._get_access_token()
+            if not access_token:
+                return False
+            return self._post_markdown(access_token, self.format_batch(batch), f"告警汇总（{batch.total} 条）")
+        except Exception as e:
+            self._emit("notifier.error", f"❌ 企业微信应用消息发送异常: {e}", level="error", exc_info=True, error=str(e))
+            return False
+
+    def _post_markdown(self, access_token: str, content: str, summary: str) -> bool:
+        """
+        发送Markdown应用消息
+
+        :param access_token: access_token
+        :param content: Markdown内容
+        :param summary: 用于输出日志的简短描述
+        :return: 是否发送成功
+        """
+        # 构造请求数据（使用markdown消息）
+        data = {
+            "touser": self.touser,
+            "toparty": self.toparty,
+            "totag": self.totag,
+            "msgtype": "markdown",
+            "agentid": self.agentid,
+            "markdown": {
+                "content": content
             }
+        }
 
-            # 发送请求
-            url = f"https://qyapi.weixin.qq.com/cgi-bin/message/send?access_token={access_token}"
-            response = requests.post(url, json=data, timeout=self.timeout)
+        # 发送请求
+        url = f"https://qyapi.weixin.qq.com/cgi-bin/message/send?access_token={access_token}"
+        response = self.http.post(url, json=data, timeout=self.timeout)
 
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("errcode") == 0:
-                    print(f"✅ 企业微信应用消息发送成功: {alert_msg.level} - {alert_msg.message[:50]}")
-                    return True
-                else:
-                    print(f"❌ 企业微信应用消息发送失败: {result.get('errmsg')}")
-                    return False
+        if response.status_code == 200:
+            result = response.json()
+            if result.get("errcode") == 0:
+                self._emit("notifier.sent", f"✅ 企业微信应用消息发送成功: {summary}", summary=summary)
+                return True
             else:
-                print(f"❌ 企业微信应用消息发送失败: HTTP {response.status_code}")
+                if result.get("errcode") in _TOKEN_INVALID_ERRCODES:
+                    self._invalidate_access_token(access_token)
+                self._emit(
+                    "notifier.failed",
+                    f"❌ 企业微信应用消息发送失败: {result.get('errmsg')}",
+                    level="error",
+                    summary=summary,
+                    errcode=result.get("errcode"),
+                )
                 return False
-
-        except Exception as e:
-            print(f"❌ 企业微信应用消息发送异常: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
\ No newline at end of file
+        else:
+            self._emit(
+                "notifier.failed",
+                f"❌ 企业微信应用消息发送失败: HTTP {response.status_code}",
+                level="error",
+                summary=summary,
+                status_code=response.status_code,
+            )
+            return False
@@ -4,15 +4,37 @@
 # 文件描述：企业微信群机器人Webhook告警通知器
 # 文件路径：xqclog/alerts/weixin_webhook.py
 
-import requests
-from typing import Any
+from typing import Any, Dict
 
 from .base import BaseNotifier, AlertMessage
+from .batching import AlertBatch
+from .templates import AlertTemplate, BatchTemplate, SectionTemplate
 
 
 class WeixinWebhookNotifier(BaseNotifier):
     """企业微信群机器人Webhook通知器"""
 
+    # 企业微信群机器人限制每分钟最多发送20条消息
+    default_rate_limit = {"rate": 20, "per": 60}
+
+    default_template = AlertTemplate(
+        "## {emoji} <font color=\"warning\">{level}级别日志告警</font>\n"
+        ">时间: {time}\n"
+        ">消息: <font color=\"comment\">{message}</font>\n"
+        "{location}{extra}",
+        location=SectionTemplate("\n**位置信息**\n", ">{key}: {value}\n"),
+        extra=SectionTemplate("\n**额外信息**\n", ">{key}: {value}\n"),
+    )
+
+    # 批量摘要Markdown模板
+    default_batch_template = BatchTemplate(
+        "## 🚨 <font color=\"warning\">告警汇总：共 {total} 条</font>\n"
+        ">时间范围: {first} ~ {last}\n"
+        "{levels}{messages}",
+        levels=SectionTemplate("\n**级别统计**\n", ">{key}: <font color=\"warning\">{value}</font> 条\n"),
+        messages=SectionTemplate("\n**高频消息**\n", ">{index}. ({value}次) <font color=\"comment\">{key}</font>\n"),
+    )
+
     def __init__(self, **config: Any) -> None:
         """
         初始化企业微信Webhook通知器
@@ -22,10 +44,13 @@ class WeixinWebhookNotifier(BaseNotifier):
             - mentioned_list: @的成员ID列表（可选）
             - mentioned_mobile_list: @的手机号列表（可选）
             - enabled: 是否启用（可选，默认True）
+            - name: 通知器名称（可选，默认为类型名，路由和静默规则按名称引用）
             - alert_levels: 触发告警的级别列表（可选）
             - timeout: 请求超时时间（可选，默认5秒）
+            - rate_limit: 限流配置（可选，默认20条/分钟，False 表示关闭）
+            - template: 自定义Markdown模板（可选）
         """
-        super().__init__("weixin_webhook", **config)
+        super().__init__(config.pop("name", None) or "weixin_webhook", **config)
 
         self.webhook = config.get("webhook")
         if not self.webhook:
@@ -35,6 +60,14 @@ class WeixinWebhookNotifier(BaseNotifier):
         self.mentioned_mobile_list = config.get("mentioned_mobile_list", [])
         self.timeout = config.get("timeout", 5)
 
+    def warmup(self, steps: Dict[str, float]) -> None:
+        """
+        预热：解析域名并建立到企业微信Webhook接口的连接
+
+        :param steps: 各步骤耗时
+        """
+        self._warmup_http(steps, self.webhook, timeout=self.timeout)
+
     def send(self, alert_msg: AlertMessage) -> bool:
         """
         发送企业微信Webhook通知
@@ -45,69 +78,73 @@ class WeixinWebhookNotifier(BaseNotifier):
         # ✅ 删除 should_send 检查
 
         try:
-            # 根据级别设置emoji
-            level_emojis = {
-                "DEBUG": "🔍",
-                "INFO": "ℹ️",
-                "SUCCESS": "✅",
-                "WARNING": "⚠️",
-                "ERROR": "❌",
-                "CRITICAL": "🚨",
-            }
-            emoji = level_emojis.get(alert_msg.level, "📝")
-
-            # 构造Markdown消息
-            content = f"## {emoji} <font color=\"warning\">{alert_msg.level}级别日志告警</font>\n"
-            content += f">时间: {alert_msg.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            content += f">消息: <font color=\"comment\">{alert_msg.message}</font>\n"
-
-            if alert_msg.module or alert_msg.function or alert_msg.line:
-                content += "\n**位置信息**\n"
-                if alert_msg.module:
-                    content += f">模块: {alert_msg.module}\n"
-                if alert_msg.function:
-                    content += f">函数: {alert_msg.function}\n"
-                if alert_msg.line:
-                    content += f">行号: {alert_msg.line}\n"
-
-            if alert_msg.extra:
-                content += "\n**额外信息**\n"
-                for key, value in alert_msg.extra.items():
-                    if key.startswith('_'):
-                        continue
-                    content += f">{key}: {value}\n"
-
-            # 构造请求数据
-            data = {
-                "msgtype": "markdown",
-                "markdown": {
-                    "content": content,
-                    "mentioned_list": self.mentioned_list,
-                    "mentioned_mobile_list": self.mentioned_mobile_list,
-                }
-            }
-
-            # 发送请求
-            response = requests.post(
-                self.webhook,
-                json=data,
-                timeout=self.timeout
+            return self._post_markdown(
+                self.template.render(alert_msg),
+                f"{alert_msg.level} - {alert_msg.message[:50]}",
             )
 
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("errcode") == 0:
-                    print(f"✅ 企业微信Webhook通知发送成功: {alert_msg.level} - {alert_msg.message[:50]}")
-                    return True
-                else:
-                    print(f"❌ 企业微信Webhook通知发送失败: {result.get('errmsg')}")
-                    return False
-            else:
-                print(f"❌ 企业微信Webhook通知发送失败: HTTP {response.status_code}")
-                return False
+        except Exception as e:
+            self._emit("notifier.error", f"❌ 企业微信Webhook通知发送异常: {e}", level="error", exc_info=True, error=str(e))
+            return False
+
+    def send_batch(self, batch: AlertBatch) -> bool:
+        """
+        发送批量告警摘要
 
+        :param batch: 告警批次
+        :return: 是否发送成功
+        """
+        try:
+            return self._post_markdown(self.format_batch(batch), f"告警汇总（{batch.total} 条）")
         except Exception as e:
-            print(f"❌ 企业微信Webhook通知发送异常: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
\ No newline at end of file
+            self._emit("notifier.error", f"❌ 企业微信Webhook通知发送异常: {e}", level="error", exc_info=True, error=str(e))
+            return False
+
+    def _post_markdown(self, content: str, summary: str) -> bool:
+        """
+        发送Markdown消息到企业微信群机器人
+
+        :param content: Markdown内容
+        :param summary: 用于输出日志的简短描述
+        :return: 是否发送成功
+        """
+        # 构造请求数据
+        data = {
+            "msgtype": "markdown",
+            "markdown": {
+                "content": content,
+                "mentioned_list": self.mentioned_list,
+                "mentioned_mobile_list": self.mentioned_mobile_list,
+            }
+        }
+
+        # 发送请求
+        response = self.http.post(
+            self.webhook,
+            json=data,
+            timeout=self.timeout
+        )
+
+        if response.status_code == 200:
+            result = response.json()
+            if result.get("errcode") == 0:
+                self._emit("notifier.sent", f"✅ 企业微信Webhook通知发送成功: {summary}", summary=summary)
+                return True
+            else:
+                self._emit(
+                    "notifier.failed",
+                    f"❌ 企业微信Webhook通知发送失败: {result.get('errmsg')}",
+                    level="error",
+                    summary=summary,
+                    errcode=result.get("errcode"),
+                )
+                return False
+        else:
+            self._emit(
+                "notifier.failed",
+                f"❌ 企业微信Webhook通知发送失败: HTTP {response.status_code}",
+                level="error",
+                summary=summary,
+                status_code=response.status_code,
+            )
+            return False
@@ -0,0 +1,61 @@
+# 作者：Xiaoqiang
+# 微信公众号：XiaoqiangClub
+# 创建时间：2025-11-28 09:00:00 UTC
+# 文件描述：告警子进程入口（alert_backend="process"），从标准输入读取配置和告警记录并发送
+# 文件路径：xqclog/alerts/worker.py
+
+import json
+import signal
+import sys
+
+from .events import emit
+from .manager import get_alert_manager
+from .process_backend import decode_record
+
+
+def main() -> None:
+    """
+    子进程主循环
+
+    标准输入的第一行是配置 {"config": LogConfig.to_dict(), "custom_notifiers": {名称: "模块:类名"}}，
+    之后每行一条告警记录（见 encode_record）。标准输入关闭（父进程停止后端或已退出）时发送完剩余告警后退出。
+    """
+    from ..config import LogConfig
+    from ..logger import init_logger
+
+    # 终端的 Ctrl+C 会发给整个进程组：子进程忽略 SIGINT，由父进程关闭管道来通知退出，
+    # 保证父进程排空时写入的告警都能被读到
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    stdin = sys.stdin.buffer
+    handshake = stdin.readline()
+    if not handshake:
+        return
+    payload = json.loads(handshake)
+
+    manager = get_alert_manager()
+    for name, reference in payload.get("custom_notifiers", {}).items():
+        manager.register_custom_notifier(name, reference)
+
+    config = LogConfig.from_dict(payload["config"])
+    # 子进程只负责发送告警：不写日志文件（由父进程负责），控制台只输出警告和错误，
+    # 在进程内异步派发，读取管道不会被发送阻塞；子进程自己的日志不转为告警，避免发送失败的日志再触发告警
+    config.alert_backend = "thread"
+    config.alert_sink = False
+    config.alert_async = True
+    config.file_output = False
+    config.log_level = "WARNING"
+    init_logger(config, silent=True)
+
+    for data in stdin:
+        try:
+            manager.submit_alert(**decode_record(data))
+        except Exception as e:
+            emit("worker.error", f"❌ 告警子进程处理记录失败: {e}", level="error", exc_info=True, error=str(e))
+
+    # 在 alert_drain_timeout 内发送剩余告警（CRITICAL 优先），其余写入发件箱
+    manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,6 @@
 
 from typing import Optional, Dict, Any, Union, List
 from pathlib import Path
-import yaml
 import json
 
 
@@ -96,7 +95,36 @@ class LogConfig:
             alert_strategy: str = "parallel",  # 新增：发送策略
             alert_retry: int = 3,  # 新增：重试次数
             alert_retry_delay: float = 1.0,  # 新增：重试延迟（秒）
+            alert_retry_max_delay: float = 30.0,  # 单次重试等待上限（秒）
+            alert_deadline: float = 60.0,  # 单条告警（含重试）的总期限（秒）
             alert_timeout: float = 5.0,  # 新增：发送超时（秒）
+            alert_dispatch_timeout: Optional[float] = None,  # 单条告警等待发送结果的期限（秒）
+            alert_hedge_delay: float = 1.0,  # hedged 策略的初始对冲等待时间（秒）
+            alert_async: bool = False,  # 是否异步派发告警
+            alert_backend: str = "thread",  # 告警发送后端（thread/process）
+            alert_sink: bool = True,  # 是否把达到告警级别的日志自动转为告警
+            alert_queue_size: int = 1000,  # 异步派发队列容量
+            alert_overflow: str = "drop_oldest",  # 队列满时的策略
+            alert_block_timeout: float = 0.1,  # block 策略下的最长等待（秒）
+            alert_queue_aging: float = 5.0,  # 排队告警每等待多少秒提升一个级别
+            alert_dedup: bool = False,  # 是否启用告警去重
+            alert_dedup_window: float = 300.0,  # 去重抑制窗口（秒）
+            alert_dedup_max_entries: int = 1024,  # 去重指纹表容量
+            alert_coordination: Optional[str] = None,  # 多进程共享去重/限流状态的文件路径
+            alert_storm: Union[bool, Dict[str, Any]] = False,  # 告警风暴控制
+            alert_routes: Optional[List[Dict[str, Any]]] = None,  # 告警路由规则
+            alert_silences: Optional[List[Dict[str, Any]]] = None,  # 告警静默规则
+            alert_batch_window: float = 0.0,  # 批量合并窗口（秒），0 表示不合并
+            alert_max_batch_size: int = 100,  # 单个批次最大告警数
+            alert_http: Optional[Dict[str, Any]] = None,  # 共享HTTP连接池配置
+            alert_outbox: Optional[str] = None,  # 持久化发件箱文件路径，None 表示不启用
+            alert_outbox_fsync: str = "interval",  # 发件箱 fsync 策略
+            alert_events: bool = True,  # 是否输出告警管道事件
+            alert_drain_timeout: float = 3.0,  # 退出时排空待发送告警的期限（秒）
+            alert_drain_signals: bool = True,  # 收到 SIGTERM 时是否先排空再退出
+            alert_warmup: bool = False,  # 初始化后是否在后台预热通知器
+            alert_metrics_file: Optional[str] = None,  # Prometheus 指标文件路径
+            alert_metrics_interval: float = 15.0,  # 指标文件写入间隔（秒）
             # 向后兼容（旧版配置）
             alert_webhook: Optional[str] = None,
             alert_levels: Optional[List[str]] = None,
@@ -122,10 +150,66 @@ class LogConfig:
         :param auto_split: 是否按日志级别自动分割文件
         :param notifiers: 通知器配置列表
         :param alert_strategy: 告警发送策略（parallel-并行发送全部, sequential-顺序发送全部,
-                               failover-轮询发送直到成功, priority-按优先级发送）
+                               failover-轮询发送直到成功, priority-按优先级发送,
+                               hedged-按优先级发送，当前渠道超过其p95耗时未响应时提前启动下一个渠道）
         :param alert_retry: 单个通知器发送失败时的重试次数
-        :param alert_retry_delay: 重试延迟时间（秒）
+        :param alert_retry_delay: 重试退避的基础延迟（秒），第N次重试在 [0, alert_retry_delay * 2^(N-1)] 内随机等待
+        :param alert_retry_max_delay: 单次重试等待时间的上限（秒）
+        :param alert_deadline: 单条告警（含全部重试）的总期限（秒），超过后放弃重试
         :param alert_timeout: 单个通知器发送超时时间（秒）
+        :param alert_dispatch_timeout: 单条告警等待全部通知器发送结果的期限（秒），超过期限仍未完成的通知器
+                                       在结果中标记为超时（发送在后台继续）；None 表示 alert_timeout * 2
+        :param alert_hedge_delay: hedged 策略中，通知器耗时样本不足（少于5次成功发送）时等待多久再启动下一个渠道（秒）
+        :param alert_async: 是否异步派发告警（日志调用只入队，由后台线程按策略发送）
+        :param alert_backend: 告警发送后端（thread-在当前进程的后台线程中发送, process-在受监督的子进程中发送，
+                              当前进程只把告警记录写入管道，渲染、发送和重试不占用应用进程的GIL；
+                              要求通知器配置可以序列化为 JSON，自定义通知器必须定义在可导入的模块中）
+        :param alert_sink: 是否把达到告警级别的日志自动转为告警，False 时只配置告警管理器，
+                           告警需通过 AlertManager.send_alert/submit_alert 手动发送
+        :param alert_queue_size: 异步派发队列容量（process 后端下为等待写入子进程的队列容量）
+        :param alert_overflow: 队列满时的策略（drop_oldest-丢弃最旧, drop_newest-丢弃最新,
+                               block-限时阻塞，超时后丢弃）
+        :param alert_block_timeout: block 策略下日志调用最长等待时间（秒）
+        :param alert_queue_aging: 派发队列和各通知器线程池中排队的告警按级别优先处理（CRITICAL 越过积压的 WARNING，
+                                  队列满时先挤出最低级别的告警），每等待多少秒提升一个级别，避免低级别一直得不到处理
+                                  （CRITICAL 不受老化影响，总是最先处理）；0 表示严格按级别
+        :param alert_dedup: 是否启用告警去重（按 模块+函数+行号+归一化消息 计算指纹）
+        :param alert_dedup_window: 去重抑制窗口（秒），窗口内同一指纹只发送一次，之后补发重复次数汇总
+        :param alert_dedup_max_entries: 去重指纹表的最大条目数（超出后按LRU淘汰）
+        :param alert_coordination: 多进程共享表文件路径（如 "/tmp/xqclog-alerts.shm"），gunicorn 等多worker部署时
+                                   各进程配置为同一路径，同一指纹在去重窗口内只由一个进程发送，限流配额也由所有进程共用；
+                                   None 表示各进程独立
+        :param alert_storm: 告警风暴控制，True 使用默认参数（60秒内超过100条进入风暴模式），或
+                            {"threshold": 100, "window": 60, "exit_threshold": 50, "cool_down": 120,
+                            "sample_rate": 0.1, "summary_interval": 60}；风暴期间 CRITICAL 全部发送、ERROR 按指纹
+                            只发第一条、WARNING 等按比例采样，alert=True 的日志总是发送
+        :param alert_routes: 告警路由规则列表，按级别（levels）、模块前缀（modules）、extra 字段（extra）匹配，
+                             命中后只发送到规则中的通知器（notifiers，按通知器的 name 引用），如
+                             [{"levels": ["CRITICAL"], "modules": "app.payment", "notifiers": ["pay_dingtalk"]}]；
+                             按顺序匹配第一条，配置 "continue": True 时继续匹配，没有命中的告警发送到所有通知器
+        :param alert_silences: 告警静默规则列表，匹配条件与路由规则相同，另加时间窗口 start/end
+                               （"23:00" 每天重复，可配 weekdays；"2025-12-01 02:00" 为一次性窗口），如
+                               [{"start": "23:00", "end": "07:00", "levels": ["WARNING"], "notifiers": ["email"]}]；
+                               窗口内命中的告警不发送到规则中的通知器（未配置 notifiers 时为全部），alert=True 不受影响
+        :param alert_batch_window: 批量合并窗口（秒），窗口内的告警合并为一条摘要发送（0 表示不合并）
+        :param alert_max_batch_size: 单个批次的最大告警数，达到后立即发送摘要
+        :param alert_http: Webhook通知器共享的HTTP连接池配置，如
+                           {"pool_connections": 10, "pool_maxsize": 10, "timeout": 5.0, "keep_alive": True}
+        :param alert_outbox: 持久化发件箱文件路径（如 "logs/alerts.outbox"），未送达的告警在进程重启后
+                             由 init_logger 补发；None 表示不启用
+        :param alert_outbox_fsync: 发件箱的 fsync 策略（always-每批写入后同步, interval-每秒同步一次,
+                                   never-交给操作系统）
+        :param alert_events: 是否输出告警管道事件（发送成功/失败、获取token等），False 表示关闭控制台输出，
+                             也可以用 xqclog.alerts.set_event_handler 接入自己的处理函数
+        :param alert_drain_timeout: 进程退出（或 shutdown()）时排空待发送告警的期限（秒），期限内按级别从高到低发送
+                                    （CRITICAL 优先），剩余的写入发件箱（配置了 alert_outbox 时）或丢弃，并输出排空报告
+        :param alert_drain_signals: 收到 SIGTERM 时是否转为正常退出，使 kill、docker stop 等终止进程时也会排空
+                                    （只在 SIGTERM 仍为默认处理方式时生效，不覆盖应用自己的信号处理）
+        :param alert_metrics_file: Prometheus 文本格式指标文件路径（供 node_exporter textfile collector 采集），
+                                   None 表示不写文件（仍可通过 AlertManager.get_stats() 获取）
+        :param alert_metrics_interval: 指标文件的写入间隔（秒）
+        :param alert_warmup: 初始化后是否在后台预热通知器（解析域名、建立连接、获取token、验证SMTP登录），
+                             不阻塞程序启动，结果可通过 AlertManager.get_warmup_report() 查看
         :param alert_webhook: 旧版告警webhook地址（向后兼容）
         :param alert_levels: 旧版触发告警的日志级别列表（向后兼容）
 
@@ -159,7 +243,36 @@ class LogConfig:
         self.alert_strategy = alert_strategy
         self.alert_retry = alert_retry
         self.alert_retry_delay = alert_retry_delay
+        self.alert_retry_max_delay = alert_retry_max_delay
+        self.alert_deadline = alert_deadline
         self.alert_timeout = alert_timeout
+        self.alert_dispatch_timeout = alert_dispatch_timeout
+        self.alert_hedge_delay = alert_hedge_delay
+        self.alert_async = alert_async
+        self.alert_backend = alert_backend
+        self.alert_sink = alert_sink
+        self.alert_queue_size = alert_queue_size
+        self.alert_overflow = alert_overflow
+        self.alert_block_timeout = alert_block_timeout
+        self.alert_queue_aging = alert_queue_aging
+        self.alert_dedup = alert_dedup
+        self.alert_dedup_window = alert_dedup_window
+        self.alert_dedup_max_entries = alert_dedup_max_entries
+        self.alert_coordination = alert_coordination
+        self.alert_storm = alert_storm
+        self.alert_routes = alert_routes
+        self.alert_silences = alert_silences
+        self.alert_batch_window = alert_batch_window
+        self.alert_max_batch_size = alert_max_batch_size
+        self.alert_http = alert_http
+        self.alert_outbox = alert_outbox
+        self.alert_outbox_fsync = alert_outbox_fsync
+        self.alert_events = alert_events
+        self.alert_drain_timeout = alert_drain_timeout
+        self.alert_drain_signals = alert_drain_signals
+        self.alert_warmup = alert_warmup
+        self.alert_metrics_file = alert_metrics_file
+        self.alert_metrics_interval = alert_metrics_interval
 
         # 通知器配置
         self.notifiers = notifiers or []
@@ -254,7 +367,36 @@ class LogConfig:
             "alert_strategy": self.alert_strategy,
             "alert_retry": self.alert_retry,
             "alert_retry_delay": self.alert_retry_delay,
+            "alert_retry_max_delay": self.alert_retry_max_delay,
+            "alert_deadline": self.alert_deadline,
             "alert_timeout": self.alert_timeout,
+            "alert_dispatch_timeout": self.alert_dispatch_timeout,
+            "alert_hedge_delay": self.alert_hedge_delay,
+            "alert_async": self.alert_async,
+            "alert_backend": self.alert_backend,
+            "alert_sink": self.alert_sink,
+            "alert_queue_size": self.alert_queue_size,
+            "alert_overflow": self.alert_overflow,
+            "alert_block_timeout": self.alert_block_timeout,
+            "alert_queue_aging": self.alert_queue_aging,
+            "alert_dedup": self.alert_dedup,
+            "alert_dedup_window": self.alert_dedup_window,
+            "alert_dedup_max_entries": self.alert_dedup_max_entries,
+            "alert_coordination": self.alert_coordination,
+            "alert_storm": self.alert_storm,
+            "alert_routes": self.alert_routes,
+            "alert_silences": self.alert_silences,
+            "alert_batch_window": self.alert_batch_window,
+            "alert_max_batch_size": self.alert_max_batch_size,
+            "alert_http": self.alert_http,
+            "alert_outbox": self.alert_outbox,
+            "alert_outbox_fsync": self.alert_outbox_fsync,
+            "alert_events": self.alert_events,
+            "alert_drain_timeout": self.alert_drain_timeout,
+            "alert_drain_signals": self.alert_drain_signals,
+            "alert_warmup": self.alert_warmup,
+            "alert_metrics_file": self.alert_metrics_file,
+            "alert_metrics_interval": self.alert_metrics_interval,
         }
 
         # 如果设置了 logging_format，也包含到字典中
@@ -279,6 +421,7 @@ class LogConfig:
         # 读取文件内容
         with open(config_path, 'r', encoding='utf-8') as f:
             if config_path.suffix in ['.yaml', '.yml']:
+                import yaml
                 config_data = yaml.safe_load(f)
             elif config_path.suffix == '.json':
                 config_data = json.load(f)
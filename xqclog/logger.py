@@ -200,18 +200,60 @@ class XQCLogger:
         from .alerts import get_alert_manager
 
         self._alert_manager = get_alert_manager()
-        self._alert_manager.clear_notifiers()  # 清空之前的配置
+
+        if config.alert_backend not in ("thread", "process"):
+            raise ValueError(f"不支持的告警后端: {config.alert_backend}（可选 thread/process）")
+
+        if config.alert_backend == "process":
+            # 通知器只在子进程中创建，当前进程只把告警记录写入管道
+            self._alert_manager.start_process_backend(
+                config.to_dict(),
+                queue_size=config.alert_queue_size,
+                overflow=config.alert_overflow,
+                block_timeout=config.alert_block_timeout,
+                events=config.alert_events,
+            )
+            if config.notifiers:
+                if config.alert_sink:
+                    self._add_alert_handler()
+                self._alert_manager.install_exit_hooks(signals=config.alert_drain_signals)
+            return
 
         # 配置发送策略
         self._alert_manager.configure(
             strategy=config.alert_strategy,
             retry_count=config.alert_retry,
             retry_delay=config.alert_retry_delay,
+            retry_max_delay=config.alert_retry_max_delay,
+            deadline=config.alert_deadline,
             timeout=config.alert_timeout,
+            dispatch_timeout=config.alert_dispatch_timeout,
+            hedge_delay=config.alert_hedge_delay,
+            async_dispatch=config.alert_async,
+            queue_size=config.alert_queue_size,
+            overflow=config.alert_overflow,
+            block_timeout=config.alert_block_timeout,
+            dedup=config.alert_dedup,
+            dedup_window=config.alert_dedup_window,
+            dedup_max_entries=config.alert_dedup_max_entries,
+            coordination=config.alert_coordination,
+            storm=config.alert_storm,
+            routes=config.alert_routes,
+            silences=config.alert_silences,
+            batch_window=config.alert_batch_window,
+            max_batch_size=config.alert_max_batch_size,
+            http_options=config.alert_http,
+            outbox=config.alert_outbox,
+            outbox_fsync=config.alert_outbox_fsync,
+            metrics_file=config.alert_metrics_file,
+            metrics_interval=config.alert_metrics_interval,
+            events=config.alert_events,
+            drain_timeout=config.alert_drain_timeout,
+            queue_aging=config.alert_queue_aging,
         )
 
-        # 添加通知器
-        notifiers_added = 0
+        # 创建通知器，全部创建完后一次性替换之前的配置（正在发送的告警不受影响）
+        notifiers = []
         for notifier_config in config.notifiers:
             # 复制配置，避免修改原配置
             notifier_cfg = notifier_config.copy()
@@ -224,19 +266,32 @@ class XQCLogger:
             priority = notifier_cfg.pop("priority", 0)
 
             try:
-                self._alert_manager.add_notifier(
+                notifiers.append(self._alert_manager.create_notifier(
                     notifier_type,
                     priority=priority,
                     **notifier_cfg
-                )
-                notifiers_added += 1
+                ))
                 self.logger.debug(f"✅ 已添加通知器: {notifier_type} (优先级: {priority})")
             except Exception as e:
                 self.logger.error(f"❌ 添加通知器失败 ({notifier_type}): {e}")
 
+        self._alert_manager.replace_notifiers(notifiers)
+
         # 添加告警sink
-        if notifiers_added > 0:
-            self._add_alert_handler()
+        if notifiers:
+            if config.alert_sink:
+                self._add_alert_handler()
+            # 进程退出时在期限内发送剩余告警
+            self._alert_manager.install_exit_hooks(signals=config.alert_drain_signals)
+
+            # 补发上次运行未送达的告警
+            replayed = self._alert_manager.replay_outbox()
+            if replayed:
+                self.logger.debug(f"📮 正在补发 {replayed} 条上次未送达的告警")
+
+            # 在后台预热通知器，第一条告警不必再等待建立连接和获取token
+            if config.alert_warmup:
+                self._alert_manager.warmup()
 
     def _add_alert_handler(self) -> None:
         """添加告警处理器"""
@@ -250,24 +305,28 @@ class XQCLogger:
             # 从extra中获取alert参数
             force_send = record.get("extra", {}).get("_alert")
 
-            # 异步发送告警，避免阻塞日志系统
+            # 提交告警（启用 alert_async 时只入队，不阻塞日志调用）
             try:
-                self._alert_manager.send_alert(
+                self._alert_manager.submit_alert(
                     level=record["level"].name,
                     message=record["message"],
                     force_send=force_send,  # 传递强制发送标志
                     module=record.get("name"),
                     function=record.get("function"),
                     line=record.get("line"),
-                    extra=record.get("extra", {})
+                    extra=dict(record.get("extra", {})),
+                    timestamp=record["time"],
                 )
             except Exception as e:
                 # 发送告警失败不应该影响日志记录
-                print(f"❌ 发送告警失败: {e}")
+                from .alerts.events import emit
+                emit("alert.error", f"❌ 发送告警失败: {e}", level="error", error=str(e))
 
         self.logger.add(
             alert_sink,
-            level="DEBUG",  # 在通知器中会再次过滤级别
+            level="DEBUG",
+            # 按通知器 alert_levels 的并集预过滤，不告警的记录不会进入sink
+            filter=self._alert_manager.alert_filter,
             format="{message}",
         )
 